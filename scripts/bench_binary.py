@@ -0,0 +1,37 @@
+"""JSON vs parse cache vs binary snapshot: file size and load time.
+
+Usage: python scripts/bench_binary.py [count ...]
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import tempfile
+
+from bench_common import best_of, build_wide_tree
+
+from launch_tree.storage_json import JsonStorage
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(value) for value in argv] or [10_000, 100_000]
+    print(f"{'nodes':>7} {'json KB':>9} {'bin KB':>9} {'json ms':>9} {'cache ms':>9} {'bin ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            root = build_wide_tree(count)
+            storage = JsonStorage(Path(tmp) / f"launcher-{count}.json", binary_snapshot=True, parse_cache=False)
+            storage.save_tree(root)
+            json_load = best_of(JsonStorage(storage.path, parse_cache=False).load_tree, repeat=3)
+            cached = JsonStorage(storage.path)
+            cached.load_tree()
+            cache_load = best_of(cached.load_tree, repeat=3)
+            binary_load = best_of(storage.load_tree, repeat=3)
+            print(
+                f"{count:>7} {storage.path.stat().st_size / 1024:>9.0f} {storage.binary_path.stat().st_size / 1024:>9.0f}"
+                f" {json_load * 1000:>9.1f} {cache_load * 1000:>9.1f} {binary_load * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
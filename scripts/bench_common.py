@@ -0,0 +1,63 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import time
+import uuid
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from launch_tree.domain import Node  # noqa: E402
+
+
+def build_wide_tree(count: int, group_size: int = 100) -> Node:
+    """Root -> groups of ``group_size`` path/url items, ``count`` items in total."""
+
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    group: Node | None = None
+    for idx in range(count):
+        if idx % group_size == 0:
+            group = Node(id=str(uuid.uuid4()), name=f"Group {idx // group_size}", type="group", children=[])
+            root.children.append(group)
+        if idx % 3 == 0:
+            item = Node(id=str(uuid.uuid4()), name=f"Portal {idx}", type="url", target=f"https://intra.example.com/app/{idx}")
+        else:
+            item = Node(
+                id=str(uuid.uuid4()),
+                name=f"Tool {idx}",
+                type="path",
+                target=f"\\\\fileserver\\share\\tools\\bin\\tool_{idx}.exe",
+            )
+        assert group is not None
+        group.children.append(item)
+    return root
+
+
+def build_deep_tree(depth: int) -> Node:
+    """A single chain of nested groups ``depth`` levels below the root."""
+
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    current = root
+    for idx in range(depth):
+        child = Node(id=f"d{idx}", name=f"Level {idx}", type="group", children=[])
+        current.children.append(child)
+        current = child
+    current.children.append(Node(id="leaf", name="Leaf", type="path", target="C:/deep/leaf.txt"))
+    return root
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Best wall time of ``repeat`` runs, in seconds."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
@@ -0,0 +1,67 @@
+"""Resident memory of a loaded tree: slotted Node vs the former plain dataclass.
+
+Usage: python scripts/bench_memory.py [count ...]
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any
+import uuid
+
+from bench_common import build_wide_tree
+
+from launch_tree.domain import Node
+
+
+@dataclass
+class LegacyNode:
+    """Node layout before slots/interning, kept here for comparison only."""
+
+    id: str
+    name: str
+    type: str = "group"
+    target: str = ""
+    children: list["LegacyNode"] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LegacyNode":
+        node_id = str(data.get("id") or uuid.uuid4())
+        name = str(data.get("name") or "Unnamed")
+        node_type = str(data.get("type") or "group")
+        target = str(data.get("target") or "")
+        children_raw = data.get("children") or []
+        children = [cls.from_dict(child) for child in children_raw if isinstance(child, dict)]
+        return cls(id=node_id, name=name, type=node_type, target=target, children=children)
+
+
+def retained_bytes(text: str, loader) -> int:
+    gc.collect()
+    tracemalloc.start()
+    payload = json.loads(text)
+    tree = loader(payload)
+    del payload
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return current
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(value) for value in argv] or [10_000, 100_000]
+    print(f"{'nodes':>8} {'legacy MB':>10} {'slots MB':>10} {'saved':>7}")
+    for count in counts:
+        text = json.dumps(build_wide_tree(count).to_dict())
+        legacy = retained_bytes(text, LegacyNode.from_dict)
+        compact = retained_bytes(text, Node.from_dict)
+        saved = 1 - compact / legacy
+        print(f"{count:>8} {legacy / 1e6:>10.1f} {compact / 1e6:>10.1f} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,87 @@
+"""Tree model cost: build/rebuild time, one edit, one launch and Python memory of LauncherTreeModel.
+
+"proxy" is the first screen through TreeFilterProxyModel, which is what the
+window shows (collapsed rows must not pull in their children).
+
+Usage: python scripts/bench_model.py [count ...]
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from bench_common import best_of, build_wide_tree
+
+from PyQt6.QtWidgets import QApplication
+
+from launch_tree.domain import Node, insert_node, remove_node
+from launch_tree.model_filter import TreeFilterProxyModel
+from launch_tree.model_qt import LauncherTreeModel
+from launch_tree.tree_ops import delete_op, insert_op
+
+
+def first_screen(model, rows: int = 40) -> None:
+    """What a freshly shown view asks for: the top-level rows and their data."""
+
+    for row in range(min(rows, model.rowCount())):
+        index = model.index(row, 0)
+        index.data()
+        model.hasChildren(index)
+
+
+def main(argv: list[str]) -> None:
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    counts = [int(value) for value in argv] or [50_000]
+    for count in counts:
+        root = build_wide_tree(count)
+        user_state = {"favorites": {root.children[0].id: True}, "recent": [], "ui": {}}
+
+        gc.collect()
+        tracemalloc.start()
+        model = LauncherTreeModel(root, user_state)
+        first_screen(model)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        build = best_of(lambda: first_screen(LauncherTreeModel(root, user_state)), repeat=3)
+        rebuild = best_of(lambda: (model.rebuild(), first_screen(model)), repeat=3)
+        proxied = best_of(lambda: first_screen(proxy_for(root, user_state)), repeat=3)
+        edit = best_of(lambda: insert_and_delete(model, root), repeat=3)
+        launch = best_of(lambda: record_launch(model, root), repeat=3)
+        print(
+            f"{count} nodes: build {build * 1000:.1f} ms, proxy {proxied * 1000:.1f} ms, rebuild {rebuild * 1000:.1f} ms, "
+            f"insert+delete via apply_ops {edit * 1000:.2f} ms, launch {launch * 1000:.2f} ms, "
+            f"model memory {current / 1024:.0f} KiB"
+        )
+
+
+def proxy_for(root: Node, user_state: dict) -> TreeFilterProxyModel:
+    proxy = TreeFilterProxyModel(root)
+    proxy.setSourceModel(LauncherTreeModel(root, user_state))
+    return proxy
+
+
+def insert_and_delete(model: LauncherTreeModel, root: Node) -> None:
+    node = Node.make(name="bench", node_type="url", target="https://example.com")
+    insert_node(root, root.id, 0, node)
+    model.apply_ops([insert_op(root, node)])
+    remove_node(root, node.id)
+    model.apply_ops([delete_op(node.id)])
+
+
+def record_launch(model: LauncherTreeModel, root: Node) -> None:
+    """What launching a node costs the model: Recent gains the node at the top."""
+
+    recent = model.user_state["recent"]
+    launched = root.children[len(recent) % len(root.children)].id
+    model.user_state["recent"] = [{"id": launched}] + [entry for entry in recent if entry["id"] != launched][:19]
+    model.refresh_sections("virtual:recent")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,49 @@
+"""Fuzzy quick-launch ranking latency (top 10) over a large tree.
+
+Usage: python scripts/bench_quick_launch.py [count ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from bench_common import best_of, build_wide_tree
+
+from launch_tree.quick_launch_logic import QuickLaunchIndex
+
+QUERIES = ["zzz", "p9999", "portal 99", "tool 4241", "tl 4242", "t42", "tool 4", "tool", "t"]
+TYPED = "tool 4241"
+
+
+def cold_search(index: QuickLaunchIndex, query: str) -> float:
+    """Seconds for ``query`` with no previous query to refine from (corpus already built)."""
+
+    index.invalidate()
+    index._ensure_built()
+    started = time.perf_counter()
+    index.search(query)
+    return time.perf_counter() - started
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(value) for value in argv] or [100_000]
+    for count in counts:
+        root = build_wide_tree(count)
+        index = QuickLaunchIndex(root)
+        build = best_of(lambda: (index.invalidate(), index._ensure_built()), repeat=1)
+        print(f"{count} nodes: corpus build {build * 1000:.0f} ms")
+        print(f"  {'query':<12} {'cold ms':>8}")
+        for query in QUERIES:
+            elapsed = min(cold_search(index, query) for _ in range(3))
+            print(f"  {query!r:<12} {elapsed * 1000:>8.1f}")
+        print(f"  typing {TYPED!r} (ms per keystroke)")
+        index.invalidate()
+        index._ensure_built()
+        for end in range(1, len(TYPED) + 1):
+            elapsed = best_of(lambda: index.search(TYPED[:end]), repeat=1)
+            print(f"    {TYPED[:end]!r:<12} {elapsed * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,67 @@
+"""Full-scan filtering vs the trigram search index, per query and while typing.
+
+Usage: python scripts/bench_search.py [count ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+
+from bench_common import best_of, build_wide_tree
+
+from launch_tree.filter_logic import compute_visible_node_ids
+from launch_tree.search_index import SearchIndex
+
+QUERIES = ["t", "to", "too", "tool", "tool_", "tool_4", "tool_42", "portal 9", "fileserver", "zzz"]
+TYPED = ["\\\\fileserver\\share\\tools\\bin\\tool_4242.exe", "https://intra.example.com/app/4"]
+
+
+def typing_latency(visible_ids, text: str) -> tuple[float, float]:
+    """(mean, max) seconds per keystroke while ``text`` is typed one character at a time."""
+
+    timings = []
+    for end in range(1, len(text) + 1):
+        started = time.perf_counter()
+        visible_ids(text[:end])
+        timings.append(time.perf_counter() - started)
+    return sum(timings) / len(timings), max(timings)
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(value) for value in argv] or [10_000, 50_000]
+    for count in counts:
+        root = build_wide_tree(count)
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = SearchIndex(root)
+        index.rebuild()
+        build = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{count} nodes: index build {build * 1000:.0f} ms, {memory / 1024 / 1024:.1f} MiB")
+        print(f"  {'query':<12} {'scan ms':>9} {'index ms':>9}")
+        for query in QUERIES:
+            scan = best_of(lambda: compute_visible_node_ids(root, query), repeat=3)
+            indexed = best_of(lambda: index.visible_node_ids(query), repeat=3)
+            print(f"  {query!r:<12} {scan * 1000:>9.1f} {indexed * 1000:>9.1f}")
+
+        def without_refinement(query: str) -> set[str]:
+            index._forget_matches()
+            return index.visible_node_ids(query)
+
+        print(f"  typing (mean / max ms per keystroke)")
+        for text in TYPED:
+            print(f"    {text!r}")
+            for label, fn in (
+                ("scan", lambda query: compute_visible_node_ids(root, query)),
+                ("index", without_refinement),
+                ("refined", index.visible_node_ids),
+            ):
+                mean, worst = typing_latency(fn, text)
+                print(f"      {label:<8} {mean * 1000:>7.1f} / {worst * 1000:>7.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
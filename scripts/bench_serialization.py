@@ -0,0 +1,59 @@
+"""Load/save throughput of JsonStorage on wide and deep trees.
+
+Usage: python scripts/bench_serialization.py
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import tempfile
+
+from bench_common import best_of, build_deep_tree, build_wide_tree
+
+from launch_tree.domain import Node
+from launch_tree.storage_json import JsonStorage
+
+
+def count_nodes(root: Node) -> int:
+    total = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.children)
+    return total
+
+
+def legacy_save(storage: JsonStorage, root: Node) -> None:
+    """Former save path: to_dict + json.dumps(indent=2), both recursive."""
+
+    serialized = json.dumps(root.to_dict(), ensure_ascii=False, indent=2)
+    storage.path.write_text(serialized + "\n", encoding="utf-8")
+    storage.backup_path.write_text(serialized + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    cases = [
+        ("wide 10k", build_wide_tree(10_000)),
+        ("wide 100k", build_wide_tree(100_000)),
+        ("deep 900", build_deep_tree(900)),
+        ("deep 10k", build_deep_tree(10_000)),
+    ]
+    print(f"{'case':<10} {'nodes':>7} {'save ms':>9} {'legacy':>9} {'load ms':>9} {'knodes/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = JsonStorage(Path(tmp) / "launcher.json")
+        for label, root in cases:
+            nodes = count_nodes(root)
+            save = best_of(lambda: storage.save_tree(root), repeat=3)
+            try:
+                legacy = f"{best_of(lambda: legacy_save(storage, root), repeat=3) * 1000:>9.1f}"
+            except RecursionError:
+                legacy = f"{'fails':>9}"
+            storage.save_tree(root)
+            load = best_of(storage.load_tree, repeat=3)
+            print(f"{label:<10} {nodes:>7} {save * 1000:>9.1f} {legacy} {load * 1000:>9.1f} {nodes / load / 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""JSON vs SQLite storage: full load/save and the cost of persisting one rename.
+
+Usage: python scripts/bench_storage.py [count ...]
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import tempfile
+
+from bench_common import best_of, build_wide_tree
+
+from launch_tree.storage_json import JsonStorage
+from launch_tree.storage_sqlite import SqliteStorage
+from launch_tree.tree_ops import update_op
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(value) for value in argv] or [1_000, 10_000, 100_000]
+    print(f"{'nodes':>7} {'backend':<7} {'save ms':>9} {'load ms':>9} {'rename ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            root = build_wide_tree(count)
+            renamed = root.children[-1].children[-1]
+            backends = [
+                ("json", JsonStorage(Path(tmp) / f"launcher-{count}.json")),
+                ("sqlite", SqliteStorage(Path(tmp) / f"launcher-{count}.sqlite3")),
+            ]
+            for label, storage in backends:
+                save = best_of(lambda: storage.save_tree(root), repeat=3)
+                load = best_of(storage.load_tree, repeat=3)
+
+                def rename() -> None:
+                    renamed.name = f"{renamed.name[:20]}*"
+                    storage.save_changes(root, [update_op(renamed)])
+
+                edit = best_of(rename, repeat=5)
+                print(f"{count:>7} {label:<7} {save * 1000:>9.1f} {load * 1000:>9.1f} {edit * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
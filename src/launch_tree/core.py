@@ -3,16 +3,21 @@
 from __future__ import annotations
 
 import logging
+import os
 from pathlib import Path
 import sys
 import traceback
 
 from .storage_json import JsonStorage
+from .storage_journal import JournalStorage
+from .storage_sqlite import SqliteStorage
 
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 LOG_PATH = ROOT_DIR / "logs" / "app.log"
 DATA_PATH = ROOT_DIR / "data" / "launcher.json"
+STORAGE_ENV = "LAUNCH_TREE_STORAGE"
+BINARY_SNAPSHOT_ENV = "LAUNCH_TREE_BINARY_SNAPSHOT"
 
 
 def setup_logging() -> None:
@@ -27,6 +32,20 @@ def setup_logging() -> None:
     )
 
 
+def create_storage(mode: str | None = None) -> JsonStorage | SqliteStorage:
+    """Storage selected by ``LAUNCH_TREE_STORAGE`` (json / journal / sqlite)."""
+
+    selected = (mode or os.environ.get(STORAGE_ENV) or "json").strip().lower()
+    binary_snapshot = os.environ.get(BINARY_SNAPSHOT_ENV, "").strip().lower() in {"1", "true", "yes"}
+    if selected == "journal":
+        return JournalStorage(DATA_PATH, binary_snapshot=binary_snapshot)
+    if selected == "sqlite":
+        return SqliteStorage(DATA_PATH.with_suffix(".sqlite3"), json_path=DATA_PATH)
+    if selected != "json":
+        logging.warning("Unknown storage mode %r; using json", selected)
+    return JsonStorage(DATA_PATH, binary_snapshot=binary_snapshot)
+
+
 def _handle_unexpected_exception(exc_type, exc_value, exc_tb):
     from PyQt6.QtWidgets import QApplication, QMessageBox
 
@@ -51,7 +70,8 @@ def main() -> int:
 
     app.setStyleSheet(APP_QSS)
 
-    storage = JsonStorage(DATA_PATH)
+    storage = create_storage()
+    logging.info("Using %s", type(storage).__name__)
     window = MainWindow(storage)
     window.show()
     return app.exec()
@@ -3,42 +3,73 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+import sys
 from typing import Any
 import uuid
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
-    """Tree node for groups/items."""
+    """Tree node for groups/items.
+
+    Slotted to keep per-node overhead low on large trees; ``type`` values are
+    interned so every node of the same kind shares one string.
+    """
 
     id: str
     name: str
     type: str = "group"
     target: str = ""
     children: list["Node"] = field(default_factory=list)
+    _index: "TreeIndex | None" = field(default=None, init=False, repr=False, compare=False)
+    # filter_logic.node_search_keys のキャッシュ
+    _search_keys: tuple | None = field(default=None, init=False, repr=False, compare=False)
 
     @staticmethod
     def make(name: str, node_type: str = "group", target: str = "") -> "Node":
-        return Node(id=str(uuid.uuid4()), name=name, type=node_type, target=target)
+        return Node(id=str(uuid.uuid4()), name=name, type=sys.intern(node_type), target=target)
 
     def to_dict(self) -> dict[str, Any]:
+        result = self._fields_dict()
+        stack: list[tuple[Node, list[dict[str, Any]]]] = [(self, result["children"])]
+        while stack:
+            node, children_out = stack.pop()
+            for child in node.children:
+                child_out = child._fields_dict()
+                children_out.append(child_out)
+                stack.append((child, child_out["children"]))
+        return result
+
+    def _fields_dict(self) -> dict[str, Any]:
         return {
             "id": self.id,
             "name": self.name,
             "type": self.type,
             "target": self.target,
-            "children": [child.to_dict() for child in self.children],
+            "children": [],
         }
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Node":
+        root = cls._from_fields(data)
+        stack: list[tuple[dict[str, Any], Node]] = [(data, root)]
+        while stack:
+            raw, node = stack.pop()
+            for child_raw in raw.get("children") or []:
+                if not isinstance(child_raw, dict):
+                    continue
+                child = cls._from_fields(child_raw)
+                node.children.append(child)
+                stack.append((child_raw, child))
+        return root
+
+    @classmethod
+    def _from_fields(cls, data: dict[str, Any]) -> "Node":
         node_id = str(data.get("id") or uuid.uuid4())
         name = str(data.get("name") or "Unnamed")
-        node_type = str(data.get("type") or "group")
+        node_type = sys.intern(str(data.get("type") or "group"))
         target = str(data.get("target") or "")
-        children_raw = data.get("children") or []
-        children = [cls.from_dict(child) for child in children_raw if isinstance(child, dict)]
-        return cls(id=node_id, name=name, type=node_type, target=target, children=children)
+        return cls(id=node_id, name=name, type=node_type, target=target, children=[])
 
 
 @dataclass
@@ -48,27 +79,120 @@ class NodeRef:
     index: int
 
 
+class TreeIndex:
+    """id -> NodeRef index owned by a root node.
+
+    The mutation helpers in this module keep it up to date. Code that edits
+    ``children`` lists directly must call ``invalidate_index`` afterwards.
+    """
+
+    def __init__(self, root: Node):
+        self.root = root
+        self.refs: dict[str, NodeRef] = {}
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        self.refs = {}
+        self.attach(self.root, None, -1)
+
+    def get(self, node_id: str) -> NodeRef | None:
+        ref = self.refs.get(node_id)
+        if ref is None or self._is_current(ref):
+            return ref
+        # children が直接書き換えられていた場合は作り直す
+        self.rebuild()
+        return self.refs.get(node_id)
+
+    def is_ancestor_or_self(self, ancestor: Node, node: Node) -> bool:
+        """Walk parent links from ``node`` upwards; cost is O(depth)."""
+
+        current: Node | None = node
+        while current is not None:
+            if current is ancestor:
+                return True
+            ref = self.get(current.id)
+            if ref is None:
+                return False
+            current = ref.parent
+        return False
+
+    def _is_current(self, ref: NodeRef) -> bool:
+        if ref.parent is None:
+            return ref.node is self.root
+        siblings = ref.parent.children
+        return 0 <= ref.index < len(siblings) and siblings[ref.index] is ref.node
+
+    def attach(self, node: Node, parent: Node | None, index: int) -> None:
+        """Register ``node`` and its subtree after it was placed at ``parent.children[index]``."""
+
+        self.refs[node.id] = NodeRef(node=node, parent=parent, index=index)
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for idx, child in enumerate(current.children):
+                self.refs[child.id] = NodeRef(node=child, parent=current, index=idx)
+                stack.append(child)
+        if parent is not None:
+            self.renumber(parent, index + 1)
+
+    def detach(self, node: Node, parent: Node, index: int) -> None:
+        """Forget ``node`` and its subtree after it was popped from ``parent.children[index]``."""
+
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self.refs.pop(current.id, None)
+            stack.extend(current.children)
+        self.renumber(parent, index)
+
+    def renumber(self, parent: Node, start: int) -> None:
+        siblings = parent.children
+        for idx in range(max(0, start), len(siblings)):
+            ref = self.refs.get(siblings[idx].id)
+            if ref is not None and ref.node is siblings[idx]:
+                ref.index = idx
+
+
 def default_root() -> Node:
     return Node(id="root", name="Root", type="group", target="", children=[])
 
 
-def find_node_ref(root: Node, node_id: str, parent: Node | None = None) -> NodeRef | None:
-    if root.id == node_id:
-        return NodeRef(node=root, parent=parent, index=-1)
+def copy_tree(root: Node) -> Node:
+    """Structural copy of the tree; node field strings are shared, not duplicated."""
+
+    copy = Node(id=root.id, name=root.name, type=root.type, target=root.target, children=[])
+    stack = [(root, copy)]
+    while stack:
+        node, node_copy = stack.pop()
+        for child in node.children:
+            child_copy = Node(id=child.id, name=child.name, type=child.type, target=child.target, children=[])
+            node_copy.children.append(child_copy)
+            stack.append((child, child_copy))
+    return copy
+
+
+def tree_index(root: Node) -> TreeIndex:
+    if root._index is None or root._index.root is not root:
+        root._index = TreeIndex(root)
+    return root._index
+
 
-    for idx, child in enumerate(root.children):
-        if child.id == node_id:
-            return NodeRef(node=child, parent=root, index=idx)
-        found = find_node_ref(child, node_id, root)
-        if found is not None:
-            return found
-    return None
+def invalidate_index(root: Node) -> None:
+    root._index = None
+
+
+def find_node_ref(root: Node, node_id: str) -> NodeRef | None:
+    return tree_index(root).get(node_id)
 
 
 def contains_node_id(node: Node, node_id: str) -> bool:
-    if node.id == node_id:
-        return True
-    return any(contains_node_id(child, node_id) for child in node.children)
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.id == node_id:
+            return True
+        stack.extend(current.children)
+    return False
 
 
 def resolve_insert_parent_and_row(root: Node, selected_id: str | None) -> tuple[Node, int]:
@@ -89,19 +213,46 @@ def resolve_insert_parent_and_row(root: Node, selected_id: str | None) -> tuple[
     return selected_ref.parent, selected_ref.index + 1
 
 
+def insert_node(root: Node, parent_id: str, row: int, new_node: Node) -> bool:
+    """Insert ``new_node`` under ``parent_id``. Type rules are left to the caller."""
+
+    index = tree_index(root)
+    parent_ref = index.get(parent_id)
+    if parent_ref is None:
+        return False
+    parent = parent_ref.node
+    bounded_row = max(0, min(row, len(parent.children)))
+    parent.children.insert(bounded_row, new_node)
+    index.attach(new_node, parent, bounded_row)
+    return True
+
+
 def insert_relative_to_selection(root: Node, selected_id: str | None, new_node: Node) -> bool:
     parent, row = resolve_insert_parent_and_row(root, selected_id)
     if parent.type != "group":
         return False
-    parent.children.insert(row, new_node)
-    return True
+    return insert_node(root, parent.id, row, new_node)
+
+
+def remove_node(root: Node, node_id: str) -> NodeRef | None:
+    """Detach a node from the tree. Returns its former location, or None when rejected."""
+
+    index = tree_index(root)
+    ref = index.get(node_id)
+    if ref is None or ref.parent is None:
+        return None
+    removed = NodeRef(node=ref.node, parent=ref.parent, index=ref.index)
+    ref.parent.children.pop(ref.index)
+    index.detach(removed.node, removed.parent, removed.index)
+    return removed
 
 
 def move_node(root: Node, source_id: str, destination_parent_id: str, destination_row: int) -> bool:
     """Move node safely. Returns False when move is rejected."""
 
-    source_ref = find_node_ref(root, source_id)
-    dest_ref = find_node_ref(root, destination_parent_id)
+    index = tree_index(root)
+    source_ref = index.get(source_id)
+    dest_ref = index.get(destination_parent_id)
     if source_ref is None or dest_ref is None:
         return False
 
@@ -112,7 +263,7 @@ def move_node(root: Node, source_id: str, destination_parent_id: str, destinatio
         return False
     if source.id == dest_parent.id:
         return False
-    if contains_node_id(source, dest_parent.id):
+    if index.is_ancestor_or_self(source, dest_parent):
         return False
     if dest_parent.type != "group":
         return False
@@ -123,10 +274,14 @@ def move_node(root: Node, source_id: str, destination_parent_id: str, destinatio
     src_index = source_ref.index
 
     node = src_parent.children.pop(src_index)
+    index.renumber(src_parent, src_index)
 
     if src_parent.id == dest_parent.id and destination_row > src_index:
         destination_row -= 1
 
     bounded_row = max(0, min(destination_row, len(dest_parent.children)))
     dest_parent.children.insert(bounded_row, node)
+    source_ref.parent = dest_parent
+    source_ref.index = bounded_row
+    index.renumber(dest_parent, bounded_row + 1)
     return True
@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
+import sys
+
 from .domain import Node
 
 ALLOWED_NODE_TYPES = {"group", "path", "url", "separator"}
@@ -13,7 +16,10 @@ def apply_node_update(
     new_name: str | None = None,
     new_type: str | None = None,
     new_target: str | None = None,
+    on_target_change: Callable[[str, str], None] | None = None,
 ) -> tuple[bool, str | None]:
+    """Validate and apply an edit; ``on_target_change(old, new)`` runs when the target changed."""
+
     final_name = node.name if new_name is None else new_name.strip()
     final_type = node.type if new_type is None else new_type.strip()
 
@@ -34,7 +40,10 @@ def apply_node_update(
         if not final_target:
             return False, "target is required for path/url"
 
+    previous_target = node.target
     node.name = final_name
-    node.type = final_type
+    node.type = sys.intern(final_type)
     node.target = final_target
+    if on_target_change is not None and final_target != previous_target:
+        on_target_change(previous_target, final_target)
     return True, None
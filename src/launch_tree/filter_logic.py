@@ -2,54 +2,101 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
+import unicodedata
+
 from .domain import Node
 
+SearchKeys = tuple[str, str, str]
+
+
+def normalize_search_text(text: str) -> str:
+    """NFKC + casefold, so full-width / half-width forms and letter case compare equal."""
+
+    if text.isascii():
+        lowered = text.lower()
+        # 変化がなければ元の文字列をそのまま使い、キャッシュのメモリを抑える
+        return text if lowered == text else lowered
+    return unicodedata.normalize("NFKC", unicodedata.normalize("NFKC", text).casefold())
+
+
+def normalize_query(query: str) -> str:
+    return normalize_search_text(query.strip())
+
+
+def node_search_keys(node: Node) -> SearchKeys:
+    """Normalized (name, target, type), cached on the node.
+
+    The cache remembers the exact string objects it was computed from, so
+    assigning a new name/target/type invalidates it without any bookkeeping.
+    """
+
+    name, target, node_type = node.name or "", node.target or "", node.type or ""
+    cached = node._search_keys
+    if cached is not None and cached[0] is name and cached[1] is target and cached[2] is node_type:
+        return cached[3]
+    keys = (normalize_search_text(name), normalize_search_text(target), normalize_search_text(node_type))
+    node._search_keys = (name, target, node_type, keys)
+    return keys
+
 
 def node_matches_query(node: Node, query: str) -> bool:
-    needle = query.strip().lower()
+    needle = normalize_query(query)
     if not needle:
         return True
-    haystacks = [node.name, node.target, node.type]
-    return any(needle in (text or "").lower() for text in haystacks)
+    return _matches(node, needle)
+
+
+def _matches(node: Node, needle: str) -> bool:
+    name, target, node_type = node_search_keys(node)
+    return needle in name or needle in target or needle in node_type
 
 
 def _collect_all_ids(node: Node, output: set[str]) -> None:
-    output.add(node.id)
-    for child in node.children:
-        _collect_all_ids(child, output)
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        output.add(current.id)
+        stack.extend(current.children)
 
 
 def compute_visible_node_ids(root: Node, query: str) -> set[str]:
-    needle = query.strip().lower()
+    needle = normalize_query(query)
     if not needle:
         all_ids: set[str] = set()
         _collect_all_ids(root, all_ids)
         return all_ids
+    return visible_ids_matching(root, lambda node: _matches(node, needle))
 
-    visible_ids: set[str] = set()
-
-    def walk(node: Node, force_visible_by_group_ancestor: bool = False) -> bool:
-        matched_self = node_matches_query(node, needle)
 
-        child_force_visible = force_visible_by_group_ancestor or (node.type == "group" and matched_self)
-
-        child_visible_map: dict[str, bool] = {}
-        for child in node.children:
-            child_visible_map[child.id] = walk(child, child_force_visible)
+def visible_ids_matching(root: Node, matches: Callable[[Node], bool]) -> set[str]:
+    """Visible ids when exactly the nodes accepted by ``matches`` are hits.
 
-        has_visible_non_separator_child = any(
-            child_visible_map.get(child.id, False) and child.type != "separator" for child in node.children
-        )
+    Applies the group / separator rules of ``compute_visible_node_ids``.
+    """
 
-        visible = matched_self or force_visible_by_group_ancestor
-        if node.type == "group":
-            visible = visible or any(child_visible_map.values())
-        elif node.type == "separator":
-            visible = visible or has_visible_non_separator_child
+    # 1st pass (pre-order): 自身のマッチと、マッチした group 祖先による強制表示
+    order: list[tuple[Node, bool]] = []
+    stack: list[tuple[Node, bool]] = [(root, False)]
+    while stack:
+        node, force_visible_by_group_ancestor = stack.pop()
+        matched_self = matches(node)
+        order.append((node, matched_self or force_visible_by_group_ancestor))
+        child_force_visible = force_visible_by_group_ancestor or (node.type == "group" and matched_self)
+        stack.extend((child, child_force_visible) for child in node.children)
 
+    # 2nd pass (reverse pre-order = children before parents): 子の表示状態を親へ伝播
+    visible_ids: set[str] = set()
+    visible_by_node: dict[int, bool] = {}
+    for node, visible in reversed(order):
+        if not visible:
+            if node.type == "group":
+                visible = any(visible_by_node[id(child)] for child in node.children)
+            elif node.type == "separator":
+                visible = any(
+                    visible_by_node[id(child)] and child.type != "separator" for child in node.children
+                )
+        visible_by_node[id(node)] = visible
         if visible:
             visible_ids.add(node.id)
-        return visible
-
-    walk(root)
     return visible_ids
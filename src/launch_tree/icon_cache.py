@@ -0,0 +1,146 @@
+"""Icon caches: a bounded in-memory LRU and an on-disk cache of rendered icons.
+
+``LruCache`` keeps the most recently used entries within an entry count and an
+approximate byte budget and counts hits, misses and evictions for diagnostics.
+
+``IconDiskCache`` lets warm starts skip icon extraction. Entries are keyed by
+target path and hold the target's (size, mtime_ns) next to the rendered images
+(PNG bytes). The caller compares that key with a fresh stat of the target; a
+mismatch means the file changed and the entry is replaced. The file is a
+marshalled dict, read on first use and rewritten by ``save`` only when something
+changed. Any decode error or version mismatch is an empty cache.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+import logging
+import marshal
+import os
+from pathlib import Path
+import sys
+from typing import Any
+
+CACHE_VERSION = 1
+_PYTHON = tuple(sys.version_info[:2])
+
+IconKey = tuple[int, int]
+IconEntry = tuple[IconKey, list[bytes]]
+
+
+@dataclass
+class CacheStats:
+    entries: int = 0
+    bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class LruCache:
+    """Mapping bounded by ``max_entries`` and by the summed ``sizeof`` of its values.
+
+    The least recently used entries are evicted first; the newest entry is kept
+    even when it alone exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, sizeof: Callable[[Any], int]):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._items: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            self._stats.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self._stats.hits += 1
+        return item[0]
+
+    def put(self, key: str, value: Any) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._stats.bytes -= old[1]
+        size = max(0, int(self.sizeof(value)))
+        self._items[key] = (value, size)
+        self._stats.bytes += size
+        items = self._items
+        while len(items) > 1 and (len(items) > self.max_entries or self._stats.bytes > self.max_bytes):
+            _, (_, evicted_size) = items.popitem(last=False)
+            self._stats.bytes -= evicted_size
+            self._stats.evictions += 1
+
+    def pop(self, key: str) -> bool:
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+        self._stats.bytes -= item[1]
+        self._stats.invalidations += 1
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> CacheStats:
+        return replace(self._stats, entries=len(self._items))
+
+
+class IconDiskCache:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, tuple[int, int, list[bytes]]] | None = None
+        self._dirty = False
+
+    def get(self, target: str) -> IconEntry | None:
+        entry = self._load().get(target)
+        if entry is None:
+            return None
+        size, mtime_ns, images = entry
+        return (size, mtime_ns), images
+
+    def put(self, target: str, key: IconKey, images: list[bytes]) -> None:
+        self._load()[target] = (key[0], key[1], list(images))
+        self._dirty = True
+
+    def discard(self, target: str) -> None:
+        if self._load().pop(target, None) is not None:
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def save(self) -> None:
+        if not self._dirty or self._entries is None:
+            return
+        payload = (CACHE_VERSION, _PYTHON, self._entries)
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temp_path.write_bytes(marshal.dumps(payload))
+        os.replace(temp_path, self.path)
+        self._dirty = False
+
+    def _load(self) -> dict[str, tuple[int, int, list[bytes]]]:
+        if self._entries is None:
+            self._entries = _read(self.path)
+        return self._entries
+
+
+def _read(path: Path) -> dict[str, tuple[int, int, list[bytes]]]:
+    try:
+        if not path.exists():
+            return {}
+        version, python, entries = marshal.loads(path.read_bytes())
+    except Exception:
+        logging.warning("Ignoring unreadable icon cache %s", path)
+        return {}
+    if version != CACHE_VERSION or python != _PYTHON or not isinstance(entries, dict):
+        return {}
+    return entries
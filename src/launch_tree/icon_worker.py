@@ -0,0 +1,189 @@
+"""Probes icon targets off the UI thread."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+import logging
+import ntpath
+import os
+import threading
+import time
+from typing import Any
+
+ProbeResult = Callable[[str, Any], None]
+
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_MAX_ABANDONED = 4
+
+# 「分からない」（時間切れ・確認を飛ばした・例外）を「存在しない」(None) と区別する
+PROBE_UNKNOWN = object()
+
+
+def path_stat(target: str) -> tuple[int, int] | None:
+    """(size, mtime_ns) of ``target``; None when it does not exist."""
+
+    try:
+        stat = os.stat(target)
+    except (OSError, ValueError):
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def share_root(target: str) -> str:
+    """Drive (``c:``) or UNC share (``\\\\server\\share``) of a Windows path, lower-cased; "" if none."""
+
+    return ntpath.splitdrive(target)[0].replace("/", "\\").lower()
+
+
+class IconProbeWorker:
+    """Runs ``probe(target)`` for icon targets on at most ``max_workers`` threads.
+
+    ``on_result(target, value)`` gets the probe's return value, or
+    ``PROBE_UNKNOWN`` when the probe raised or has not answered after
+    ``timeout`` seconds (ask again later); such a probe is
+    left to finish on its own daemon thread, so an unreachable network share
+    cannot hold a worker. Repeated requests for a target that is still queued or
+    running are merged. ``on_result`` runs on a worker thread.
+
+    Abandoned probes are counted so they cannot pile up: while one is still
+    stuck on a drive or share, other targets there are answered with
+    ``PROBE_UNKNOWN`` without touching the file system, and no probe is started while
+    ``max_abandoned`` of them are still running. At most
+    ``max_workers + max_abandoned`` probe calls are alive at any time. When a
+    stuck call returns, its answer is still delivered and the targets skipped
+    on its share are queued again.
+    """
+
+    def __init__(
+        self,
+        on_result: ProbeResult,
+        probe: Callable[[str], Any] = path_stat,
+        max_workers: int = DEFAULT_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_abandoned: int = DEFAULT_MAX_ABANDONED,
+    ):
+        self.on_result = on_result
+        self.probe = probe
+        self.timeout = timeout
+        self.max_abandoned = max(1, max_abandoned)
+        self._cond = threading.Condition()
+        self._queue: deque[str] = deque()
+        self._pending: set[str] = set()
+        self._closed = False
+        # 時間切れで見捨てた呼び出しの数（全体 / share_root ごと）
+        self._abandoned = 0
+        self._stuck_roots: dict[str, int] = {}
+        # 応答のない share で確認を飛ばしたターゲット（share が戻ったら積み直す）
+        self._skipped: dict[str, set[str]] = {}
+        self._threads = [
+            threading.Thread(target=self._run, name=f"icon-probe-{idx}", daemon=True) for idx in range(max(1, max_workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def request(self, target: str) -> bool:
+        """Queue ``target``; False when it is already pending or the worker is closed."""
+
+        with self._cond:
+            if self._closed or target in self._pending:
+                return False
+            self._pending.add(target)
+            self._queue.append(target)
+            self._cond.notify()
+            return True
+
+    def close(self, timeout: float | None = None) -> None:
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    @property
+    def abandoned(self) -> int:
+        """Probes that timed out and have not returned yet."""
+
+        with self._cond:
+            return self._abandoned
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (not self._queue or self._abandoned >= self.max_abandoned):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                target = self._queue.popleft()
+                root = share_root(target)
+                stuck = bool(root) and root in self._stuck_roots
+                if stuck:
+                    self._skipped.setdefault(root, set()).add(target)
+            if stuck:
+                logging.debug("Skipping icon probe on unresponsive %s: %s", root, target)
+                value = PROBE_UNKNOWN
+            else:
+                value = self._probe_with_timeout(target, root)
+            with self._cond:
+                if self._closed:
+                    return
+                self._pending.discard(target)
+            self._deliver(target, value)
+
+    def _deliver(self, target: str, value: Any) -> None:
+        try:
+            self.on_result(target, value)
+        except Exception:
+            logging.exception("Icon probe result handler failed for %s", target)
+
+    def _probe_with_timeout(self, target: str, root: str) -> Any:
+        result: list = []
+        abandoned = False
+
+        def run() -> None:
+            try:
+                value = self.probe(target)
+            except Exception:
+                logging.debug("Icon probe failed for %s", target, exc_info=True)
+                value = PROBE_UNKNOWN
+            with self._cond:
+                result.append(value)
+                late = abandoned and not self._closed
+                if abandoned:
+                    self._release_abandoned(root)
+            # 見捨てた後に戻った答えも捨てずに届ける
+            if late and value is not PROBE_UNKNOWN:
+                self._deliver(target, value)
+
+        # 止められない呼び出しなので別スレッドで待ち、時間切れなら見捨てる
+        call = threading.Thread(target=run, name="icon-probe-call", daemon=True)
+        call.start()
+        call.join(self.timeout)
+        with self._cond:
+            if not result:
+                abandoned = True
+                self._abandoned += 1
+                if root:
+                    self._stuck_roots[root] = self._stuck_roots.get(root, 0) + 1
+        if abandoned:
+            logging.warning("Icon probe timed out after %.1fs: %s", self.timeout, target)
+            return PROBE_UNKNOWN
+        return result[0]
+
+    def _release_abandoned(self, root: str) -> None:
+        self._abandoned -= 1
+        if root:
+            remaining = self._stuck_roots.get(root, 0) - 1
+            if remaining > 0:
+                self._stuck_roots[root] = remaining
+            else:
+                self._stuck_roots.pop(root, None)
+                for target in self._skipped.pop(root, ()):
+                    if not self._closed and target not in self._pending:
+                        self._pending.add(target)
+                        self._queue.append(target)
+        self._cond.notify_all()
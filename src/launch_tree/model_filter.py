@@ -2,40 +2,542 @@
 
 from __future__ import annotations
 
-from PyQt6.QtCore import QSortFilterProxyModel
+from bisect import bisect_left, bisect_right
+
+from PyQt6.QtCore import QAbstractProxyModel, QModelIndex, QPersistentModelIndex
 
 from .domain import Node
-from .filter_logic import compute_visible_node_ids
+from .filter_logic import node_search_keys, normalize_query
 from .model_qt import NODE_ROLE, VirtualNode
+from .query_logic import compile_query, compute_query_visible_ids
+from .search_index import SearchIndex
+
+
+class _Mapping:
+    """Visible source rows under one source parent.
+
+    ``rows`` is None until the view first asks for the rows under this parent (and
+    again after the parent is filtered out), so only the parts of the tree that were
+    expanded are kept in sync. ``hasChildren`` on a collapsed row does not compute them.
+    """
+
+    __slots__ = ("source_parent", "rows", "children")
+
+    def __init__(self, source_parent: QPersistentModelIndex):
+        self.source_parent = source_parent
+        self.rows: list[int] | None = None
+        self.children: list[_Mapping] = []
+
+
+class TreeFilterProxyModel(QAbstractProxyModel):
+    """Shows the source rows whose node id is in ``visible_ids``.
+
+    Unlike ``invalidateFilter`` on a ``QSortFilterProxyModel``, a new query is
+    applied by diffing each known parent's visible rows and emitting
+    ``rowsRemoved`` / ``rowsInserted`` for the changed runs only, so expansion,
+    selection and scroll position of the rows that stay are kept. Row inserts,
+    removals and moves of the source model are mapped the same way; only a
+    source reset or layout change resets the proxy.
 
+    With an empty query every row is accepted and ``visible_ids`` stays empty.
+    """
 
-class TreeFilterProxyModel(QSortFilterProxyModel):
-    def __init__(self, root: Node):
+    def __init__(self, root: Node, search_index: SearchIndex | None = None):
         super().__init__()
         self.root = root
+        self.search_index = search_index
         self.query = ""
-        self.visible_ids = compute_visible_node_ids(self.root, self.query)
+        self._needle = ""
+        self._plan = None
+        # virtual id -> (VirtualNode, 表示するか)。クエリごとに 1 回だけ判定する
+        self._virtual_visible: dict[str, tuple[VirtualNode, bool]] = {}
+        self._mappings: dict[QPersistentModelIndex, _Mapping] = {}
+        self._resetting = False
+        self._moving = False
+        self.visible_ids = self._compute_visible_ids(self.query)
 
     def set_query(self, query: str) -> None:
+        self._set_query_text(query)
+        self.visible_ids = self._compute_visible_ids(query)
+        self._apply_visibility()
+
+    def set_visible_ids(self, query: str, visible_ids: set[str]) -> None:
+        """Apply a result computed elsewhere (e.g. on the search worker) for ``query``."""
+
+        self._set_query_text(query)
+        self.visible_ids = visible_ids
+        self._apply_visibility()
+
+    def refresh_sections(self, *virtual_ids: str) -> None:
+        """Re-test only the Favorites/Recent rows ``virtual_ids`` after their entries changed.
+
+        The entries are plain tree nodes already answered by ``visible_ids`` (and
+        the source reports their rows), so only a section row itself can appear
+        or vanish; the rest of the tree keeps its rows without re-running the query.
+        """
+
+        for virtual_id in virtual_ids:
+            self._virtual_visible.pop(virtual_id, None)
+        model = self.sourceModel()
+        root = self._mappings.get(QPersistentModelIndex())
+        if not self._needle or model is None or root is None or root.rows is None:
+            return
+        for virtual_id in virtual_ids:
+            source_index = model.index_for_node(virtual_id)
+            if not source_index.isValid() or source_index.parent().isValid():
+                continue
+            row = source_index.row()
+            pos = bisect_left(root.rows, row)
+            shown = pos < len(root.rows) and root.rows[pos] == row
+            if self.filterAcceptsRow(row, QModelIndex()) == shown:
+                continue
+            if shown:
+                self.beginRemoveRows(QModelIndex(), pos, pos)
+                del root.rows[pos]
+                self.endRemoveRows()
+                for child in root.children:
+                    if child.source_parent.row() == row:
+                        _forget(child)
+            else:
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                root.rows.insert(pos, row)
+                self.endInsertRows()
+
+    def _set_query_text(self, query: str) -> None:
         self.query = query
-        self.visible_ids = compute_visible_node_ids(self.root, query)
-        self.invalidateFilter()
+        self._needle = normalize_query(query)
+        self._plan = compile_query(query)
+        self._virtual_visible.clear()
+
+    def _compute_visible_ids(self, query: str) -> set[str]:
+        if not normalize_query(query):
+            # 空の検索は全行を表示するので、全ノードの id を集める必要はない
+            return set()
+        if self.search_index is not None:
+            return self.search_index.visible_node_ids(query)
+        return compute_query_visible_ids(self.root, query)
 
     def filterAcceptsRow(self, source_row: int, source_parent):
         index = self.sourceModel().index(source_row, 0, source_parent)
         if not index.isValid():
             return False
+        if not self._needle:
+            return True
         node = index.data(NODE_ROLE)
         if isinstance(node, VirtualNode):
-            if not self.query.strip():
-                return True
-            # 検索時は、仮想ノード名ヒット or 子が表示対象なら表示
-            if self.query.strip().lower() in node.name.lower():
-                return True
-            for row in range(self.sourceModel().rowCount(index)):
-                if self.filterAcceptsRow(row, index):
-                    return True
-            return False
+            return self._is_virtual_visible(node)
         if not isinstance(node, Node):
             return False
         return node.id in self.visible_ids
+
+    def _is_virtual_visible(self, node: VirtualNode) -> bool:
+        """Favorites/Recent: shown when the section name matches or one of its entries is visible.
+
+        Entries are plain tree nodes, so their visibility is already in
+        ``visible_ids``; the answer is cached per section object until the query changes.
+        """
+
+        if not self._needle:
+            return True
+        cached = self._virtual_visible.get(node.id)
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        if self._plan is not None:
+            visible = self._plan.matches(node_search_keys(node))
+        else:
+            visible = self._needle in node_search_keys(node)[0]
+        if not visible:
+            visible_ids = self.visible_ids
+            visible = any(child.id in visible_ids for child in node.children)
+        self._virtual_visible[node.id] = (node, visible)
+        return visible
+
+    # --- source model -----------------------------------------------------
+
+    def setSourceModel(self, model) -> None:
+        previous = self.sourceModel()
+        if previous is not None:
+            for signal, slot in self._source_connections(previous):
+                signal.disconnect(slot)
+        self.beginResetModel()
+        super().setSourceModel(model)
+        self._mappings.clear()
+        if model is not None:
+            for signal, slot in self._source_connections(model):
+                signal.connect(slot)
+        self.endResetModel()
+
+    def _source_connections(self, model) -> list:
+        return [
+            (model.modelAboutToBeReset, self._on_source_about_to_change),
+            (model.modelReset, self._on_source_changed),
+            (model.rowsAboutToBeRemoved, self._on_source_rows_about_to_be_removed),
+            (model.rowsRemoved, self._on_source_rows_removed),
+            (model.rowsInserted, self._on_source_rows_inserted),
+            (model.rowsAboutToBeMoved, self._on_source_rows_about_to_be_moved),
+            (model.rowsMoved, self._on_source_rows_moved),
+            (model.layoutAboutToBeChanged, self._on_source_about_to_change),
+            (model.layoutChanged, self._on_source_changed),
+            (model.dataChanged, self._on_source_data_changed),
+        ]
+
+    def _on_source_about_to_change(self, *args) -> None:
+        if not self._resetting:
+            self._resetting = True
+            self.beginResetModel()
+
+    def _on_source_changed(self, *args) -> None:
+        self._on_source_about_to_change()
+        self._mappings.clear()
+        self._virtual_visible.clear()
+        self._resetting = False
+        self.endResetModel()
+
+    def _on_source_rows_about_to_be_removed(self, source_parent, first: int, last: int) -> None:
+        mapping = self._mappings.get(QPersistentModelIndex(source_parent))
+        if mapping is None:
+            return
+        self._drop_children(mapping, first, last)
+        self._remove_visible(mapping, first, last)
+
+    def _on_source_rows_removed(self, source_parent, first: int, last: int) -> None:
+        self._virtual_visible.clear()
+        mapping = self._mappings.get(QPersistentModelIndex(source_parent))
+        if mapping is not None and mapping.rows is not None:
+            _shift_rows(mapping.rows, last + 1, first - last - 1)
+
+    def _on_source_rows_inserted(self, source_parent, first: int, last: int) -> None:
+        self._virtual_visible.clear()
+        mapping = self._mappings.get(QPersistentModelIndex(source_parent))
+        if mapping is not None and mapping.rows is not None:
+            _shift_rows(mapping.rows, first, last - first + 1)
+        elif source_parent.isValid() and not self.mapFromSource(source_parent).isValid():
+            # 親が表示されていなければ伝える行もない
+            return
+        else:
+            # まだ子を問い合わせられていない親: 挿入前の状態を作ってから挿入を伝える
+            mapping = self._mapping_for(source_parent)
+            mapping.rows = [row for row in self._accepted_rows(mapping) if not first <= row <= last]
+        accepted = [row for row in range(first, last + 1) if self.filterAcceptsRow(row, source_parent)]
+        if not accepted:
+            return
+        pos = bisect_left(mapping.rows, first)
+        self.beginInsertRows(self._proxy_parent(mapping), pos, pos + len(accepted) - 1)
+        mapping.rows[pos:pos] = accepted
+        self.endInsertRows()
+
+    def _on_source_rows_about_to_be_moved(self, source_parent, first: int, last: int, dest_parent, dest_row: int) -> None:
+        self._moving = False
+        source = self._mappings.get(QPersistentModelIndex(source_parent))
+        if source is None or source.rows is None:
+            return
+        lo = bisect_left(source.rows, first)
+        hi = bisect_right(source.rows, last)
+        if lo == hi:
+            return
+        dest = self._mappings.get(QPersistentModelIndex(dest_parent))
+        if dest is not None and dest.rows is not None:
+            proxy_dest = bisect_left(dest.rows, dest_row)
+            if dest is source and lo <= proxy_dest <= hi:
+                # 表示上の並びは変わらない
+                return
+            self._moving = self.beginMoveRows(
+                self._proxy_parent(source), lo, hi - 1, self._proxy_parent(dest), proxy_dest
+            )
+            if self._moving:
+                return
+        # 移動先が表示されていない: ここでは削除として伝え、移動先には rowsMoved で挿入する
+        self._drop_children(source, first, last)
+        self._remove_visible(source, first, last)
+
+    def _on_source_rows_moved(self, source_parent, first: int, last: int, dest_parent, dest_row: int) -> None:
+        self._virtual_visible.clear()
+        source = self._mappings.get(QPersistentModelIndex(source_parent))
+        dest = self._mappings.get(QPersistentModelIndex(dest_parent))
+        if self._moving:
+            self._moving = False
+            _move_rows(source.rows, dest.rows, first, last, dest_row)
+            if dest is not source:
+                self._reparent_children(source)
+            self.endMoveRows()
+            return
+        if source is not None and source is dest:
+            if source.rows is not None:
+                _move_rows(source.rows, source.rows, first, last, dest_row)
+            return
+        count = last - first + 1
+        if source is not None:
+            if source.rows is not None:
+                _shift_rows(source.rows, last + 1, -count)
+            self._reparent_children(source)
+        self._on_source_rows_inserted(dest_parent, dest_row, dest_row + count - 1)
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()) -> None:
+        mapping = self._mappings.get(QPersistentModelIndex(top_left.parent()))
+        if mapping is None or mapping.rows is None or not self._is_shown(mapping):
+            return
+        first = bisect_left(mapping.rows, top_left.row())
+        last = bisect_right(mapping.rows, bottom_right.row()) - 1
+        if first > last:
+            return
+        self.dataChanged.emit(
+            self.createIndex(first, top_left.column(), mapping),
+            self.createIndex(last, bottom_right.column(), mapping),
+            list(roles),
+        )
+
+    # --- QAbstractItemModel -------------------------------------------------
+
+    def index(self, row: int, column: int, parent=QModelIndex()):
+        if row < 0 or column < 0 or column >= self.columnCount(parent):
+            return QModelIndex()
+        mapping = self._mapping_for(self.mapToSource(parent))
+        if row >= len(self._rows(mapping)):
+            return QModelIndex()
+        return self.createIndex(row, column, mapping)
+
+    def parent(self, child=QModelIndex()):
+        if not child.isValid():
+            return QModelIndex()
+        mapping = child.internalPointer()
+        if not mapping.source_parent.isValid():
+            return QModelIndex()
+        return self._proxy_index(QModelIndex(mapping.source_parent))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._rows(self._mapping_for(self.mapToSource(parent))))
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        model = self.sourceModel()
+        if model is None:
+            return 0
+        return model.columnCount(self.mapToSource(parent))
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        if not parent.isValid() or parent.column() > 0:
+            return self.rowCount(parent) > 0
+        source_parent = self.mapToSource(parent)
+        mapping = self._mappings.get(QPersistentModelIndex(source_parent))
+        if mapping is not None and mapping.rows is not None:
+            return bool(mapping.rows)
+        # 閉じている行は子の行を写さずに答える（ビューは表示中の全行に問い合わせる）
+        if not self._needle:
+            return self.sourceModel().hasChildren(source_parent)
+        visible_ids = self.visible_ids
+        return any(child.id in visible_ids for child in getattr(source_parent.data(NODE_ROLE), "children", ()))
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or self.sourceModel() is None:
+            return QModelIndex()
+        mapping = proxy_index.internalPointer()
+        rows = mapping.rows
+        if rows is None or proxy_index.row() >= len(rows):
+            return QModelIndex()
+        return self.sourceModel().index(rows[proxy_index.row()], proxy_index.column(), QModelIndex(mapping.source_parent))
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        # 祖先がすべて表示されているときだけ対応する行がある
+        chain = []
+        current = source_index
+        while current.isValid():
+            chain.append(current)
+            current = current.parent()
+        proxy = QModelIndex()
+        for current in reversed(chain):
+            proxy = self._proxy_index(current)
+            if not proxy.isValid():
+                return QModelIndex()
+        return proxy
+
+    # --- mappings -------------------------------------------------------------
+
+    def _proxy_index(self, source_index) -> QModelIndex:
+        """Proxy index of ``source_index`` assuming its ancestors are visible."""
+
+        mapping = self._mapping_for(source_index.parent())
+        rows = self._rows(mapping)
+        pos = bisect_left(rows, source_index.row())
+        if pos == len(rows) or rows[pos] != source_index.row():
+            return QModelIndex()
+        return self.createIndex(pos, source_index.column(), mapping)
+
+    def _mapping_for(self, source_parent) -> _Mapping:
+        key = QPersistentModelIndex(source_parent)
+        mapping = self._mappings.get(key)
+        if mapping is not None:
+            return mapping
+        # 祖先側から順に作り、親の children に登録する（深い木でも再帰しない）
+        missing = [key]
+        current = source_parent.parent() if source_parent.isValid() else None
+        while current is not None:
+            current_key = QPersistentModelIndex(current)
+            if current_key in self._mappings:
+                break
+            missing.append(current_key)
+            current = current.parent() if current.isValid() else None
+        for missing_key in reversed(missing):
+            created = _Mapping(missing_key)
+            if missing_key.isValid():
+                self._mappings[QPersistentModelIndex(missing_key.parent())].children.append(created)
+            self._mappings[missing_key] = created
+        return self._mappings[key]
+
+    def _rows(self, mapping: _Mapping) -> list[int]:
+        if mapping.rows is None:
+            mapping.rows = self._accepted_rows(mapping)
+        return mapping.rows
+
+    def _accepted_rows(self, mapping: _Mapping) -> list[int]:
+        model = self.sourceModel()
+        if model is None:
+            return []
+        source_parent = QModelIndex(mapping.source_parent)
+        count = model.rowCount(source_parent)
+        if not self._needle:
+            return list(range(count))
+        return [row for row in range(count) if self.filterAcceptsRow(row, source_parent)]
+
+    def _proxy_parent(self, mapping: _Mapping) -> QModelIndex:
+        if not mapping.source_parent.isValid():
+            return QModelIndex()
+        return self._proxy_index(QModelIndex(mapping.source_parent))
+
+    def _remove_visible(self, mapping: _Mapping, first: int, last: int) -> None:
+        """Remove the proxy rows for source rows ``first..last`` (before the source drops them)."""
+
+        if mapping.rows is None:
+            return
+        lo = bisect_left(mapping.rows, first)
+        hi = bisect_right(mapping.rows, last)
+        if lo == hi:
+            return
+        self.beginRemoveRows(self._proxy_parent(mapping), lo, hi - 1)
+        del mapping.rows[lo:hi]
+        self.endRemoveRows()
+
+    def _drop_children(self, mapping: _Mapping, first: int, last: int) -> None:
+        """Forget the mappings below source rows ``first..last`` while their keys are still valid."""
+
+        dropped = [child for child in mapping.children if first <= child.source_parent.row() <= last]
+        if not dropped:
+            return
+        mapping.children = [child for child in mapping.children if not first <= child.source_parent.row() <= last]
+        while dropped:
+            current = dropped.pop()
+            self._mappings.pop(current.source_parent, None)
+            dropped.extend(current.children)
+
+    def _reparent_children(self, mapping: _Mapping) -> None:
+        """Hand child mappings whose source rows were moved elsewhere to their new parent."""
+
+        moved = [
+            child
+            for child in mapping.children
+            if QPersistentModelIndex(child.source_parent.parent()) != mapping.source_parent
+        ]
+        if not moved:
+            return
+        mapping.children = [child for child in mapping.children if child not in moved]
+        for child in moved:
+            new_parent = self._mapping_for(child.source_parent.parent())
+            new_parent.children.append(child)
+            if new_parent.rows is None:
+                _forget(child)
+
+    def _is_shown(self, mapping: _Mapping) -> bool:
+        source_parent = QModelIndex(mapping.source_parent)
+        return not source_parent.isValid() or self.mapFromSource(source_parent).isValid()
+
+    def _apply_visibility(self) -> None:
+        """Bring every known parent to the new ``visible_ids`` with minimal row signals."""
+
+        if self.sourceModel() is None:
+            return
+        root = self._mappings.get(QPersistentModelIndex())
+        stack = [root] if root is not None else []
+        while stack:
+            mapping = stack.pop()
+            if mapping.rows is None:
+                continue
+            self._update_rows(mapping, self._accepted_rows(mapping))
+            shown = set(mapping.rows)
+            for child in mapping.children:
+                if child.source_parent.row() in shown:
+                    stack.append(child)
+                else:
+                    _forget(child)
+
+    def _update_rows(self, mapping: _Mapping, new_rows: list[int]) -> None:
+        old = mapping.rows
+        if old == new_rows:
+            return
+        proxy_parent = QModelIndex()
+        if mapping.source_parent.isValid():
+            proxy_parent = self._proxy_index(QModelIndex(mapping.source_parent))
+
+        # 消える行を後ろから連続区間ごとに取り除く
+        keep = set(new_rows)
+        pos = len(old) - 1
+        while pos >= 0:
+            if old[pos] in keep:
+                pos -= 1
+                continue
+            last = pos
+            while pos >= 0 and old[pos] not in keep:
+                pos -= 1
+            self.beginRemoveRows(proxy_parent, pos + 1, last)
+            del old[pos + 1:last + 1]
+            self.endRemoveRows()
+
+        # old は new_rows の部分列になったので、足りない区間を前から挿入する
+        present = set(old)
+        pos = 0
+        while pos < len(new_rows):
+            if new_rows[pos] in present:
+                pos += 1
+                continue
+            first = pos
+            while pos < len(new_rows) and new_rows[pos] not in present:
+                pos += 1
+            self.beginInsertRows(proxy_parent, first, pos - 1)
+            old[first:first] = new_rows[first:pos]
+            self.endInsertRows()
+
+
+def _shift_rows(rows: list[int], start: int, delta: int) -> None:
+    for pos in range(bisect_left(rows, start), len(rows)):
+        rows[pos] += delta
+
+
+def _move_rows(source: list[int], dest: list[int], first: int, last: int, dest_row: int) -> None:
+    """Renumber accepted source rows for a move of ``first..last`` before ``dest_row``.
+
+    Acceptance is carried over rather than re-tested, so rows whose answer went
+    stale since the last query change do not appear or vanish without a signal.
+    """
+
+    count = last - first + 1
+    lo = bisect_left(source, first)
+    hi = bisect_right(source, last)
+    moved = source[lo:hi]
+    del source[lo:hi]
+    _shift_rows(source, last + 1, -count)
+    if dest is source and dest_row > last:
+        dest_row -= count
+    _shift_rows(dest, dest_row, count)
+    pos = bisect_left(dest, dest_row)
+    dest[pos:pos] = [row - first + dest_row for row in moved]
+
+
+def _forget(mapping: _Mapping) -> None:
+    """Drop the cached rows of a hidden subtree; they are recomputed when shown again."""
+
+    stack = [mapping]
+    while stack:
+        current = stack.pop()
+        current.rows = None
+        stack.extend(current.children)
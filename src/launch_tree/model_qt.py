@@ -2,17 +2,35 @@
 
 from __future__ import annotations
 
-from pathlib import Path
-
-from PyQt6.QtCore import QFileInfo, Qt
-from PyQt6.QtGui import QIcon, QStandardItem, QStandardItemModel
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+import logging
+
+from PyQt6.QtCore import (
+    QAbstractItemModel,
+    QBuffer,
+    QFileInfo,
+    QIODevice,
+    QMimeData,
+    QModelIndex,
+    QObject,
+    Qt,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtWidgets import QApplication, QFileIconProvider, QStyle, QStyleFactory
 
-from .domain import Node
+from .domain import Node, tree_index
 from .icon_logic import icon_category_for_node
+from .icon_cache import CacheStats, IconDiskCache, IconKey, LruCache
+from .icon_worker import PROBE_UNKNOWN, IconProbeWorker, path_stat
+from .tree_ops import TreeOp
 
 
 NODE_ROLE = Qt.ItemDataRole.UserRole + 1
+ICON_CACHE_SIZES = (16, 32)
+MAX_CACHED_ICONS = 512
+MAX_CACHED_ICON_BYTES = 4 * 1024 * 1024
 
 
 class VirtualNode:
@@ -22,12 +40,82 @@ class VirtualNode:
         self.type = node_type
         self.target = ""
         self.children: list[Node] = []
-
-
-class IconResolver:
-    def __init__(self):
-        self._cache: dict[str, QIcon] = {}
+        self._search_keys: tuple | None = None
+
+
+class IconResolver(QObject):
+    """Icons per node; category icons are shared, ``.exe`` targets get their file icon.
+
+    Whether an ``.exe`` target exists is probed on ``IconProbeWorker`` (a slow or
+    dead network drive must not block the UI thread). Until the probe answers the
+    fallback icon is returned, then ``icon_ready`` is emitted with the ids of the
+    nodes that asked for it.
+
+    With a ``disk_cache`` the icon rendered in an earlier run is shown right away
+    instead of the fallback; the probe's (size, mtime) then confirms it or the icon
+    is extracted again. A probe that timed out (``PROBE_UNKNOWN``) neither drops
+    that icon nor caches the fallback; the target is probed again when next drawn,
+    and a late answer from the worker still updates the nodes that showed it.
+    ``close`` writes the cache back.
+
+    Resolved ``.exe`` icons are kept in an ``LruCache`` bounded by count and by
+    approximate pixmap bytes (``cache_stats`` for diagnostics); edits of a node's
+    target call ``invalidate_targets`` through ``apply_node_update``'s hook. A
+    probe still running for an invalidated target is answered with a freshly
+    extracted icon, never the dropped cached one.
+    """
+
+    icon_ready = pyqtSignal(list)
+    _probed = pyqtSignal(str, object)
+
+    def __init__(
+        self,
+        probe: Callable[[str], IconKey | None] = path_stat,
+        disk_cache: IconDiskCache | None = None,
+        max_entries: int = MAX_CACHED_ICONS,
+        max_bytes: int = MAX_CACHED_ICON_BYTES,
+        **worker_options,
+    ):
+        super().__init__()
+        self._category_icons: dict[str, QIcon] = {}
+        self._icons = LruCache(max_entries, max_bytes, self._icon_bytes)
         self._provider = QFileIconProvider()
+        self._probe = probe
+        self._worker_options = worker_options
+        self._worker: IconProbeWorker | None = None
+        self.disk_cache = disk_cache
+        # target -> その結果を待っている node id / 確認待ちの間に出す前回のアイコン
+        self._waiting: dict[str, set[str]] = {}
+        self._placeholders: dict[str, QIcon] = {}
+        # 応答がなかったターゲットを描いた node id（遅れて答えが届いたときに通知する）
+        self._unanswered: dict[str, set[str]] = {}
+        # ワーカースレッドからの通知は UI スレッドのキューを経由して受け取る
+        self._probed.connect(self._on_probed)
+
+    def cache_stats(self) -> CacheStats:
+        return self._icons.stats()
+
+    def invalidate_targets(self, *targets: str) -> None:
+        """Forget the icons of ``targets`` (memory and disk) so they are probed again."""
+
+        for target in targets:
+            target = (target or "").strip()
+            self._icons.pop(target)
+            # 確認中の結果はそのまま届くが、前回のアイコンでは確定させない
+            self._placeholders.pop(target, None)
+            if self.disk_cache is not None:
+                self.disk_cache.discard(target)
+
+    def close(self, timeout: float | None = None) -> None:
+        logging.debug("Icon cache: %s", self.cache_stats())
+        if self._worker is not None:
+            self._worker.close(timeout)
+            self._worker = None
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.save()
+            except OSError:
+                logging.exception("Failed writing icon cache %s", self.disk_cache.path)
 
     def icon_for_node(self, node: Node | VirtualNode) -> QIcon:
         if isinstance(node, VirtualNode):
@@ -40,18 +128,27 @@ class IconResolver:
 
         if category == "path_exe":
             target = (node.target or "").strip()
-            cache_key = f"exe::{target}"
-            if cache_key in self._cache:
-                return self._cache[cache_key]
-            icon = self._icon_from_path_or_fallback(
-                target, self._style_icon(QStyle.StandardPixmap.SP_ComputerIcon)
-            )
-            self._cache[cache_key] = icon
-            return icon
-
-        cache_key = f"cat::{category}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+            cached = self._icons.get(target)
+            if cached is not None:
+                return cached
+            fallback = self._exe_fallback()
+            if not target:
+                return fallback
+            waiting = self._waiting.get(target)
+            if waiting is None:
+                self._waiting[target] = {node.id}
+                if target not in self._placeholders:
+                    placeholder = self._disk_icon(target)
+                    if placeholder is not None:
+                        self._placeholders[target] = placeholder
+                self._ensure_worker().request(target)
+            else:
+                waiting.add(node.id)
+            return self._placeholders.get(target, fallback)
+
+        cached = self._category_icons.get(category)
+        if cached is not None:
+            return cached
 
         if category in {"group", "path_folder"}:
             icon = self._style_icon(QStyle.StandardPixmap.SP_DirIcon)
@@ -64,23 +161,101 @@ class IconResolver:
         else:
             icon = self._style_icon(QStyle.StandardPixmap.SP_FileIcon)
 
-        self._cache[cache_key] = icon
+        self._category_icons[category] = icon
         return icon
 
+    def _ensure_worker(self) -> IconProbeWorker:
+        if self._worker is None:
+            self._worker = IconProbeWorker(self._probed.emit, self._probe, **self._worker_options)
+        return self._worker
+
+    def _exe_fallback(self) -> QIcon:
+        icon = self._category_icons.get("exe_fallback")
+        if icon is None:
+            icon = self._category_icons["exe_fallback"] = self._style_icon(QStyle.StandardPixmap.SP_ComputerIcon)
+        return icon
+
+    def _icon_bytes(self, icon: QIcon) -> int:
+        if icon is self._exe_fallback():
+            return 0
+        return sum(size.width() * size.height() * 4 for size in icon.availableSizes())
+
+    def _on_probed(self, target: str, key: IconKey | None | object) -> None:
+        if key is PROBE_UNKNOWN:
+            # 応答がなかっただけ: 前回のアイコンも保存分も残し、次に描くときにまた確認する
+            node_ids = self._waiting.pop(target, None)
+            if node_ids:
+                self._unanswered.setdefault(target, set()).update(node_ids)
+            return
+        fallback = self._exe_fallback()
+        placeholder = self._placeholders.pop(target, None)
+        disk_cache = self.disk_cache
+        # 無効化で保存分は消えているので、残っている鍵はそれ以降に取ったアイコンのもの
+        entry = disk_cache.get(target) if disk_cache is not None else None
+        if key is None:
+            # 見つからないターゲット
+            icon = fallback
+            if disk_cache is not None:
+                disk_cache.discard(target)
+        elif entry is not None and entry[0] == key:
+            # 同じターゲットの答えが重なって届いたときも取り直さない
+            icon = placeholder if placeholder is not None else self._disk_icon(target) or fallback
+        else:
+            images = _icon_images(self._icon_from_path(target))
+            # 描画する大きさの画像だけを持つ（メモリ見積もりもこの分だけになる）
+            icon = _icon_from_images(images) or fallback
+            if disk_cache is not None:
+                disk_cache.put(target, key, images)
+        self._icons.put(target, icon)
+        node_ids = self._waiting.pop(target, set()) | self._unanswered.pop(target, set())
+        if node_ids and icon is not placeholder:
+            self.icon_ready.emit(sorted(node_ids))
+
+    def _disk_icon(self, target: str) -> QIcon | None:
+        if self.disk_cache is None:
+            return None
+        entry = self.disk_cache.get(target)
+        if entry is None:
+            return None
+        return _icon_from_images(entry[1]) or self._exe_fallback()
+
     def _style_icon(self, pixmap: QStyle.StandardPixmap) -> QIcon:
         app = QApplication.instance()
         style = app.style() if app is not None else QStyleFactory.create("Fusion")
         return style.standardIcon(pixmap) if style is not None else QIcon()
 
-    def _icon_from_path_or_fallback(self, raw_path: str, fallback: QIcon) -> QIcon:
+    def _icon_from_path(self, raw_path: str) -> QIcon | None:
         try:
-            if raw_path and Path(raw_path).exists():
-                icon = self._provider.icon(QFileInfo(raw_path))
-                if not icon.isNull():
-                    return icon
+            icon = self._provider.icon(QFileInfo(raw_path))
         except Exception:
-            pass
-        return fallback
+            return None
+        return None if icon.isNull() else icon
+
+
+def _icon_images(icon: QIcon | None) -> list[bytes]:
+    """PNG images of ``icon`` at the sizes the tree draws."""
+
+    images: list[bytes] = []
+    if icon is None:
+        return images
+    for size in ICON_CACHE_SIZES:
+        pixmap = icon.pixmap(size, size)
+        if pixmap.isNull():
+            continue
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        pixmap.save(buffer, "PNG")
+        images.append(bytes(buffer.data()))
+    return images
+
+
+def _icon_from_images(images: list[bytes]) -> QIcon | None:
+    icon = QIcon()
+    for data in images:
+        pixmap = QPixmap()
+        if pixmap.loadFromData(data, "PNG"):
+            icon.addPixmap(pixmap)
+    return None if icon.isNull() else icon
 
 
 def display_name_for_node(node: Node | VirtualNode) -> str:
@@ -97,46 +272,100 @@ def display_name_for_node(node: Node | VirtualNode) -> str:
     return node.name
 
 
-class LauncherTreeModel(QStandardItemModel):
-    def __init__(self, root: Node, user_state: dict | None = None, view_mode: str = "all"):
+class _Slot:
+    """A model row whose children the view has asked about.
+
+    ``children`` is the child list as last reported to the view. Edits are
+    reported by diffing it against the live tree (``LauncherTreeModel.apply_ops``),
+    so it doubles as the "old" side of every row signal. The same node may have
+    several slots: once in the main tree and once per Favorites/Recent entry;
+    ``in_section`` marks the latter.
+    """
+
+    __slots__ = ("node", "parent", "row", "children", "slots", "in_section")
+
+    def __init__(self, node, parent: "_Slot | None", row: int):
+        self.node = node
+        self.parent = parent
+        self.row = row
+        self.children: list | None = None
+        self.slots: dict[int, _Slot] = {}
+        self.in_section = isinstance(node, VirtualNode) or (parent is not None and parent.in_section)
+
+
+class LauncherTreeModel(QAbstractItemModel):
+    """Serves the ``Node`` tree directly; display text, icon and tooltip are computed in ``data()``.
+
+    Top-level rows are the Favorites/Recent sections (``VirtualNode``) followed by
+    the root's children. Child lists are read lazily per expanded parent. Edits of
+    the tree are reported with ``apply_ops`` (row insert/remove/move, dataChanged)
+    instead of a full ``rebuild``.
+    """
+
+    MIME_TYPE = "application/x-launch-tree-node-ids"
+
+    def __init__(
+        self,
+        root: Node,
+        user_state: dict | None = None,
+        view_mode: str = "all",
+        icon_resolver: IconResolver | None = None,
+    ):
         super().__init__()
         self.root_node = root
-        self.icon_resolver = IconResolver()
+        self.icon_resolver = icon_resolver or IconResolver()
+        self.icon_resolver.icon_ready.connect(self._on_icons_ready)
         self.user_state = user_state or {"favorites": {}, "recent": [], "ui": {"view_mode": "all"}}
         self.view_mode = view_mode
-        self.node_lookup: dict[str, Node] = {}
-        self.setHorizontalHeaderLabels(["Launch Tree"])
-        self.rebuild()
+        self._sections: list[VirtualNode] = []
+        self._root_slot = _Slot(root, None, 0)
+        # node id -> その node の slot / その node を子として表示している slot
+        self._slots_of: dict[str, list[_Slot]] = {}
+        self._shown_in: dict[str, list[_Slot]] = {}
+        self._build_sections()
 
     def set_view_state(self, user_state: dict, view_mode: str) -> None:
         self.user_state = user_state
         self.view_mode = view_mode
 
     def rebuild(self) -> None:
-        self.clear()
-        self.setHorizontalHeaderLabels(["Launch Tree"])
-        invisible = self.invisibleRootItem()
-        invisible.setData(self.root_node, NODE_ROLE)
-
-        self.node_lookup = {}
-        self._collect_lookup(self.root_node)
+        self.beginResetModel()
+        self._build_sections()
+        self.endResetModel()
 
+    def _build_sections(self) -> None:
+        sections: list[VirtualNode] = []
         if self.view_mode in {"all", "favorites"}:
-            fav_item = self._virtual_group_item("virtual:favorites", "Favorites", self._favorite_nodes())
-            invisible.appendRow(fav_item)
-
+            sections.append(self._virtual_section("virtual:favorites", "Favorites", self._favorite_nodes()))
         if self.view_mode in {"all", "recent"}:
-            recent_item = self._virtual_group_item("virtual:recent", "Recent", self._recent_nodes())
-            invisible.appendRow(recent_item)
+            sections.append(self._virtual_section("virtual:recent", "Recent", self._recent_nodes()))
+        self._sections = sections
+        self._root_slot = _Slot(self.root_node, None, 0)
+        self._slots_of = {self.root_node.id: [self._root_slot]}
+        self._shown_in = {}
+
+    def refresh_sections(self, *virtual_ids: str) -> None:
+        """Re-read Favorites/Recent from ``user_state`` and report only the entries that changed.
 
-        if self.view_mode == "all":
-            for child in self.root_node.children:
-                invisible.appendRow(self._item_from_node(child))
+        ``virtual_ids`` limits the refresh to those sections (all when empty); a
+        reordered entry is reported as a row move, so its selection survives.
+        """
 
-    def _collect_lookup(self, node: Node) -> None:
-        self.node_lookup[node.id] = node
-        for child in node.children:
-            self._collect_lookup(child)
+        for section in self._sections:
+            if virtual_ids and section.id not in virtual_ids:
+                continue
+            section.children = self._section_nodes(section.id)
+            for slot in list(self._slots_of.get(section.id, ())):
+                self._sync(slot)
+
+    def _section_nodes(self, virtual_id: str) -> list[Node]:
+        if virtual_id == "virtual:favorites":
+            return self._favorite_nodes()
+        return self._recent_nodes()
+
+    def _lookup(self, node_id: str) -> Node | None:
+        ref = tree_index(self.root_node).get(node_id)
+        return ref.node if ref is not None else None
 
     def _favorite_nodes(self) -> list[Node]:
         favorites = self.user_state.get("favorites") if isinstance(self.user_state, dict) else {}
@@ -146,7 +375,7 @@ class LauncherTreeModel(QStandardItemModel):
         for node_id, enabled in favorites.items():
             if not enabled:
                 continue
-            node = self.node_lookup.get(str(node_id))
+            node = self._lookup(str(node_id))
             if node is not None:
                 nodes.append(node)
         return nodes
@@ -159,29 +388,442 @@ class LauncherTreeModel(QStandardItemModel):
         for entry in recent:
             if not isinstance(entry, dict):
                 continue
-            node = self.node_lookup.get(str(entry.get("id") or ""))
+            node = self._lookup(str(entry.get("id") or ""))
             if node is not None:
                 nodes.append(node)
         return nodes
 
-    def _virtual_group_item(self, virtual_id: str, label: str, children: list[Node]) -> QStandardItem:
+    def _virtual_section(self, virtual_id: str, label: str, children: list[Node]) -> VirtualNode:
         virtual = VirtualNode(node_id=virtual_id, name=label, node_type="group")
-        item = self._base_item(virtual)
+        # 検索フィルターが行を辿らずに判定できるよう、表示する項目を持たせる
+        virtual.children = list(children)
+        return virtual
+
+    # --- edits ----------------------------------------------------------------
+
+    def apply_ops(self, ops: Iterable[TreeOp]) -> None:
+        """Report edits already applied to ``root_node`` to the views."""
+
+        for op in ops:
+            self.apply_op(op)
+
+    def apply_op(self, op: TreeOp) -> None:
+        kind = op.get("op")
+        if kind == "update":
+            self._node_changed(str(op.get("id")))
+        elif kind == "insert":
+            parent_id = str(op.get("parent"))
+            self._materialize(parent_id, str((op.get("node") or {}).get("id")))
+            self._sync_slots_of(parent_id)
+            self.refresh_sections()
+        elif kind == "delete":
+            for slot in list(self._shown_in.get(str(op.get("id")), ())):
+                self._sync(slot)
+            self.refresh_sections()
+        elif kind == "move":
+            self._node_moved(str(op.get("id")))
+
+    def index_for_node(self, node_id: str) -> QModelIndex:
+        """Index of ``node_id`` in the main tree (not its Favorites/Recent rows); invalid if not shown.
+
+        The ids of the Favorites/Recent sections give the section rows.
+        """
+
+        for row, section in enumerate(self._sections):
+            if section.id == node_id:
+                return self.index(row, 0)
+        if self.view_mode != "all":
+            return QModelIndex()
+        index = tree_index(self.root_node)
+        rows: list[int] = []
+        ref = index.get(node_id)
+        while ref is not None and ref.parent is not None:
+            rows.append(ref.index)
+            if ref.parent is self.root_node:
+                break
+            ref = index.get(ref.parent.id)
+        else:
+            return QModelIndex()
+        result = QModelIndex()
+        offset = len(self._sections)
+        for row in reversed(rows):
+            result = self.index(row + offset, 0, result)
+            offset = 0
+        return result
+
+    def _node_changed(self, node_id: str, roles: list | None = None) -> None:
+        for slot in self._shown_in.get(node_id, ()):
+            row = self._row_of(slot, node_id)
+            if row is not None:
+                index = self.createIndex(row, 0, slot)
+                self.dataChanged.emit(index, index, roles or [])
+
+    def _on_icons_ready(self, node_ids: list) -> None:
+        for node_id in node_ids:
+            self._node_changed(node_id, [Qt.ItemDataRole.DecorationRole])
+
+    def _node_moved(self, node_id: str) -> None:
+        ref = tree_index(self.root_node).get(node_id)
+        old_parents = list(self._shown_in.get(node_id, ()))
+        if ref is None or ref.parent is None:
+            for slot in old_parents:
+                self._sync(slot)
+            return
+        self._materialize(ref.parent.id, node_id)
+        new_parents = list(self._slots_of.get(ref.parent.id, ()))
+        # 本体の木の中の移動は moveRows で伝え、展開状態を保つ
+        source = next((slot for slot in old_parents if not slot.in_section), None)
+        target = next((slot for slot in new_parents if not slot.in_section and slot.children is not None), None)
+        if source is not None and target is not None and (
+            target is source or all(child is not ref.node for child in target.children)
+        ):
+            src_row = self._row_of(source, node_id)
+            if src_row is not None:
+                self._move_row(source, src_row, target, self._snapshot_row(target, ref.node, ref.index))
+        for slot in old_parents + new_parents:
+            self._sync(slot)
+
+    def _snapshot_row(self, slot: _Slot, node: Node, live_row: int) -> int:
+        """Row in the snapshot of ``slot`` that matches ``node`` being at ``live_row`` of the live list.
+
+        Differs from the live row while later ops of the same batch are still unreported.
+        """
+
+        before = self._live_children(slot)[:live_row + self._row_offset(slot)]
+        shown = {id(child) for child in slot.children if child is not node}
+        return sum(1 for child in before if id(child) in shown)
+
+    def _sync_slots_of(self, node_id: str) -> None:
+        for slot in list(self._slots_of.get(node_id, ())):
+            self._sync(slot)
+
+    def _materialize(self, parent_id: str, new_child_id: str) -> None:
+        """Give shown-but-never-expanded rows of ``parent_id`` a snapshot without ``new_child_id``.
+
+        Syncing that snapshot then emits rowsInserted, which is how a collapsed
+        row learns that it now has children.
+        """
+
+        for holder in list(self._shown_in.get(parent_id, ())):
+            row = self._row_of(holder, parent_id)
+            if row is None:
+                continue
+            slot = self._slot_at(holder, row)
+            if slot.children is None:
+                live = self._live_children(slot)
+                self._set_snapshot(slot, [child for child in live if child.id != new_child_id])
+
+    def _sync(self, slot: _Slot) -> None:
+        """Turn the snapshot of ``slot`` into its live child list with minimal row signals."""
+
+        old = slot.children
+        if old is None:
+            return
+        new = self._live_children(slot)
+        if len(old) == len(new) and all(a is b for a, b in zip(old, new)):
+            return
+        positions = {id(child): pos for pos, child in enumerate(new)}
+        keep = _ordered_rows(old, positions)
+        displaced = [child for row, child in enumerate(old) if row not in keep and id(child) in positions]
+        placed = {id(old[row]) for row in keep}
+
+        # 消える行を後ろから連続区間ごとに取り除く
+        row = len(old) - 1
+        while row >= 0:
+            if id(old[row]) in positions:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and id(old[row]) not in positions:
+                row -= 1
+            self._remove_rows(slot, row + 1, last)
+
+        # 順序の崩れた行は新しい位置の順に 1 回ずつ moveRows で動かす
+        for child in sorted(displaced, key=lambda node: positions[id(node)]):
+            self._move_into_place(slot, child, positions, placed)
+            placed.add(id(child))
+
+        # slot.children は new の部分列になったので、足りない区間を前から挿入する
+        present = {id(child) for child in slot.children}
+        pos = 0
+        while pos < len(new):
+            if id(new[pos]) in present:
+                pos += 1
+                continue
+            first = pos
+            while pos < len(new) and id(new[pos]) not in present:
+                pos += 1
+            self._insert_rows(slot, first, new[first:pos])
+
+    def _move_into_place(self, slot: _Slot, node, positions: dict[int, int], placed: set[int]) -> None:
+        """Move ``node`` right after the last already ordered row that precedes it in the new list."""
+
+        children = slot.children
+        src_row = next(row for row, child in enumerate(children) if child is node)
+        target = positions[id(node)]
+        dst_row = 0
+        for row, child in enumerate(children):
+            if child is not node and id(child) in placed and positions[id(child)] < target:
+                dst_row = row if row > src_row else row + 1
+        self._move_row(slot, src_row, slot, dst_row)
+
+    def _remove_rows(self, slot: _Slot, first: int, last: int) -> None:
+        self.beginRemoveRows(self._slot_index(slot), first, last)
+        removed = slot.children[first:last + 1]
+        del slot.children[first:last + 1]
+        for row in range(first, last + 1):
+            child_slot = slot.slots.pop(row, None)
+            if child_slot is not None:
+                self._drop_slot(child_slot)
+        _shift_slots(slot, last + 1, first - last - 1)
+        for child in removed:
+            self._unshow(slot, child.id)
+        self.endRemoveRows()
+
+    def _insert_rows(self, slot: _Slot, first: int, nodes: list) -> None:
+        self.beginInsertRows(self._slot_index(slot), first, first + len(nodes) - 1)
+        _shift_slots(slot, first, len(nodes))
+        slot.children[first:first] = nodes
+        for child in nodes:
+            self._shown_in.setdefault(child.id, []).append(slot)
+        self.endInsertRows()
+
+    def _move_row(self, source: _Slot, src_row: int, target: _Slot, dst_row: int) -> None:
+        """Move one row; ``dst_row`` is its position in ``target`` after the move."""
+
+        qt_row = dst_row + 1 if target is source and dst_row > src_row else dst_row
+        if target is source and qt_row in (src_row, src_row + 1):
+            return
+        if dst_row > len(target.children) - (1 if target is source else 0):
+            return
+        if not self.beginMoveRows(self._slot_index(source), src_row, src_row, self._slot_index(target), qt_row):
+            return
+        node = source.children.pop(src_row)
+        moved = source.slots.pop(src_row, None)
+        _shift_slots(source, src_row + 1, -1)
+        _shift_slots(target, dst_row, 1)
+        target.children.insert(dst_row, node)
+        if moved is not None:
+            moved.parent = target
+            moved.row = dst_row
+            target.slots[dst_row] = moved
+        if target is not source:
+            self._unshow(source, node.id)
+            self._shown_in.setdefault(node.id, []).append(target)
+        self.endMoveRows()
+
+    # --- slots ----------------------------------------------------------------
+
+    def _slot_for(self, index: QModelIndex) -> _Slot:
+        """Slot of the row at ``index`` (the root slot for an invalid index)."""
+
+        if not index.isValid():
+            return self._root_slot
+        return self._slot_at(index.internalPointer(), index.row())
+
+    def _slot_at(self, parent: _Slot, row: int) -> _Slot:
+        slot = parent.slots.get(row)
+        if slot is None:
+            slot = _Slot(self._children(parent)[row], parent, row)
+            parent.slots[row] = slot
+            self._slots_of.setdefault(slot.node.id, []).append(slot)
+        return slot
+
+    def _slot_index(self, slot: _Slot) -> QModelIndex:
+        if slot.parent is None:
+            return QModelIndex()
+        return self.createIndex(slot.row, 0, slot.parent)
+
+    def _live_children(self, slot: _Slot) -> list:
+        if slot is self._root_slot:
+            if self.view_mode == "all":
+                return self._sections + self.root_node.children
+            return list(self._sections)
+        return slot.node.children
+
+    def _children(self, slot: _Slot) -> list:
+        if slot.children is None:
+            self._set_snapshot(slot, list(self._live_children(slot)))
+        return slot.children
+
+    def _set_snapshot(self, slot: _Slot, children: list) -> None:
+        slot.children = children
         for child in children:
-            item.appendRow(self._item_from_node(child))
-        return item
-
-    def _base_item(self, node: Node | VirtualNode) -> QStandardItem:
-        item = QStandardItem(display_name_for_node(node))
-        item.setEditable(False)
-        item.setData(node, NODE_ROLE)
-        item.setIcon(self.icon_resolver.icon_for_node(node))
-        if node.target:
-            item.setToolTip(node.target)
-        return item
-
-    def _item_from_node(self, node: Node) -> QStandardItem:
-        item = self._base_item(node)
-        for child in node.children:
-            item.appendRow(self._item_from_node(child))
-        return item
+            self._shown_in.setdefault(child.id, []).append(slot)
+
+    def _row_offset(self, slot: _Slot) -> int:
+        return len(self._sections) if slot is self._root_slot else 0
+
+    def _row_of(self, slot: _Slot, node_id: str) -> int | None:
+        children = slot.children or []
+        ref = tree_index(self.root_node).get(node_id)
+        if ref is not None and ref.parent is slot.node:
+            # 本体の木なら TreeIndex の位置がそのまま使える
+            row = ref.index + self._row_offset(slot)
+            if row < len(children) and children[row].id == node_id:
+                return row
+        for row, child in enumerate(children):
+            if child.id == node_id:
+                return row
+        return None
+
+    def _unshow(self, slot: _Slot, node_id: str) -> None:
+        holders = self._shown_in.get(node_id)
+        if holders is None:
+            return
+        for pos, holder in enumerate(holders):
+            if holder is slot:
+                del holders[pos]
+                break
+        if not holders:
+            del self._shown_in[node_id]
+
+    def _drop_slot(self, slot: _Slot) -> None:
+        """Forget a removed row's slot and everything below it."""
+
+        stack = [slot]
+        while stack:
+            current = stack.pop()
+            same_node = self._slots_of.get(current.node.id, [])
+            for pos, other in enumerate(same_node):
+                if other is current:
+                    del same_node[pos]
+                    break
+            if not same_node:
+                self._slots_of.pop(current.node.id, None)
+            for child in current.children or ():
+                self._unshow(current, child.id)
+            # 同じ一括処理の中で後から _sync されても何もしないようにする
+            current.children = None
+            stack.extend(current.slots.values())
+
+    def node_at(self, index: QModelIndex):
+        """Node (or ``VirtualNode``) shown at ``index``; None for the invisible root."""
+
+        if not index.isValid():
+            return None
+        children = self._children(index.internalPointer())
+        return children[index.row()] if index.row() < len(children) else None
+
+    # --- QAbstractItemModel -------------------------------------------------
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if column != 0 or row < 0:
+            return QModelIndex()
+        slot = self._slot_for(parent)
+        if row >= len(self._children(slot)):
+            return QModelIndex()
+        return self.createIndex(row, column, slot)
+
+    def parent(self, child: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not child.isValid():
+            return QModelIndex()
+        slot: _Slot = child.internalPointer()
+        if slot.parent is None:
+            return QModelIndex()
+        return self.createIndex(slot.row, 0, slot.parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._children(self._slot_for(parent)))
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if not parent.isValid():
+            return True
+        slot = parent.internalPointer().slots.get(parent.row())
+        if slot is not None and slot.children is not None:
+            return bool(slot.children)
+        # まだ開かれていない行は子リストを写さずに判定する
+        node = self.node_at(parent)
+        return bool(node is not None and node.children)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        node = self.node_at(index)
+        if node is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return display_name_for_node(node)
+        if role == NODE_ROLE:
+            return node
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon_resolver.icon_for_node(node)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return node.target or None
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole and section == 0:
+            return "Launch Tree"
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return (
+            Qt.ItemFlag.ItemIsEnabled
+            | Qt.ItemFlag.ItemIsSelectable
+            | Qt.ItemFlag.ItemIsDragEnabled
+            | Qt.ItemFlag.ItemIsDropEnabled
+        )
+
+    def supportedDropActions(self) -> Qt.DropAction:
+        return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+    def mimeTypes(self) -> list[str]:
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes) -> QMimeData:
+        # ドロップ処理はビュー側で行うので、ドラッグ中のノード id だけを載せる
+        ids = [node.id for node in map(self.node_at, indexes) if node is not None]
+        mime = QMimeData()
+        mime.setData(self.MIME_TYPE, "\n".join(ids).encode("utf-8"))
+        return mime
+
+
+def _shift_slots(slot: _Slot, start: int, delta: int) -> None:
+    """Renumber the child slots of ``slot`` at rows >= ``start`` by ``delta``."""
+
+    if not any(row >= start for row in slot.slots):
+        return
+    shifted: dict[int, _Slot] = {}
+    for row, child in slot.slots.items():
+        if row >= start:
+            row += delta
+            child.row = row
+        shifted[row] = child
+    slot.slots = shifted
+
+
+def _ordered_rows(old: list, positions: dict[int, int]) -> set[int]:
+    """Rows of ``old`` to keep: the longest run whose positions in the new list increase.
+
+    Rows missing from the new list are removed by the caller, rows out of order
+    relative to that run are moved.
+    """
+
+    tails: list[int] = []
+    tail_rows: list[int] = []
+    previous: dict[int, int] = {}
+    for row, child in enumerate(old):
+        pos = positions.get(id(child))
+        if pos is None:
+            continue
+        at = bisect_left(tails, pos)
+        if at > 0:
+            previous[row] = tail_rows[at - 1]
+        if at == len(tails):
+            tails.append(pos)
+            tail_rows.append(row)
+        else:
+            tails[at] = pos
+            tail_rows[at] = row
+    keep: set[int] = set()
+    row = tail_rows[-1] if tail_rows else None
+    while row is not None:
+        keep.add(row)
+        row = previous.get(row)
+    return keep
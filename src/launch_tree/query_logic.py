@@ -0,0 +1,251 @@
+"""Search query language (pure logic).
+
+Syntax, on top of the plain substring search::
+
+    name:foo  target:"C:\\Program Files"  type:url     field-scoped terms
+    "two words"                                        quoted phrase
+    /^ab+c/   name:/tool_\\d+/                          regular expression (case-insensitive)
+    -type:separator   NOT foo                          negation
+    a b   a AND b   a OR b   a | b   (a OR b) c        AND binds tighter than OR
+
+A query with none of these (no field prefix, quote, regex, keyword or leading
+``-``) is not parsed and keeps the plain behaviour: the whole text is one
+substring. ``type:`` compares the whole type value; other terms are substrings.
+Text is compared in the normalized form of ``filter_logic.normalize_search_text``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import re
+
+from .domain import Node
+from .filter_logic import (
+    SearchKeys,
+    compute_visible_node_ids,
+    node_search_keys,
+    normalize_search_text,
+    visible_ids_matching,
+)
+
+FIELDS = {"name": 0, "target": 1, "type": 2}
+KEYWORDS = {"OR", "AND", "NOT", "|"}
+MAX_NESTING = 32
+
+_FIELD_PREFIX = re.compile(r"(name|target|type):", re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    """Raised for malformed queries (unbalanced quotes or parentheses, bad regex)."""
+
+
+@dataclass(frozen=True)
+class Term:
+    field: str | None
+    text: str = ""
+    pattern: re.Pattern | None = None
+
+    def matches(self, keys: SearchKeys) -> bool:
+        values = keys if self.field is None else (keys[FIELDS[self.field]],)
+        if self.pattern is not None:
+            return any(self.pattern.search(value) for value in values)
+        if self.field == "type":
+            return values[0] == self.text
+        return any(self.text in value for value in values)
+
+
+@dataclass(frozen=True)
+class Not:
+    part: "Plan"
+
+    def matches(self, keys: SearchKeys) -> bool:
+        return not self.part.matches(keys)
+
+
+@dataclass(frozen=True)
+class All:
+    parts: tuple["Plan", ...]
+
+    def matches(self, keys: SearchKeys) -> bool:
+        return all(part.matches(keys) for part in self.parts)
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    parts: tuple["Plan", ...]
+
+    def matches(self, keys: SearchKeys) -> bool:
+        return any(part.matches(keys) for part in self.parts)
+
+
+Plan = Term | Not | All | AnyOf
+
+
+def parse_query(query: str) -> Plan | None:
+    """Compile ``query`` into a plan; None for a plain (unstructured) query."""
+
+    tokens, structured = _tokenize(query)
+    if not structured:
+        return None
+    parser = _Parser(tokens)
+    plan = parser.parse_or(0)
+    if parser.pos != len(tokens):
+        raise QueryError("unbalanced ')'")
+    return plan
+
+
+def compile_query(query: str) -> Plan | None:
+    """``parse_query`` that treats malformed input as a plain query."""
+
+    try:
+        return parse_query(query)
+    except QueryError as exc:
+        logging.debug("Treating query %r as plain text: %s", query, exc)
+        return None
+
+
+def node_matches_plan(node: Node, plan: Plan) -> bool:
+    return plan.matches(node_search_keys(node))
+
+
+def compute_query_visible_ids(root: Node, query: str) -> set[str]:
+    """``compute_visible_node_ids`` with query-language support (full scan)."""
+
+    plan = compile_query(query)
+    if plan is None:
+        return compute_visible_node_ids(root, query)
+    return visible_ids_matching(root, lambda node: node_matches_plan(node, plan))
+
+
+# token: ("(",) / (")",) / ("OR",) / ("AND",) / ("NOT",) / ("TERM", Term)
+_Token = tuple
+
+
+def _tokenize(query: str) -> tuple[list[_Token], bool]:
+    tokens: list[_Token] = []
+    structured = False
+    pos = 0
+    length = len(query)
+    while pos < length:
+        char = query[pos]
+        if char.isspace():
+            pos += 1
+            continue
+        if char in "()":
+            tokens.append((char,))
+            pos += 1
+            continue
+        if char == "-" and pos + 1 < length and not query[pos + 1].isspace():
+            tokens.append(("NOT",))
+            structured = True
+            pos += 1
+            continue
+
+        field = None
+        prefix = _FIELD_PREFIX.match(query, pos)
+        if prefix is not None:
+            field = prefix.group(1).lower()
+            structured = True
+            pos = prefix.end()
+
+        if pos < length and query[pos] == '"':
+            text, pos = _read_quoted(query, pos)
+            tokens.append(("TERM", _text_term(field, text)))
+            structured = True
+            continue
+        if pos < length and query[pos] == "/":
+            closing = _find_unescaped(query, "/", pos + 1)
+            if closing >= 0:
+                try:
+                    pattern = re.compile(query[pos + 1:closing], re.IGNORECASE)
+                except re.error as exc:
+                    raise QueryError(f"invalid regular expression: {exc}") from exc
+                tokens.append(("TERM", Term(field=field, pattern=pattern)))
+                structured = True
+                pos = closing + 1
+                continue
+
+        end = pos
+        while end < length and not query[end].isspace() and query[end] not in "()":
+            end += 1
+        word = query[pos:end]
+        pos = end
+        if field is None and word in KEYWORDS:
+            tokens.append(("OR",) if word == "|" else (word,))
+            structured = True
+        else:
+            tokens.append(("TERM", _text_term(field, word)))
+    return tokens, structured
+
+
+def _text_term(field: str | None, text: str) -> Term:
+    return Term(field=field, text=normalize_search_text(text))
+
+
+def _find_unescaped(text: str, char: str, start: int) -> int:
+    pos = start
+    while pos < len(text):
+        if text[pos] == "\\":
+            pos += 2
+            continue
+        if text[pos] == char:
+            return pos
+        pos += 1
+    return -1
+
+
+def _read_quoted(query: str, pos: int) -> tuple[str, int]:
+    closing = _find_unescaped(query, '"', pos + 1)
+    if closing < 0:
+        raise QueryError("unterminated quote")
+    return re.sub(r"\\(.)", r"\1", query[pos + 1:closing]), closing + 1
+
+
+class _Parser:
+    def __init__(self, tokens: list[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def parse_or(self, depth: int) -> Plan:
+        if depth > MAX_NESTING:
+            raise QueryError("query nested too deeply")
+        parts = [self._parse_and(depth)]
+        while self._peek() == "OR":
+            self.pos += 1
+            if self._peek() is None:
+                # 入力途中の末尾の OR は無視する
+                break
+            parts.append(self._parse_and(depth))
+        return parts[0] if len(parts) == 1 else AnyOf(tuple(parts))
+
+    def _parse_and(self, depth: int) -> Plan:
+        parts = [self._parse_unary(depth)]
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.pos += 1
+                if self._peek() is None:
+                    break
+            parts.append(self._parse_unary(depth))
+        return parts[0] if len(parts) == 1 else All(tuple(parts))
+
+    def _parse_unary(self, depth: int) -> Plan:
+        kind = self._peek()
+        if kind is None:
+            # "NOT" だけ、"()" などは空の条件（全件一致）として扱う
+            return Term(field=None)
+        self.pos += 1
+        if kind == "NOT":
+            return Not(self._parse_unary(depth + 1))
+        if kind == "(":
+            inner = self.parse_or(depth + 1)
+            if self._peek() != ")":
+                raise QueryError("unbalanced '('")
+            self.pos += 1
+            return inner
+        if kind == "TERM":
+            return self.tokens[self.pos - 1][1]
+        raise QueryError(f"unexpected {kind!r}")
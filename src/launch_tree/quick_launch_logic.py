@@ -0,0 +1,269 @@
+"""Fuzzy, ranked quick-launch matching over launchable nodes (pure logic)."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+import heapq
+import re
+
+from .domain import Node
+from .filter_logic import node_search_keys, normalize_query
+
+LAUNCHABLE_TYPES = frozenset({"path", "url"})
+DEFAULT_LIMIT = 10
+
+SCORE_MATCH = 16
+SCORE_CONSECUTIVE = 8
+SCORE_BOUNDARY = 10
+SCORE_FIRST_CHAR = 15
+SCORE_PREFIX = 30
+PENALTY_GAP = 1
+MAX_GAP_PENALTY = 12
+MAX_TRAILING_PENALTY = 8
+# recent の先頭ほど高い（先頭で SCORE_RECENT）
+SCORE_RECENT = 40
+
+_WORD_BREAK = re.compile(r"[\W_]")
+
+
+@dataclass(frozen=True)
+class RankedNode:
+    node: Node
+    score: int
+
+
+def fuzzy_score(needle: str, text: str) -> int | None:
+    """Score ``needle`` as a subsequence of ``text`` (both normalized); None if it is not one.
+
+    Matches at word starts, consecutive runs and a match on the first character
+    score higher; skipped characters between matches and characters left after
+    the last match cost a little. A contiguous hit is scored as one run (the
+    first occurrence at a word start, else the first occurrence); otherwise two
+    alignments are tried (leftmost, and word-start first) and the better one wins.
+    """
+
+    if not needle:
+        return 0
+    pos = _contiguous_position(needle, text)
+    if pos >= 0:
+        # 連続一致は閉じた式で計算する（_score_positions と同じ値）
+        best = _run_score(needle) - min(MAX_TRAILING_PENALTY, len(text) - pos - len(needle))
+        if pos == 0:
+            best += SCORE_BOUNDARY + SCORE_FIRST_CHAR
+        elif not text[pos - 1].isalnum():
+            best += SCORE_BOUNDARY
+    else:
+        best = None
+        for prefer_boundary in (False, True):
+            positions = _align(needle, text, prefer_boundary)
+            if positions is None:
+                return None
+            score = _score_positions(positions, text)
+            if best is None or score > best:
+                best = score
+    if text.startswith(needle):
+        best += SCORE_PREFIX
+    return best
+
+
+@lru_cache(maxsize=64)
+def _run_score(needle: str) -> int:
+    """Score of ``needle`` matched as one run, without the first-character bonuses."""
+
+    inner_boundaries = sum(1 for char in needle[:-1] if not char.isalnum())
+    return len(needle) * SCORE_MATCH + (len(needle) - 1) * SCORE_CONSECUTIVE + inner_boundaries * SCORE_BOUNDARY
+
+
+def _contiguous_position(needle: str, text: str) -> int:
+    first = pos = text.find(needle)
+    while pos > 0 and not _is_boundary(text, pos):
+        pos = text.find(needle, pos + 1)
+    return first if pos < 0 else pos
+
+
+def _is_boundary(text: str, pos: int) -> bool:
+    return pos == 0 or not text[pos - 1].isalnum()
+
+
+def _align(needle: str, text: str, prefer_boundary: bool) -> list[int] | None:
+    positions: list[int] = []
+    start = 0
+    for idx, char in enumerate(needle):
+        pos = text.find(char, start)
+        if pos < 0:
+            return None
+        if prefer_boundary and not _is_boundary(text, pos):
+            probe = pos
+            while True:
+                probe = text.find(char, probe + 1)
+                if probe < 0:
+                    break
+                if _is_boundary(text, probe):
+                    # 残りの文字がまだ後ろに並ぶときだけ語頭へ寄せる
+                    if _is_subsequence(needle[idx + 1:], text, probe + 1):
+                        pos = probe
+                    break
+        positions.append(pos)
+        start = pos + 1
+    return positions
+
+
+def _is_subsequence(needle: str, text: str, start: int) -> bool:
+    for char in needle:
+        start = text.find(char, start)
+        if start < 0:
+            return False
+        start += 1
+    return True
+
+
+def _score_positions(positions, text: str) -> int:
+    score = 0
+    previous = -1
+    for pos in positions:
+        score += SCORE_MATCH
+        if _is_boundary(text, pos):
+            score += SCORE_BOUNDARY
+        if pos == 0:
+            score += SCORE_FIRST_CHAR
+        if previous >= 0:
+            if pos == previous + 1:
+                score += SCORE_CONSECUTIVE
+            else:
+                score -= min(MAX_GAP_PENALTY, (pos - previous - 1) * PENALTY_GAP)
+        previous = pos
+    # 後ろに残る文字が少ない（短い名前）ほど上位
+    return score - min(MAX_TRAILING_PENALTY, len(text) - previous - 1)
+
+
+def recent_bonus(recent_ids: list[str]) -> dict[str, int]:
+    """id -> bonus for the user_state ``recent`` order (most recent first)."""
+
+    bonus: dict[str, int] = {}
+    count = len(recent_ids)
+    for rank, node_id in enumerate(recent_ids):
+        bonus.setdefault(node_id, SCORE_RECENT * (count - rank) // count)
+    return bonus
+
+
+def recent_ids_from_state(user_state: dict) -> list[str]:
+    recent = user_state.get("recent") if isinstance(user_state, dict) else None
+    if not isinstance(recent, list):
+        return []
+    return [str(entry.get("id")) for entry in recent if isinstance(entry, dict) and entry.get("id")]
+
+
+class QuickLaunchIndex:
+    """Launchable nodes of one tree, searched by fuzzy name match.
+
+    Candidates are found with one regular expression over all normalized names
+    joined by newlines (the subsequence test runs in the regex engine), then
+    scored in Python into a bounded min-heap of ``limit`` entries; candidates whose
+    score upper bound cannot beat the heap minimum are skipped. When the query still
+    contains the previous one as a subsequence, only the previous candidates are
+    re-tested. The corpus is rebuilt lazily after ``invalidate``.
+    """
+
+    def __init__(self, root: Node):
+        self.root = root
+        self._nodes: list[Node] = []
+        self._names: list[str] = []
+        self._starts: list[int] = []
+        self._word_starts: list[int] = []
+        self._corpus = ""
+        self._built = False
+        self._last_needle = ""
+        self._last_rows: list[int] = []
+
+    def invalidate(self) -> None:
+        self._built = False
+
+    def search(self, query: str, recent_ids: list[str] | None = None, limit: int = DEFAULT_LIMIT) -> list[RankedNode]:
+        needle = " ".join(normalize_query(query).split())
+        if not needle or limit <= 0:
+            return []
+        self._ensure_built()
+        bonus = recent_bonus(recent_ids or [])
+        names, nodes, word_starts = self._names, self._nodes, self._word_starts
+        run = _run_score(needle)
+        # 先頭一致は fuzzy_score と同じ値をその場で出す。それ以外は上限で足切りしてから採点する
+        prefix_score = run + SCORE_BOUNDARY + SCORE_FIRST_CHAR + SCORE_PREFIX
+        contiguous_upper = run + SCORE_BOUNDARY
+        # 連続一致しない候補: 少なくとも 1 つは間が空き、語頭ボーナスは語の数まで
+        scattered_base = len(needle) * SCORE_MATCH + (len(needle) - 2) * SCORE_CONSECUTIVE + SCORE_FIRST_CHAR - PENALTY_GAP
+        heap: list[tuple[int, int]] = []
+        for row in self._candidate_rows(needle):
+            name = names[row]
+            node_bonus = bonus.get(nodes[row].id, 0) if bonus else 0
+            if name.startswith(needle):
+                score = prefix_score - min(MAX_TRAILING_PENALTY, len(name) - len(needle)) + node_bonus
+            else:
+                if len(heap) == limit:
+                    if needle in name:
+                        upper = contiguous_upper + node_bonus
+                    else:
+                        upper = scattered_base + min(len(needle), word_starts[row]) * SCORE_BOUNDARY + node_bonus
+                    if (upper, -row) <= heap[0]:
+                        continue
+                score = fuzzy_score(needle, name) + node_bonus
+            # 同点は木の並び順（row が小さい方）を優先
+            entry = (score, -row)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        return [RankedNode(node=nodes[-neg_row], score=score) for score, neg_row in sorted(heap, reverse=True)]
+
+    def _candidate_rows(self, needle: str) -> list[int]:
+        """Rows whose name contains ``needle`` as a subsequence."""
+
+        # a[^b\n]*b[^c\n]*c... : 先頭文字を起点にした最左一致の部分列判定（バックトラックしない）。
+        # 先頭がリテラルなので正規表現エンジンの高速探索が効く
+        pattern = re.compile(
+            re.escape(needle[0]) + "".join(f"[^{re.escape(char)}\n]*{re.escape(char)}" for char in needle[1:])
+        )
+        if self._last_needle and _is_subsequence(self._last_needle, needle, 0):
+            # 前回の語を部分列として含むなら、候補は前回の候補に限られる
+            names = self._names
+            rows = [row for row in self._last_rows if pattern.search(names[row])]
+        else:
+            starts = self._starts
+            rows = []
+            for match in pattern.finditer(self._corpus):
+                row = bisect_right(starts, match.start()) - 1
+                # 同じ行で複数回一致することがある
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+        self._last_needle, self._last_rows = needle, rows
+        return rows
+
+    def _ensure_built(self) -> None:
+        if self._built:
+            return
+        nodes: list[Node] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.type in LAUNCHABLE_TYPES:
+                nodes.append(node)
+            stack.extend(reversed(node.children))
+        # 名前に改行があっても 1 行 1 ノードを保つ
+        names = [node_search_keys(node)[0].replace("\n", " ") for node in nodes]
+        starts: list[int] = []
+        offset = 0
+        for name in names:
+            starts.append(offset)
+            offset += len(name) + 1
+        self._nodes, self._names, self._starts = nodes, names, starts
+        self._word_starts = [1 + len(_WORD_BREAK.findall(name, 0, len(name) - 1)) for name in names]
+        self._corpus = "\n".join(names)
+        self._built = True
+        self._last_needle, self._last_rows = "", []
+
+
+def rank_launchables(root: Node, query: str, recent_ids: list[str] | None = None, limit: int = DEFAULT_LIMIT) -> list[RankedNode]:
+    """One-shot ``QuickLaunchIndex(root).search(...)``."""
+
+    return QuickLaunchIndex(root).search(query, recent_ids, limit)
@@ -0,0 +1,386 @@
+"""Trigram index over the searchable node fields.
+
+Answers the same question as ``filter_logic.compute_visible_node_ids`` without
+normalizing every node on every keystroke: candidate nodes come from intersecting
+trigram posting lists, are confirmed with a plain substring check, and visibility
+is propagated from them along ``TreeIndex`` parent links.
+
+Structured queries (``query_logic``) are answered from the same index: ``type:``
+terms use a type -> ids map, substring terms narrow through the trigram
+postings, and every candidate is confirmed with the compiled plan.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+import logging
+import threading
+
+from .domain import Node, find_node_ref
+from .filter_logic import SearchKeys, compute_visible_node_ids, node_search_keys, normalize_query
+from .query_logic import All, AnyOf, Plan, Term, compile_query
+from .tree_ops import TreeOp
+
+GRAM_SIZE = 3
+# これより多くのノードに現れる trigram は絞り込みに役立たないので posting を持たない
+STOP_GRAM_MIN = 256
+STOP_GRAM_RATIO = 0.05
+# フィールド間をまたぐ一致を防ぐ区切り（検索語には現れない前提。含まれる場合は全件照合）
+_FIELD_SEPARATOR = "\x00"
+_CANCEL_CHECK_INTERVAL = 1024
+
+
+class SearchCancelled(Exception):
+    """Raised by ``visible_node_ids`` when ``should_stop`` reports the query is stale."""
+
+
+def node_search_text(node: Node) -> str:
+    """Normalized name / target / type, the fields ``node_matches_query`` looks at."""
+
+    return _FIELD_SEPARATOR.join(node_search_keys(node))
+
+
+def _type_key(text: str) -> str:
+    return text.rpartition(_FIELD_SEPARATOR)[2]
+
+
+def _grams(text: str) -> set[str]:
+    return {text[idx:idx + GRAM_SIZE] for idx in range(len(text) - GRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    """Incrementally maintained trigram index for one tree.
+
+    Call ``apply_ops`` with the ``tree_ops`` records of every edit (after the edit
+    was applied to ``root``) to keep it in sync; moves only update the parent links.
+
+    Trigrams shared by a large share of the nodes become stop grams: they keep no
+    posting list and are skipped when intersecting, the substring check still
+    filters the candidates. A query made only of stop grams scans the cached texts.
+    The index is built on the first non-empty query, so startup does not pay for it.
+
+    The matches of the previous query are kept: when the new query contains the
+    old one (typing one more character), only those nodes are re-tested. Any
+    edit or rebuild drops them, as does a query that does not extend the last one.
+
+    Public methods hold an internal lock, so a search may run on a worker thread
+    while the UI thread applies ops. Searches follow the index's own parent
+    links and never touch the tree's ``TreeIndex``, which belongs to the thread
+    that edits the tree; only ``apply_ops`` (called from that thread) reads it.
+    Plain and structured queries alike match the keys stored when a node was
+    indexed, so a search sees no edit before ``apply_ops`` reports it.
+    """
+
+    def __init__(self, root: Node):
+        self.root = root
+        self._nodes: dict[str, Node] = {}
+        # 索引に入れた時点の (name, target, type)。検索はノードではなくこちらを読む
+        self._keys: dict[str, SearchKeys] = {}
+        self._texts: dict[str, str] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._stop_grams: set[str] = set()
+        self._by_type: dict[str, set[str]] = {}
+        # node id -> parent id（root は持たない）
+        self._parents: dict[str, str] = {}
+        self._built = False
+        self._last_needle = ""
+        self._last_matches: list[Node] = []
+        self._lock = threading.RLock()
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._built = True
+        self._forget_matches()
+        self._nodes.clear()
+        self._keys.clear()
+        self._texts.clear()
+        self._postings.clear()
+        self._stop_grams.clear()
+        self._by_type.clear()
+        self._parents.clear()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            keys = node_search_keys(node)
+            text = _FIELD_SEPARATOR.join(keys)
+            self._nodes[node.id] = node
+            self._keys[node.id] = keys
+            self._texts[node.id] = text
+            self._by_type.setdefault(_type_key(text), set()).add(node.id)
+            children = list(node.children)
+            for child in children:
+                self._parents[child.id] = node.id
+            stack.extend(children)
+
+        postings: dict[str, list[str]] = {}
+        for node_id, text in self._texts.items():
+            for gram in _grams(text):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = [node_id]
+                else:
+                    posting.append(node_id)
+        limit = self._stop_limit()
+        for gram, node_ids in postings.items():
+            if len(node_ids) > limit:
+                self._stop_grams.add(gram)
+            else:
+                self._postings[gram] = set(node_ids)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_built()
+            return len(self._nodes)
+
+    def add_subtree(self, node: Node, parent_id: str) -> None:
+        with self._lock:
+            self._parents[node.id] = parent_id
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                self._add(current)
+                for child in current.children:
+                    self._parents[child.id] = current.id
+                stack.extend(current.children)
+
+    def remove_subtree(self, node: Node) -> None:
+        with self._lock:
+            stack = [node]
+            while stack:
+                current = stack.pop()
+                self._remove(current.id)
+                self._parents.pop(current.id, None)
+                stack.extend(current.children)
+
+    def update_node(self, node: Node) -> None:
+        with self._lock:
+            self._remove(node.id)
+            self._add(node)
+
+    def apply_ops(self, ops: Iterable[TreeOp]) -> None:
+        with self._lock:
+            for op in ops:
+                self.apply_op(op)
+
+    def apply_op(self, op: TreeOp) -> None:
+        with self._lock:
+            self._apply_op(op)
+
+    def _apply_op(self, op: TreeOp) -> None:
+        kind = op.get("op")
+        if not self._built:
+            return
+        if kind == "delete":
+            removed = self._nodes.get(str(op.get("id")))
+            if removed is not None:
+                # 切り離されたノードは子を保持したままなので、部分木ごと外せる
+                self.remove_subtree(removed)
+            return
+        if kind == "insert":
+            node_id = (op.get("node") or {}).get("id")
+        else:
+            node_id = op.get("id")
+        ref = find_node_ref(self.root, str(node_id))
+        if ref is None:
+            logging.warning("Search index could not resolve %s op for id=%s; rebuilding", kind, node_id)
+            self.rebuild()
+        elif kind == "insert" or (kind == "move" and ref.node.id not in self._nodes):
+            # 編集中に別スレッドで索引を作った場合、移動中の部分木を見落としていることがある
+            self.add_subtree(ref.node, ref.parent.id)
+        elif kind == "move":
+            self._parents[ref.node.id] = ref.parent.id
+        elif kind == "update":
+            self.update_node(ref.node)
+
+    def matching_nodes(self, needle: str) -> list[Node]:
+        """Nodes whose name, target or type contains ``needle`` (already passed through ``normalize_query``)."""
+
+        with self._lock:
+            return self._matching_nodes(needle)
+
+    def _matching_nodes(self, needle: str) -> list[Node]:
+        self._ensure_built()
+        texts = self._texts
+        if self._last_needle and self._last_needle in needle and _FIELD_SEPARATOR not in needle:
+            # 前回の結果の部分集合になるので、前回の一致だけを再判定する
+            matches = [node for node in self._last_matches if needle in texts[node.id]]
+        else:
+            matches = self._match_all(needle)
+        self._last_needle = needle
+        self._last_matches = matches
+        return matches
+
+    def _match_all(self, needle: str) -> list[Node]:
+        if _FIELD_SEPARATOR in needle:
+            return [
+                self._nodes[node_id]
+                for node_id, keys in self._keys.items()
+                if any(needle in field for field in keys)
+            ]
+        candidates: Iterable[str] | None = self._gram_candidates(needle)
+        if candidates is None:
+            candidates = self._texts
+        texts = self._texts
+        return [self._nodes[node_id] for node_id in candidates if needle in texts[node_id]]
+
+    def visible_node_ids(self, query: str, should_stop: Callable[[], bool] | None = None) -> set[str]:
+        """Same result as ``query_logic.compute_query_visible_ids(self.root, query)``.
+
+        For plain queries that is ``compute_visible_node_ids(self.root, query)``.
+        ``should_stop`` is polled now and then; when it returns True the search
+        raises ``SearchCancelled``.
+        """
+
+        plan = compile_query(query)
+        needle = normalize_query(query)
+        should_stop = should_stop or _never
+        with self._lock:
+            if plan is not None:
+                return self._propagate(self._plan_matches(plan, query, should_stop), query, should_stop)
+            if not needle:
+                return compute_visible_node_ids(self.root, needle)
+            return self._propagate(self._matching_nodes(needle), needle, should_stop)
+
+    def _plan_matches(self, plan: Plan, query: str, should_stop: Callable[[], bool]) -> Iterable[Node]:
+        self._ensure_built()
+        candidates = self._plan_candidates(plan)
+        nodes = self._nodes
+        keys = self._keys
+        # 平文の検索と同じく、索引に入れた時点のキーで照合する（ノードのキャッシュには触れない）
+        for count, node_id in enumerate(keys if candidates is None else candidates):
+            if count % _CANCEL_CHECK_INTERVAL == 0 and should_stop():
+                raise SearchCancelled(query)
+            if plan.matches(keys[node_id]):
+                yield nodes[node_id]
+
+    def _plan_candidates(self, plan: Plan) -> set[str] | None:
+        """A superset of the ids ``plan`` accepts, or None when the index cannot narrow it."""
+
+        if isinstance(plan, Term):
+            if plan.pattern is not None:
+                return None
+            if plan.field == "type":
+                return self._by_type.get(plan.text, set())
+            return self._gram_candidates(plan.text)
+        if isinstance(plan, All):
+            known = [found for found in map(self._plan_candidates, plan.parts) if found is not None]
+            if not known:
+                return None
+            known.sort(key=len)
+            return known[0].intersection(*known[1:])
+        if isinstance(plan, AnyOf):
+            union: set[str] = set()
+            for part in plan.parts:
+                found = self._plan_candidates(part)
+                if found is None:
+                    return None
+                union |= found
+            return union
+        # Not: 否定は索引で絞れない
+        return None
+
+    def _gram_candidates(self, text: str) -> set[str] | None:
+        postings = []
+        for gram in _grams(text):
+            if gram in self._stop_grams:
+                continue
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _propagate(self, matches: Iterable[Node], label: str, should_stop: Callable[[], bool]) -> set[str]:
+        nodes = self._nodes
+        parents = self._parents
+        visible: set[str] = set()
+        expanded_groups: set[str] = set()
+        for count, matched in enumerate(matches):
+            if count % _CANCEL_CHECK_INTERVAL == 0 and should_stop():
+                raise SearchCancelled(label)
+            if matched.id in visible and matched.type != "group":
+                continue
+            if matched.type == "group":
+                # マッチした group の配下はすべて表示
+                expanded_groups.add(matched.id)
+                stack = list(matched.children)
+                while stack:
+                    current = stack.pop()
+                    visible.add(current.id)
+                    if current.id not in expanded_groups:
+                        stack.extend(current.children)
+            # 祖先へ伝播: group は可視の子があれば、separator は可視の非 separator 子があれば表示
+            child = matched
+            visible.add(child.id)
+            parent = nodes.get(parents.get(child.id, ""))
+            while parent is not None and parent.id not in visible:
+                if parent.type == "group" or (parent.type == "separator" and child.type != "separator"):
+                    visible.add(parent.id)
+                else:
+                    break
+                child = parent
+                parent = nodes.get(parents.get(child.id, ""))
+        return visible
+
+    def _add(self, node: Node) -> None:
+        self._forget_matches()
+        keys = node_search_keys(node)
+        text = _FIELD_SEPARATOR.join(keys)
+        self._nodes[node.id] = node
+        self._keys[node.id] = keys
+        self._texts[node.id] = text
+        self._by_type.setdefault(_type_key(text), set()).add(node.id)
+        postings = self._postings
+        limit = self._stop_limit()
+        for gram in _grams(text):
+            if gram in self._stop_grams:
+                continue
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = {node.id}
+            else:
+                posting.add(node.id)
+                if len(posting) > limit:
+                    del postings[gram]
+                    self._stop_grams.add(gram)
+
+    def _forget_matches(self) -> None:
+        self._last_needle = ""
+        self._last_matches = []
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self._rebuild()
+
+    def _stop_limit(self) -> int:
+        return max(STOP_GRAM_MIN, int(len(self._nodes) * STOP_GRAM_RATIO))
+
+    def _remove(self, node_id: str) -> None:
+        if self._nodes.pop(node_id, None) is None:
+            return
+        self._forget_matches()
+        del self._keys[node_id]
+        text = self._texts.pop(node_id)
+        type_key = _type_key(text)
+        same_type = self._by_type.get(type_key)
+        if same_type is not None:
+            same_type.discard(node_id)
+            if not same_type:
+                del self._by_type[type_key]
+        postings = self._postings
+        for gram in _grams(text):
+            posting = postings.get(gram)
+            if posting is not None:
+                posting.discard(node_id)
+                if not posting:
+                    del postings[gram]
+
+
+def _never() -> bool:
+    return False
@@ -0,0 +1,80 @@
+"""Runs search queries off the UI thread, keeping only the latest one."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+import threading
+
+from .search_index import SearchCancelled, SearchIndex
+
+SearchResult = Callable[[int, str, set[str]], None]
+
+
+class SearchWorker:
+    """Single worker thread that computes ``SearchIndex.visible_node_ids``.
+
+    Every ``submit`` carries a generation number. A newer submission replaces a
+    pending one and makes a running one stop at its next cancellation check, so
+    only the latest query's result reaches ``on_result``. ``cancel`` bumps the
+    generation without submitting anything (used when the tree is edited and the
+    view is refreshed synchronously). ``on_result`` runs on the worker thread.
+    """
+
+    def __init__(self, index: SearchIndex, on_result: SearchResult):
+        self.index = index
+        self.on_result = on_result
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: tuple[int, str] | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="search-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def submit(self, query: str) -> int:
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, query)
+            self._cond.notify_all()
+            return self._generation
+
+    def cancel(self) -> int:
+        with self._cond:
+            self._generation += 1
+            self._pending = None
+            return self._generation
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def close(self, timeout: float | None = None) -> None:
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._pending = None
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                generation, query = self._pending
+                self._pending = None
+            try:
+                visible = self.index.visible_node_ids(query, should_stop=lambda: not self.is_current(generation))
+            except SearchCancelled:
+                continue
+            except Exception:
+                # 検索中に木が編集された場合など。結果は古いので捨てる
+                logging.exception("Background search failed for %r", query)
+                continue
+            if self.is_current(generation):
+                self.on_result(generation, query, visible)
@@ -0,0 +1,149 @@
+"""Compact binary snapshot of the launcher tree.
+
+Layout (little endian)::
+
+    header   magic "LTRB", version u16, reserved u16,
+             source size u64, source mtime_ns u64,
+             string count u32, node count u32, blob bytes u32, extra bytes u32
+    strings  u32 length (in characters) per string, then one UTF-8 blob
+    extra    UTF-8 JSON object with top-level fields besides the tree (may be empty)
+    nodes    pre-order, six u32 per node: id, name, type, target prefix, target suffix, child count
+
+Strings are deduplicated, and targets are split after their last path separator
+so the directory/URL prefix shared by many items is stored once. JSON remains the
+interchange format; this file only speeds up loading.
+"""
+
+from __future__ import annotations
+
+from array import array
+import json
+import struct
+import sys
+
+from .domain import Node
+
+MAGIC = b"LTRB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHQQIIII")
+_FIELDS_PER_NODE = 6
+
+
+def encode_tree(root: Node, source_stat: tuple[int, int] = (0, 0), extra: dict | None = None) -> bytes:
+    """Encode ``root``. ``source_stat`` is the (size, mtime_ns) of the JSON file written alongside."""
+
+    table: dict[str, int] = {}
+    strings: list[str] = []
+
+    def ref(value: str) -> int:
+        idx = table.get(value)
+        if idx is None:
+            idx = table[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    fields = array("I")
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        prefix, suffix = _split_target(node.target)
+        fields.extend((ref(node.id), ref(node.name), ref(node.type), ref(prefix), ref(suffix), len(node.children)))
+        stack.extend(reversed(node.children))
+
+    lengths = array("I", (len(value) for value in strings))
+    blob = "".join(strings).encode("utf-8")
+    extra_bytes = json.dumps(extra or {}, ensure_ascii=False).encode("utf-8")
+    if sys.byteorder == "big":
+        fields.byteswap()
+        lengths.byteswap()
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        source_stat[0],
+        source_stat[1],
+        len(strings),
+        len(fields) // _FIELDS_PER_NODE,
+        len(blob),
+        len(extra_bytes),
+    )
+    return b"".join((header, lengths.tobytes(), blob, extra_bytes, fields.tobytes()))
+
+
+def read_source_stat(data: bytes) -> tuple[int, int]:
+    """(size, mtime_ns) of the JSON file the snapshot was written with."""
+
+    header = _unpack_header(data)
+    return header[3], header[4]
+
+
+def decode_tree(data: bytes) -> tuple[Node, dict]:
+    """Decode a snapshot. Returns the tree and the extra top-level fields."""
+
+    _, _, _, _, _, string_count, node_count, blob_size, extra_size = _unpack_header(data)
+    offset = _HEADER.size
+
+    lengths = array("I")
+    lengths.frombytes(data[offset:offset + 4 * string_count])
+    offset += 4 * string_count
+    text = data[offset:offset + blob_size].decode("utf-8")
+    offset += blob_size
+    extra = json.loads(data[offset:offset + extra_size].decode("utf-8") or "{}")
+    offset += extra_size
+    fields = array("I")
+    fields.frombytes(data[offset:offset + 4 * _FIELDS_PER_NODE * node_count])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+        fields.byteswap()
+    if len(fields) != _FIELDS_PER_NODE * node_count or node_count == 0:
+        raise ValueError("truncated snapshot")
+
+    strings: list[str] = []
+    position = 0
+    for length in lengths:
+        strings.append(text[position:position + length])
+        position += length
+    types = {idx: sys.intern(strings[idx]) for idx in set(fields[2::_FIELDS_PER_NODE])}
+
+    root: Node | None = None
+    # [node, 残りの子の数]
+    open_nodes: list[list] = []
+    for base in range(0, len(fields), _FIELDS_PER_NODE):
+        node_id, name, node_type, prefix, suffix, child_count = fields[base:base + _FIELDS_PER_NODE]
+        node = Node(
+            id=strings[node_id],
+            name=strings[name],
+            type=types[node_type],
+            target=strings[prefix] + strings[suffix],
+            children=[],
+        )
+        if root is None:
+            root = node
+        else:
+            while open_nodes and open_nodes[-1][1] == 0:
+                open_nodes.pop()
+            if not open_nodes:
+                raise ValueError("snapshot has more than one root")
+            parent = open_nodes[-1]
+            parent[0].children.append(node)
+            parent[1] -= 1
+        if child_count:
+            open_nodes.append([node, child_count])
+    assert root is not None
+    return root, extra if isinstance(extra, dict) else {}
+
+
+def _unpack_header(data: bytes) -> tuple:
+    if len(data) < _HEADER.size:
+        raise ValueError("snapshot too short")
+    header = _HEADER.unpack_from(data)
+    if header[0] != MAGIC:
+        raise ValueError("not a launcher snapshot")
+    if header[1] != FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot version: {header[1]}")
+    return header
+
+
+def _split_target(target: str) -> tuple[str, str]:
+    cut = max(target.rfind("/"), target.rfind("\\")) + 1
+    return target[:cut], target[cut:]
@@ -0,0 +1,94 @@
+"""Pre-parsed cache of launcher.json so unchanged files skip JSON decoding at startup.
+
+The cache is a marshalled tuple keyed by the source file's size, mtime_ns and
+BLAKE2 content hash (plus the Python version, since marshal is version specific).
+Any mismatch or decode error is a miss; the caller then parses JSON and rewrites it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import os
+from pathlib import Path
+import sys
+
+from .domain import Node
+
+CACHE_VERSION = 1
+_PYTHON = tuple(sys.version_info[:2])
+
+SourceKey = tuple[int, int, bytes]
+
+
+def source_key(data: bytes, path: Path) -> SourceKey:
+    """(size, mtime_ns, digest) of ``data`` read from or just written to ``path``."""
+
+    return len(data), path.stat().st_mtime_ns, hashlib.blake2b(data, digest_size=16).digest()
+
+
+def read_parse_cache(cache_path: Path, key: SourceKey) -> tuple[Node, dict] | None:
+    try:
+        if not cache_path.exists():
+            return None
+        version, python, cached_key, extra, ids, names, types, targets, counts = marshal.loads(
+            cache_path.read_bytes()
+        )
+    except Exception:
+        logging.warning("Ignoring unreadable parse cache %s", cache_path)
+        return None
+    if version != CACHE_VERSION or python != _PYTHON or cached_key != key:
+        return None
+    try:
+        return _build_tree(ids, names, types, targets, counts), extra
+    except Exception:
+        logging.warning("Ignoring inconsistent parse cache %s", cache_path)
+        return None
+
+
+def write_parse_cache(cache_path: Path, key: SourceKey, root: Node, extra: dict | None = None) -> None:
+    ids: list[str] = []
+    names: list[str] = []
+    types: list[str] = []
+    targets: list[str] = []
+    counts: list[int] = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        ids.append(node.id)
+        names.append(node.name)
+        types.append(node.type)
+        targets.append(node.target)
+        counts.append(len(node.children))
+        stack.extend(reversed(node.children))
+    payload = (CACHE_VERSION, _PYTHON, key, dict(extra or {}), ids, names, types, targets, counts)
+    temp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    temp_path.write_bytes(marshal.dumps(payload))
+    os.replace(temp_path, cache_path)
+
+
+def _build_tree(ids, names, types, targets, counts) -> Node:
+    if not ids or not (len(ids) == len(names) == len(types) == len(targets) == len(counts)):
+        raise ValueError("malformed cache")
+    interned = {value: sys.intern(value) for value in set(types)}
+    nodes = [
+        Node(id=node_id, name=name, type=interned[node_type], target=target, children=[])
+        for node_id, name, node_type, target in zip(ids, names, types, targets)
+    ]
+    # [node, 残りの子の数]
+    open_nodes: list[list] = []
+    for node, count in zip(nodes, counts):
+        if open_nodes:
+            parent = open_nodes[-1]
+            parent[0].children.append(node)
+            parent[1] -= 1
+            while open_nodes and open_nodes[-1][1] == 0:
+                open_nodes.pop()
+        elif node is not nodes[0]:
+            raise ValueError("cache has more than one root")
+        if count:
+            open_nodes.append([node, count])
+    if open_nodes:
+        raise ValueError("truncated cache")
+    return nodes[0]
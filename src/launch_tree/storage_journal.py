@@ -0,0 +1,179 @@
+"""Journaled storage: small operation records appended per edit, compacted in the background."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import partial
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+
+from .domain import Node, copy_tree, default_root
+from .storage_json import JsonStorage
+from .storage_writer import SaveJob
+from .tree_ops import TreeOp, apply_op
+
+JOURNAL_SEQ_KEY = "journal_seq"
+
+
+@dataclass
+class JournalStorage(JsonStorage):
+    """JsonStorage that appends edits to ``<path>.journal`` instead of rewriting the file.
+
+    The snapshot (main file and ``.bak``) records the last journal sequence number it
+    contains, so ``load_tree`` replays only newer records on top of it. The journal is
+    trimmed only after both snapshot files were written, which keeps the
+    main -> backup fallback intact.
+
+    ``_pending`` counts the records since the last compaction started; it is
+    guarded by ``_journal_lock`` and only lowered when a compaction really
+    starts, so an edit made while one is still running asks again.
+    """
+
+    compact_threshold: int = 200
+    _seq: int = field(default=0, init=False, repr=False)
+    _pending: int = field(default=0, init=False, repr=False)
+    _snapshot_seq: int = field(default=0, init=False, repr=False)
+    _journal_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _snapshot_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _compactor: threading.Thread | None = field(default=None, init=False, repr=False)
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".journal")
+
+    def load_tree(self) -> Node:
+        loaded = self._load_snapshot()
+        if loaded is None:
+            logging.warning("Falling back to default empty root")
+            root, snapshot_seq = default_root(), 0
+        else:
+            root, payload = loaded
+            snapshot_seq = _as_int(payload.get(JOURNAL_SEQ_KEY))
+
+        replayed = 0
+        last_seq = snapshot_seq
+        for record in self._read_journal():
+            seq = _as_int(record.get("seq"))
+            if seq <= snapshot_seq:
+                continue
+            if not apply_op(root, record):
+                logging.warning("Skipped journal record seq=%s op=%s", seq, record.get("op"))
+            last_seq = max(last_seq, seq)
+            replayed += 1
+
+        self._seq = last_seq
+        self._snapshot_seq = snapshot_seq
+        self._pending = replayed
+        if replayed:
+            logging.info("Replayed %d journal records from %s", replayed, self.journal_path)
+        return root
+
+    def save_tree(self, root: Node) -> None:
+        self.wait_for_compaction()
+        self._write_compacted(root, self._seq)
+        with self._journal_lock:
+            self._pending = 0
+
+    def save_changes(self, root: Node, ops: list[TreeOp]) -> None:
+        job, _ = self.prepare_save(root, ops)
+        job()
+
+    def prepare_save(self, root: Node, ops: list[TreeOp]) -> tuple[SaveJob, str | None]:
+        if not ops:
+            return partial(self.save_tree, copy_tree(root)), f"tree:{self.path}"
+        # 木のコピーは呼び出し元スレッドで取り、直列化と書き込みは裏で行う
+        with self._journal_lock:
+            self._pending += len(ops)
+            covered = self._pending
+            compact = covered >= self.compact_threshold and not self._compacting()
+        compact_snapshot = copy_tree(root) if compact else None
+        return partial(self._append, list(ops), compact_snapshot, covered), None
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def _compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _append(self, ops: list[TreeOp], compact_snapshot: Node | None, covered: int) -> None:
+        with self._journal_lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.journal_path.open("a", encoding="utf-8") as handle:
+                for op in ops:
+                    self._seq += 1
+                    handle.write(json.dumps({"seq": self._seq, **op}, ensure_ascii=False) + "\n")
+            seq = self._seq
+        logging.info("Appended %d records to %s", len(ops), self.journal_path)
+        if compact_snapshot is not None:
+            self._start_compaction(compact_snapshot, seq, covered)
+
+    def _start_compaction(self, snapshot: Node, seq: int, covered: int) -> None:
+        def run() -> None:
+            try:
+                self._write_compacted(snapshot, seq)
+            except Exception:
+                logging.exception("Journal compaction failed")
+
+        with self._journal_lock:
+            if self._compacting():
+                # 前の圧縮がまだ走っている: _pending は減らさず、次の編集でまた予約させる
+                logging.info("Journal compaction still running; retrying after the next edit")
+                return
+            # スナップショットに入った分だけ数え直す（その後に予約された編集は残す）
+            self._pending = max(0, self._pending - covered)
+            self._compactor = threading.Thread(target=run, name="journal-compaction", daemon=True)
+            self._compactor.start()
+
+    def _write_compacted(self, root: Node, seq: int) -> None:
+        with self._snapshot_lock:
+            if seq < self._snapshot_seq:
+                return
+            self._write_snapshot(root, {JOURNAL_SEQ_KEY: seq})
+            self._snapshot_seq = seq
+        self._trim_journal(seq)
+
+    def _trim_journal(self, seq: int) -> None:
+        with self._journal_lock:
+            kept = [record for record in self._read_journal() if _as_int(record.get("seq")) > seq]
+            if not kept:
+                self.journal_path.unlink(missing_ok=True)
+                return
+            temp_path = self.journal_path.with_suffix(self.journal_path.suffix + ".tmp")
+            temp_path.write_text(
+                "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in kept), encoding="utf-8"
+            )
+            os.replace(temp_path, self.journal_path)
+
+    def _read_journal(self) -> list[TreeOp]:
+        if not self.journal_path.exists():
+            return []
+        records: list[TreeOp] = []
+        try:
+            lines = self.journal_path.read_text(encoding="utf-8").splitlines()
+        except Exception:
+            logging.exception("Failed reading journal %s", self.journal_path)
+            return []
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 書き込み途中で落ちた末尾行など。以降は信用しない
+                logging.warning("Ignoring damaged journal tail at line %d of %s", line_no, self.journal_path)
+                break
+            if isinstance(record, dict):
+                records.append(record)
+        return records
+
+
+def _as_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
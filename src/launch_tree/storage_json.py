@@ -3,46 +3,276 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import partial
 import json
+from json.decoder import scanstring
+from json.encoder import encode_basestring
 import logging
+import os
 from pathlib import Path
+import re
 import time
 
-from .domain import Node, default_root
+from .domain import Node, copy_tree, default_root
+from .storage_binary import decode_tree, encode_tree, read_source_stat
+from .storage_cache import SourceKey, read_parse_cache, source_key, write_parse_cache
+from .storage_writer import SaveJob
+from .tree_ops import TreeOp
 
 
 USER_STATE_FILE = "user_state.json"
 USER_STATE_PATH: Path | None = None
 MAX_RECENT_ITEMS = 20
+MAX_INDENT_LEVEL = 64
+_NODE_FIELDS = frozenset({"id", "name", "type", "target", "children"})
 
 
 @dataclass
 class JsonStorage:
     path: Path
+    binary_snapshot: bool = False
+    parse_cache: bool = True
 
     @property
     def backup_path(self) -> Path:
         return self.path.with_suffix(self.path.suffix + ".bak")
 
+    @property
+    def binary_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".bin")
+
+    @property
+    def cache_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".cache")
+
     def load_tree(self) -> Node:
+        loaded = self._load_snapshot()
+        if loaded is None:
+            logging.warning("Falling back to default empty root")
+            return default_root()
+        return loaded[0]
+
+    def _load_snapshot(self) -> tuple[Node, dict] | None:
+        """Load binary snapshot (if enabled and fresh), main file, then backup.
+
+        Returns the tree and its raw top-level payload.
+        """
+
+        if self.binary_snapshot:
+            loaded = self._load_binary()
+            if loaded is not None:
+                return loaded
         for candidate in (self.path, self.backup_path):
             try:
                 if candidate.exists():
-                    payload = json.loads(candidate.read_text(encoding="utf-8"))
+                    if candidate == self.path and self.parse_cache:
+                        return self._load_main_cached()
+                    payload = loads_tree_json(candidate.read_text(encoding="utf-8"))
                     node = Node.from_dict(payload)
                     logging.info("Loaded data from %s", candidate)
-                    return node
+                    return node, payload
             except Exception:
                 logging.exception("Failed loading %s", candidate)
-        logging.warning("Falling back to default empty root")
-        return default_root()
+        return None
+
+    def _load_main_cached(self) -> tuple[Node, dict]:
+        data = self.path.read_bytes()
+        key = source_key(data, self.path)
+        cached = read_parse_cache(self.cache_path, key)
+        if cached is not None:
+            logging.info("Loaded data from %s (parse cache)", self.path)
+            return cached
+        payload = loads_tree_json(data.decode("utf-8"))
+        node = Node.from_dict(payload)
+        logging.info("Loaded data from %s", self.path)
+        self._store_parse_cache(key, node, payload)
+        return node, payload
+
+    def _store_parse_cache(self, key: SourceKey, root: Node, payload: dict) -> None:
+        extra = {name: value for name, value in payload.items() if name not in _NODE_FIELDS}
+        try:
+            write_parse_cache(self.cache_path, key, root, extra)
+        except Exception:
+            logging.exception("Failed writing parse cache %s", self.cache_path)
+
+    def _load_binary(self) -> tuple[Node, dict] | None:
+        try:
+            if not self.binary_path.exists() or not self.path.exists():
+                return None
+            data = self.binary_path.read_bytes()
+            if read_source_stat(data) != _stat_key(self.path):
+                # JSON が後から書き換えられている
+                logging.info("Binary snapshot %s is stale; reading JSON", self.binary_path)
+                return None
+            node, extra = decode_tree(data)
+            logging.info("Loaded data from %s", self.binary_path)
+            return node, extra
+        except Exception:
+            logging.exception("Failed loading %s", self.binary_path)
+            return None
 
     def save_tree(self, root: Node) -> None:
+        self._write_snapshot(root)
+
+    def save_changes(self, root: Node, ops: list[TreeOp]) -> None:
+        """Persist edits described by ``ops``. The JSON file is always rewritten as a whole."""
+
+        self.save_tree(root)
+
+    def prepare_save(self, root: Node, ops: list[TreeOp]) -> tuple[SaveJob, str | None]:
+        """Snapshot what saving ``ops`` needs on the calling thread.
+
+        Returns a job that can run on a worker thread and, when later jobs may
+        replace it, the key they share.
+        """
+
+        return partial(self.save_tree, copy_tree(root)), f"tree:{self.path}"
+
+    def _write_snapshot(self, root: Node, extra_fields: dict | None = None) -> None:
+        # 一度だけエンコードし、改行コードを変換せずにそのまま書く（書いたバイト列で鍵を作れる）
+        data = (dumps_tree_json(root, extra_fields) + "\n").encode("utf-8")
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        serialized = json.dumps(root.to_dict(), ensure_ascii=False, indent=2)
-        self.path.write_text(serialized + "\n", encoding="utf-8")
-        self.backup_path.write_text(serialized + "\n", encoding="utf-8")
+        self.path.write_bytes(data)
+        self.backup_path.write_bytes(data)
         logging.info("Saved data to %s and %s", self.path, self.backup_path)
+        if self.parse_cache:
+            self._store_parse_cache(source_key(data, self.path), root, extra_fields or {})
+        if self.binary_snapshot:
+            temp_path = self.binary_path.with_suffix(self.binary_path.suffix + ".tmp")
+            temp_path.write_bytes(encode_tree(root, (len(data), self.path.stat().st_mtime_ns), extra_fields))
+            os.replace(temp_path, self.binary_path)
+
+
+def _stat_key(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def dumps_tree_json(root: Node, extra_fields: dict | None = None) -> str:
+    """Serialize like ``json.dumps(root.to_dict(), ensure_ascii=False, indent=2)`` without recursion.
+
+    Indentation stops growing past ``MAX_INDENT_LEVEL`` so very deep trees stay linear in size.
+    ``extra_fields`` are appended to the top-level object after ``children``.
+    """
+
+    lines: list[str] = []
+    # (node, depth, is_last) で開く / (None, depth, is_last) で閉じる
+    stack: list[tuple[Node | None, int, bool]] = [(root, 0, True)]
+    while stack:
+        node, depth, is_last = stack.pop()
+        pad = "  " * min(depth, MAX_INDENT_LEVEL)
+        inner = "  " * min(depth + 1, MAX_INDENT_LEVEL)
+        if node is None:
+            lines.append(f"{inner}]")
+            lines.append(pad + ("}" if is_last else "},"))
+            continue
+        lines.append(pad + "{")
+        lines.append(f"{inner}\"id\": {encode_basestring(node.id)},")
+        lines.append(f"{inner}\"name\": {encode_basestring(node.name)},")
+        lines.append(f"{inner}\"type\": {encode_basestring(node.type)},")
+        lines.append(f"{inner}\"target\": {encode_basestring(node.target)},")
+        if not node.children:
+            lines.append(f"{inner}\"children\": []")
+            lines.append(pad + ("}" if is_last else "},"))
+            continue
+        lines.append(f"{inner}\"children\": [")
+        stack.append((None, depth, is_last))
+        last = len(node.children) - 1
+        for idx in range(last, -1, -1):
+            stack.append((node.children[idx], depth + 2, idx == last))
+    if extra_fields:
+        lines[-2] += ","
+        extra = [f"  {encode_basestring(key)}: {json.dumps(value, ensure_ascii=False)}" for key, value in extra_fields.items()]
+        lines[-1:-1] = [line + "," for line in extra[:-1]] + extra[-1:]
+    return "\n".join(lines)
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+def loads_tree_json(text: str):
+    """``json.loads`` that falls back to an explicit-stack decoder for deeply nested data."""
+
+    try:
+        return json.loads(text)
+    except RecursionError:
+        logging.info("JSON nesting exceeds recursion limit; using iterative decoder")
+        return _loads_iterative(text)
+
+
+def _loads_iterative(text: str):
+    ws = _WHITESPACE.match
+    pos = ws(text, 0).end()
+    # [container, pending_key] の積み上げ
+    containers: list[list] = []
+
+    def read_key(at: int) -> tuple[str, int]:
+        if text[at:at + 1] != '"':
+            raise ValueError(f"Expecting property name at {at}")
+        key, at = scanstring(text, at + 1)
+        at = ws(text, at).end()
+        if text[at:at + 1] != ":":
+            raise ValueError(f"Expecting ':' at {at}")
+        return key, ws(text, at + 1).end()
+
+    while True:
+        char = text[pos:pos + 1]
+        if char == "{":
+            pos = ws(text, pos + 1).end()
+            if text[pos:pos + 1] == "}":
+                value, pos = {}, pos + 1
+            else:
+                key, pos = read_key(pos)
+                containers.append([{}, key])
+                continue
+        elif char == "[":
+            pos = ws(text, pos + 1).end()
+            if text[pos:pos + 1] == "]":
+                value, pos = [], pos + 1
+            else:
+                containers.append([[], None])
+                continue
+        elif char == '"':
+            value, pos = scanstring(text, pos + 1)
+        else:
+            for literal, literal_value in _LITERALS.items():
+                if text.startswith(literal, pos):
+                    value, pos = literal_value, pos + len(literal)
+                    break
+            else:
+                match = _NUMBER.match(text, pos)
+                if match is None:
+                    raise ValueError(f"Expecting value at {pos}")
+                number = match.group()
+                value = float(number) if match.group(1) or match.group(2) else int(number)
+                pos = match.end()
+
+        # 値が確定したので、閉じられる限りコンテナへ格納していく
+        while True:
+            pos = ws(text, pos).end()
+            if not containers:
+                if pos != len(text):
+                    raise ValueError(f"Extra data at {pos}")
+                return value
+            entry = containers[-1]
+            container = entry[0]
+            if isinstance(container, dict):
+                container[entry[1]] = value
+            else:
+                container.append(value)
+            char = text[pos:pos + 1]
+            if char == ",":
+                pos = ws(text, pos + 1).end()
+                if isinstance(container, dict):
+                    entry[1], pos = read_key(pos)
+                break
+            if char == ("}" if isinstance(container, dict) else "]"):
+                containers.pop()
+                value, pos = container, pos + 1
+                continue
+            raise ValueError(f"Expecting ',' delimiter at {pos}")
 
 
 def set_user_state_path(path: Path) -> None:
@@ -109,6 +339,13 @@ def _normalize_user_state(payload: dict | None) -> dict:
         mode = str(ui_raw.get("view_mode") or "all")
         if mode in {"all", "favorites", "recent"}:
             state["ui"]["view_mode"] = mode
+        # ツリーの展開状態と選択（node id で保持）
+        expanded_raw = ui_raw.get("expanded")
+        if isinstance(expanded_raw, list):
+            state["ui"]["expanded"] = sorted({str(node_id) for node_id in expanded_raw if node_id})
+        selected = ui_raw.get("selected")
+        if isinstance(selected, str) and selected:
+            state["ui"]["selected"] = selected
     return state
 
 
@@ -123,8 +360,8 @@ def load_user_state() -> dict:
     return _default_user_state()
 
 
-def save_user_state(state: dict) -> None:
-    path = _state_path()
+def save_user_state(state: dict, path: Path | None = None) -> None:
+    path = path or _state_path()
     path.parent.mkdir(parents=True, exist_ok=True)
     normalized = _normalize_user_state(state)
     serialized = json.dumps(normalized, ensure_ascii=False, indent=2)
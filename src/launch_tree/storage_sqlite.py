@@ -0,0 +1,198 @@
+"""SQLite storage: one row per node, edits touch only the affected rows."""
+
+from __future__ import annotations
+
+from contextlib import closing
+from dataclasses import dataclass
+from functools import partial
+import logging
+from pathlib import Path
+import sqlite3
+import sys
+
+from .domain import Node, copy_tree, default_root
+from .storage_json import JsonStorage
+from .storage_writer import SaveJob
+from .tree_ops import TreeOp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_parent_position ON nodes(parent_id, position);
+"""
+
+_SUBTREE_IDS = """
+WITH RECURSIVE subtree(id) AS (
+    SELECT ?
+    UNION ALL
+    SELECT nodes.id FROM nodes JOIN subtree ON nodes.parent_id = subtree.id
+)
+SELECT id FROM subtree
+"""
+
+
+@dataclass
+class SqliteStorage:
+    """Same ``load_tree``/``save_tree``/``save_changes`` contract as ``JsonStorage``.
+
+    ``json_path`` is the launcher.json to migrate from when the database is empty,
+    and the fallback when the database cannot be read.
+    """
+
+    path: Path
+    json_path: Path | None = None
+
+    def load_tree(self) -> Node:
+        try:
+            root = self._read_tree()
+            if root is not None:
+                logging.info("Loaded data from %s", self.path)
+                return root
+        except sqlite3.DatabaseError:
+            logging.exception("Failed loading %s", self.path)
+            return self._load_json_fallback()
+
+        if self.json_path is not None:
+            return self.migrate_from_json(self.json_path)
+        logging.warning("Falling back to default empty root")
+        return default_root()
+
+    def migrate_from_json(self, json_path: Path) -> Node:
+        root = JsonStorage(json_path).load_tree()
+        self.save_tree(root)
+        logging.info("Migrated %s into %s", json_path, self.path)
+        return root
+
+    def save_tree(self, root: Node) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM nodes")
+            conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)", _rows(root, None, 0))
+        logging.info("Saved data to %s", self.path)
+
+    def save_changes(self, root: Node, ops: list[TreeOp]) -> None:
+        """Apply ``ops`` in a single transaction; ``root`` is not read."""
+
+        if not ops:
+            self.save_tree(root)
+            return
+        self._apply_all(ops)
+
+    def prepare_save(self, root: Node, ops: list[TreeOp]) -> tuple[SaveJob, str | None]:
+        if not ops:
+            return partial(self.save_tree, copy_tree(root)), f"tree:{self.path}"
+        return partial(self._apply_all, list(ops)), None
+
+    def _apply_all(self, ops: list[TreeOp]) -> None:
+        with closing(self._connect()) as conn, conn:
+            for op in ops:
+                self._apply(conn, op)
+        logging.info("Applied %d changes to %s", len(ops), self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _read_tree(self) -> Node | None:
+        if not self.path.exists():
+            return None
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, parent_id, name, type, target FROM nodes ORDER BY parent_id, position"
+            ).fetchall()
+        if not rows:
+            return None
+
+        nodes: dict[str, Node] = {}
+        for node_id, _, name, node_type, target in rows:
+            nodes[node_id] = Node(id=node_id, name=name, type=sys.intern(node_type), target=target, children=[])
+        root: Node | None = None
+        for node_id, parent_id, *_ in rows:
+            if parent_id is None:
+                if root is None:
+                    root = nodes[node_id]
+                continue
+            parent = nodes.get(parent_id)
+            if parent is not None:
+                parent.children.append(nodes[node_id])
+        if root is None:
+            raise sqlite3.DatabaseError("no root row")
+        return root
+
+    def _load_json_fallback(self) -> Node:
+        if self.json_path is not None:
+            return JsonStorage(self.json_path).load_tree()
+        logging.warning("Falling back to default empty root")
+        return default_root()
+
+    def _apply(self, conn: sqlite3.Connection, op: TreeOp) -> None:
+        kind = op.get("op")
+        if kind == "insert":
+            parent_id = str(op.get("parent"))
+            row = int(op.get("row", 0))
+            node = Node.from_dict(op["node"])
+            _shift(conn, parent_id, row, +1)
+            conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)", _rows(node, parent_id, row))
+        elif kind == "move":
+            self._move(conn, str(op.get("id")), str(op.get("parent")), int(op.get("row", 0)))
+        elif kind == "update":
+            conn.execute(
+                "UPDATE nodes SET name = ?, type = ?, target = ? WHERE id = ?",
+                (op.get("name"), op.get("type"), op.get("target") or "", op.get("id")),
+            )
+        elif kind == "delete":
+            location = _location(conn, str(op.get("id")))
+            if location is None:
+                return
+            subtree = [row[0] for row in conn.execute(_SUBTREE_IDS, (op.get("id"),))]
+            conn.executemany("DELETE FROM nodes WHERE id = ?", ((node_id,) for node_id in subtree))
+            _shift(conn, location[0], location[1] + 1, -1)
+        else:
+            logging.warning("Unknown tree operation: %s", kind)
+
+    def _move(self, conn: sqlite3.Connection, node_id: str, parent_id: str, row: int) -> None:
+        # domain.move_node と同じ行番号の補正を行う
+        location = _location(conn, node_id)
+        if location is None:
+            return
+        src_parent_id, src_position = location
+        _shift(conn, src_parent_id, src_position + 1, -1)
+        if src_parent_id == parent_id and row > src_position:
+            row -= 1
+        (count,) = conn.execute(
+            "SELECT COUNT(*) FROM nodes WHERE parent_id = ? AND id != ?", (parent_id, node_id)
+        ).fetchone()
+        bounded_row = max(0, min(row, count))
+        _shift(conn, parent_id, bounded_row, +1, exclude_id=node_id)
+        conn.execute("UPDATE nodes SET parent_id = ?, position = ? WHERE id = ?", (parent_id, bounded_row, node_id))
+
+
+def _location(conn: sqlite3.Connection, node_id: str) -> tuple[str, int] | None:
+    row = conn.execute("SELECT parent_id, position FROM nodes WHERE id = ?", (node_id,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return row[0], row[1]
+
+
+def _shift(conn: sqlite3.Connection, parent_id: str, start: int, delta: int, exclude_id: str | None = None) -> None:
+    conn.execute(
+        "UPDATE nodes SET position = position + ? WHERE parent_id = ? AND position >= ? AND id IS NOT ?",
+        (delta, parent_id, start, exclude_id),
+    )
+
+
+def _rows(root: Node, parent_id: str | None, position: int):
+    stack: list[tuple[Node, str | None, int]] = [(root, parent_id, position)]
+    while stack:
+        node, node_parent_id, node_position = stack.pop()
+        yield node.id, node_parent_id, node_position, node.name, node.type, node.target
+        stack.extend((child, node.id, idx) for idx, child in enumerate(node.children))
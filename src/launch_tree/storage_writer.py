@@ -0,0 +1,95 @@
+"""Background save writer that keeps file I/O off the UI thread."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import itertools
+import logging
+import threading
+import time
+
+SaveJob = Callable[[], None]
+
+
+class BackgroundWriter:
+    """Runs save jobs in submission order on a single worker thread.
+
+    A job submitted with a ``key`` replaces any not-yet-started job with the same key,
+    so a burst of full-tree saves collapses into one write of the latest snapshot.
+    Jobs without a key (e.g. journal records) are never dropped. Jobs must not touch
+    live UI state; callers snapshot what they need before submitting.
+    """
+
+    def __init__(self, on_error: Callable[[Exception], None] | None = None, delay: float = 0.05):
+        self.on_error = on_error
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._pending: OrderedDict[Hashable, tuple[float, SaveJob]] = OrderedDict()
+        self._sequence = itertools.count()
+        self._busy = False
+        self._flushing = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: SaveJob, key: Hashable | None = None) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            if key is None:
+                key = ("job", next(self._sequence))
+            else:
+                self._pending.pop(key, None)
+            self._pending[key] = (time.monotonic(), job)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Run everything pending now and wait for it. Returns False on timeout."""
+
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: float | None = None) -> bool:
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return flushed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending:
+                        submitted_at, _ = next(iter(self._pending.values()))
+                        # 連続した保存をまとめるため、少しだけ待ってから書く
+                        remaining = submitted_at + self.delay - time.monotonic()
+                        if remaining <= 0 or self._flushing or self._closed:
+                            break
+                        self._cond.wait(remaining)
+                    elif self._closed:
+                        return
+                    else:
+                        self._cond.wait()
+                _, (_, job) = self._pending.popitem(last=False)
+                self._busy = True
+            try:
+                job()
+            except Exception as exc:
+                logging.exception("Background save failed")
+                if self.on_error is not None:
+                    try:
+                        self.on_error(exc)
+                    except Exception:
+                        logging.exception("Save error handler failed")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,61 @@
+"""Operation records describing single tree edits.
+
+Records are plain JSON-compatible dicts so storages can journal them as-is.
+``apply_op`` replays a record through the same domain helpers the UI uses.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from typing import Any
+
+from .domain import Node, find_node_ref, insert_node, move_node, remove_node
+
+TreeOp = dict[str, Any]
+
+
+def insert_op(root: Node, node: Node) -> TreeOp:
+    """Record for ``node`` after it has been inserted into ``root``."""
+
+    ref = find_node_ref(root, node.id)
+    if ref is None or ref.parent is None:
+        raise ValueError(f"node is not attached to the tree: {node.id}")
+    return {"op": "insert", "parent": ref.parent.id, "row": ref.index, "node": node.to_dict()}
+
+
+def move_op(node_id: str, parent_id: str, row: int) -> TreeOp:
+    """Record for a ``move_node`` call; arguments are stored exactly as passed."""
+
+    return {"op": "move", "id": node_id, "parent": parent_id, "row": row}
+
+
+def update_op(node: Node) -> TreeOp:
+    return {"op": "update", "id": node.id, "name": node.name, "type": node.type, "target": node.target}
+
+
+def delete_op(node_id: str) -> TreeOp:
+    return {"op": "delete", "id": node_id}
+
+
+def apply_op(root: Node, op: TreeOp) -> bool:
+    kind = op.get("op")
+    if kind == "insert":
+        node_raw = op.get("node")
+        if not isinstance(node_raw, dict):
+            return False
+        return insert_node(root, str(op.get("parent")), int(op.get("row", 0)), Node.from_dict(node_raw))
+    if kind == "move":
+        return move_node(root, str(op.get("id")), str(op.get("parent")), int(op.get("row", 0)))
+    if kind == "update":
+        ref = find_node_ref(root, str(op.get("id")))
+        if ref is None:
+            return False
+        ref.node.name = str(op.get("name") or ref.node.name)
+        ref.node.type = sys.intern(str(op.get("type") or ref.node.type))
+        ref.node.target = str(op.get("target") or "")
+        return True
+    if kind == "delete":
+        return remove_node(root, str(op.get("id"))) is not None
+    logging.warning("Unknown tree operation: %s", kind)
+    return False
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import copy
 import logging
 import os
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 
-from PyQt6.QtCore import QModelIndex, QPoint, Qt, QUrl, pyqtSignal
+from PyQt6.QtCore import QModelIndex, QPoint, Qt, QTimer, QUrl, pyqtSignal
 from PyQt6.QtGui import (
     QDesktopServices,
     QDragEnterEvent,
@@ -37,17 +39,25 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from .domain import Node, find_node_ref, insert_relative_to_selection, move_node
+from .domain import Node, insert_node, insert_relative_to_selection, move_node, remove_node, tree_index
 from .drop_import_logic import build_drop_entries
 from .edit_logic import ALLOWED_NODE_TYPES, apply_node_update
+from .icon_cache import IconDiskCache
 from .model_filter import TreeFilterProxyModel
-from .model_qt import LauncherTreeModel, NODE_ROLE, VirtualNode
+from .model_qt import IconResolver, LauncherTreeModel, VirtualNode
+from .quick_launch_logic import QuickLaunchIndex, recent_ids_from_state
+from .search_index import SearchIndex
+from .search_worker import SearchWorker
 from .storage_json import JsonStorage, load_user_state, save_user_state, set_user_state_path, update_recent
+from .storage_sqlite import SqliteStorage
+from .storage_writer import BackgroundWriter
+from .tree_ops import TreeOp, delete_op, insert_op, move_op, update_op
+
+SEARCH_DEBOUNCE_MS = 150
 
 
 @dataclass
 class TreeViewState:
-    expanded_ids: set[str]
     selected_id: str | None
     scroll_value: int
 
@@ -152,15 +162,28 @@ class WindowHeader(QWidget):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, storage: JsonStorage):
+    save_failed = pyqtSignal(str)
+    search_finished = pyqtSignal(int, str, object)
+
+    def __init__(self, storage: JsonStorage | SqliteStorage):
         super().__init__()
         self.storage = storage
         self.root = self.storage.load_tree()
-        set_user_state_path(self.storage.path.parent / "user_state.json")
+        self.user_state_path = self.storage.path.parent / "user_state.json"
+        set_user_state_path(self.user_state_path)
         self.user_state = load_user_state()
+        self.save_failed.connect(self.on_save_failed)
+        # 保存はワーカースレッドで行い、失敗はシグナル経由で UI スレッドへ戻す
+        self.save_writer = BackgroundWriter(on_error=lambda exc: self.save_failed.emit(str(exc)))
         self.view_mode = str(self.user_state.get("ui", {}).get("view_mode") or "all")
         if self.view_mode not in {"all", "favorites", "recent"}:
             self.view_mode = "all"
+        # 展開中の行と選択行は node id で持ち、ビューの expanded/collapsed/currentChanged で更新する
+        ui_state = self.user_state.get("ui", {})
+        self.expanded_ids: set[str] = set(ui_state.get("expanded") or [])
+        self.selected_id: str | None = ui_state.get("selected")
+        # 編集後の再検索の結果が届いたら選ぶ行（新しい行は結果が出るまで表示されない）
+        self._select_after_search: str | None = None
 
         self.setWindowTitle("Launch Tree")
         self.resize(1000, 650)
@@ -179,6 +202,13 @@ class MainWindow(QMainWindow):
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Search by name / target / type...")
         self.search_box.textChanged.connect(self.on_search_changed)
+        # Enter で最上位の候補を起動する
+        self.search_box.returnPressed.connect(self.launch_top_result)
+        # 入力が落ち着いてから検索をワーカースレッドで実行する
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self._start_search)
         QShortcut(QKeySequence("Esc"), self.search_box, activated=self.search_box.clear)
 
         self.view_mode_combo = QComboBox()
@@ -269,11 +299,24 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(splitter)
         self.setCentralWidget(central)
 
-        self.source_model = LauncherTreeModel(self.root, self.user_state, self.view_mode)
-        self.proxy_model = TreeFilterProxyModel(self.root)
+        icon_cache = IconDiskCache(self.storage.path.parent / "icon_cache.bin")
+        self.source_model = LauncherTreeModel(
+            self.root, self.user_state, self.view_mode, icon_resolver=IconResolver(disk_cache=icon_cache)
+        )
+        self.search_index = SearchIndex(self.root)
+        self.quick_launch = QuickLaunchIndex(self.root)
+        self.search_worker = SearchWorker(
+            self.search_index, lambda generation, query, visible: self.search_finished.emit(generation, query, visible)
+        )
+        self.search_finished.connect(self.on_search_finished)
+        self.proxy_model = TreeFilterProxyModel(self.root, self.search_index)
         self.proxy_model.setSourceModel(self.source_model)
         self.tree.setModel(self.proxy_model)
         self.tree.selectionModel().selectionChanged.connect(self.update_detail)
+        self.tree.selectionModel().currentChanged.connect(self.on_tree_current_changed)
+        self.tree.expanded.connect(self.on_tree_expanded)
+        self.tree.collapsed.connect(self.on_tree_collapsed)
+        self._restore_tree_state(TreeViewState(selected_id=self.selected_id, scroll_value=0))
 
         self.update_detail()
 
@@ -295,19 +338,60 @@ class MainWindow(QMainWindow):
         *,
         expand: bool = False,
         preserve_state: bool = True,
-        preferred_selected_id: str | None = None,
     ) -> None:
         state = self._capture_tree_state() if preserve_state else None
+        self._cancel_pending_search()
         self.source_model.set_view_state(self.user_state, self.view_mode)
         self.source_model.rebuild()
         self.proxy_model.set_query(self.search_box.text())
-        if expand:
+        if expand or self.proxy_model.query.strip():
             self.tree.expandAll()
         if state is not None:
-            self._restore_tree_state(state, preferred_selected_id=preferred_selected_id)
+            self._restore_tree_state(state)
+
+    def _refresh_sections(self, *virtual_ids: str) -> None:
+        """Favorites/Recent changed: update only those sections, keeping the rest of the view."""
+
+        self.source_model.set_view_state(self.user_state, self.view_mode)
+        self.source_model.refresh_sections(*virtual_ids)
+        # 検索中でも絞り込み直すのはその見出し行だけ（各行の表示は visible_ids のまま正しい）
+        self.proxy_model.refresh_sections(*virtual_ids)
+
+    def _reapply_search(self) -> None:
+        # 検索中は編集後の木で絞り込み直す。計算はワーカーで行い、結果が届くまでは今の行を出しておく
+        text = self.search_box.text()
+        if text.strip():
+            self._cancel_pending_search()
+            self._start_search()
+        elif self.proxy_model.query:
+            self._cancel_pending_search()
+            self.proxy_model.set_query(text)
+
+    def _select_node_id(self, node_id: str) -> bool:
+        index = self._proxy_index_for_id(node_id)
+        if index.isValid():
+            self.tree.setCurrentIndex(index)
+        return index.isValid()
+
+    def _proxy_index_for_id(self, node_id: str) -> QModelIndex:
+        return self.proxy_model.mapFromSource(self.source_model.index_for_node(node_id))
 
     def _save_user_state(self) -> None:
-        save_user_state(self.user_state)
+        snapshot = copy.deepcopy(self.user_state)
+        self.save_writer.submit(partial(save_user_state, snapshot, self.user_state_path), key="user_state")
+
+    def on_save_failed(self, message: str) -> None:
+        QMessageBox.warning(self, "Save failed", f"保存に失敗しました。\n{message}")
+
+    def closeEvent(self, event):
+        self.search_timer.stop()
+        self.search_worker.close(timeout=1)
+        self.source_model.icon_resolver.close(timeout=1)
+        self._store_view_state()
+        self._save_user_state()
+        if not self.save_writer.close(timeout=10):
+            logging.error("Pending saves did not finish before exit")
+        super().closeEvent(event)
 
     def on_view_mode_changed(self) -> None:
         selected_mode = str(self.view_mode_combo.currentData() or "all")
@@ -324,28 +408,47 @@ class MainWindow(QMainWindow):
         self.update_detail()
 
     def on_search_changed(self, text: str) -> None:
-        self.proxy_model.set_query(text)
         if text.strip():
-            self.expand_search_matches()
-        else:
-            self.tree.collapseAll()
+            self.search_timer.start()
+            return
+        # クリアは即時に反映する
+        self._cancel_pending_search()
+        self.proxy_model.set_query(text)
+        # 検索で開いた行を閉じ、検索前に展開していた行へ戻す
+        self.tree.collapseAll()
+        self._restore_expanded()
+
+    def _start_search(self) -> None:
+        self.search_worker.submit(self.search_box.text())
+
+    def _cancel_pending_search(self) -> None:
+        self.search_timer.stop()
+        self.search_worker.cancel()
+        self._select_after_search = None
+
+    def on_search_finished(self, generation: int, query: str, visible_ids: set[str]) -> None:
+        if not self.search_worker.is_current(generation) or query != self.search_box.text():
+            return
+        self.proxy_model.set_visible_ids(query, visible_ids)
+        self.expand_search_matches()
+        if self._select_after_search is not None:
+            self._select_node_id(self._select_after_search)
+            self._select_after_search = None
 
     def expand_all_nodes(self) -> None:
         self.tree.expandAll()
+        # expandAll/collapseAll は行ごとの expanded/collapsed を出さないので、ここで記録を揃える
+        if not self.proxy_model.query.strip():
+            self.expanded_ids = self._expandable_ids()
 
     def collapse_all_nodes(self) -> None:
         self.tree.collapseAll()
+        if not self.proxy_model.query.strip():
+            self.expanded_ids.clear()
 
     def expand_search_matches(self) -> None:
-        def visit(parent_index):
-            row_count = self.proxy_model.rowCount(parent_index)
-            for row in range(row_count):
-                idx = self.proxy_model.index(row, 0, parent_index)
-                if self.proxy_model.rowCount(idx) > 0:
-                    self.tree.expand(idx)
-                    visit(idx)
-
-        visit(QModelIndex())
+        # 表示中の行をすべて展開する（Python から proxy を辿るより速い）
+        self.tree.expandAll()
 
     def map_to_source(self, index):
         if not index.isValid():
@@ -355,10 +458,7 @@ class MainWindow(QMainWindow):
     def _node_id_from_source_index(self, source_index) -> str | None:
         if not source_index.isValid():
             return None
-        item = self.source_model.itemFromIndex(source_index)
-        if item is None:
-            return None
-        node = item.data(NODE_ROLE)
+        node = self.source_model.node_at(source_index)
         if isinstance(node, (Node, VirtualNode)):
             return node.id
         return None
@@ -367,74 +467,88 @@ class MainWindow(QMainWindow):
         source_index = self.map_to_source(proxy_index)
         return self._node_id_from_source_index(source_index)
 
-    def _collect_proxy_node_indexes(self) -> dict[str, QModelIndex]:
-        indexes: dict[str, QModelIndex] = {}
+    def on_tree_expanded(self, proxy_index) -> None:
+        node_id = self._tracked_id(proxy_index)
+        if node_id is not None:
+            self.expanded_ids.add(node_id)
 
-        def visit(parent_index: QModelIndex) -> None:
-            row_count = self.proxy_model.rowCount(parent_index)
-            for row in range(row_count):
-                idx = self.proxy_model.index(row, 0, parent_index)
-                node_id = self._node_id_from_proxy_index(idx)
-                if node_id is not None:
-                    indexes[node_id] = idx
-                visit(idx)
+    def on_tree_collapsed(self, proxy_index) -> None:
+        node_id = self._tracked_id(proxy_index)
+        if node_id is not None:
+            self.expanded_ids.discard(node_id)
 
-        visit(QModelIndex())
-        return indexes
+    def on_tree_current_changed(self, current, _previous) -> None:
+        node_id = self._node_id_from_proxy_index(current)
+        if node_id is not None:
+            self.selected_id = node_id
 
-    def _capture_tree_state(self) -> TreeViewState:
-        expanded_ids: set[str] = set()
-
-        def visit(parent_index: QModelIndex) -> None:
-            row_count = self.proxy_model.rowCount(parent_index)
-            for row in range(row_count):
-                idx = self.proxy_model.index(row, 0, parent_index)
-                if self.tree.isExpanded(idx):
-                    node_id = self._node_id_from_proxy_index(idx)
-                    if node_id is not None:
-                        expanded_ids.add(node_id)
-                visit(idx)
-
-        visit(QModelIndex())
-        selected_id = self._node_id_from_proxy_index(self.tree.currentIndex())
-        scroll_value = self.tree.verticalScrollBar().value()
-        return TreeViewState(expanded_ids=expanded_ids, selected_id=selected_id, scroll_value=scroll_value)
-
-    def _restore_tree_state(self, state: TreeViewState, preferred_selected_id: str | None = None) -> None:
-        id_to_index = self._collect_proxy_node_indexes()
-
-        def depth(index: QModelIndex) -> int:
-            level = 0
-            current = index.parent()
-            while current.isValid():
-                level += 1
-                current = current.parent()
-            return level
-
-        for node_id in sorted(state.expanded_ids, key=lambda value: depth(id_to_index.get(value, QModelIndex()))):
-            idx = id_to_index.get(node_id)
-            if idx is not None and idx.isValid():
-                self.tree.expand(idx)
-
-        selected_id = preferred_selected_id or state.selected_id
-        if selected_id is not None:
-            idx = id_to_index.get(selected_id)
-            if idx is not None and idx.isValid():
-                self.tree.setCurrentIndex(idx)
+    def _tracked_id(self, proxy_index) -> str | None:
+        """Id to record an expand/collapse of ``proxy_index`` under; None when it is not recorded.
+
+        Rows inside Favorites/Recent share their id with the main tree, and rows
+        opened while searching only show the matches, so neither is recorded.
+        """
+
+        if self.proxy_model.query.strip():
+            return None
+        top = proxy_index
+        while top.parent().isValid():
+            top = top.parent()
+        if top != proxy_index and isinstance(self.source_model.node_at(self.map_to_source(top)), VirtualNode):
+            return None
+        return self._node_id_from_proxy_index(proxy_index)
+
+    def _expandable_ids(self) -> set[str]:
+        ids = {"virtual:favorites", "virtual:recent"}
+        stack = list(self.root.children)
+        while stack:
+            node = stack.pop()
+            if node.children:
+                ids.add(node.id)
+                stack.extend(node.children)
+        return ids
 
+    def _capture_tree_state(self) -> TreeViewState:
+        return TreeViewState(selected_id=self.selected_id, scroll_value=self.tree.verticalScrollBar().value())
+
+    def _restore_tree_state(self, state: TreeViewState) -> None:
+        self._restore_expanded()
+        if state.selected_id is not None:
+            index = self._proxy_index_for_id(state.selected_id)
+            if index.isValid():
+                self.tree.setCurrentIndex(index)
         self.tree.verticalScrollBar().setValue(state.scroll_value)
 
-    def current_item_and_node(self):
+    def _restore_expanded(self) -> None:
+        """Expand the recorded rows; only their ids are looked up, not every row of the view."""
+
+        for node_id in list(self.expanded_ids):
+            index = self._proxy_index_for_id(node_id)
+            if index.isValid():
+                self.tree.expand(index)
+
+    def _store_view_state(self) -> None:
+        ui_state = self.user_state.setdefault("ui", {})
+        if not isinstance(ui_state, dict):
+            ui_state = self.user_state["ui"] = {"view_mode": self.view_mode}
+        # 削除済みのノードは持ち越さない
+        known = tree_index(self.root)
+        ui_state["expanded"] = sorted(
+            node_id for node_id in self.expanded_ids if node_id.startswith("virtual:") or known.get(node_id) is not None
+        )
+        if self.selected_id is not None and known.get(self.selected_id) is not None:
+            ui_state["selected"] = self.selected_id
+        else:
+            ui_state.pop("selected", None)
+
+    def current_index_and_node(self):
         proxy_index = self.tree.currentIndex()
         if not proxy_index.isValid():
             return None, None
         source_index = self.map_to_source(proxy_index)
         if not source_index.isValid():
             return None, None
-        item = self.source_model.itemFromIndex(source_index)
-        if item is None:
-            return None, None
-        return item, item.data(NODE_ROLE)
+        return source_index, self.source_model.node_at(source_index)
 
     def _resolve_real_node(self, node) -> Node | None:
         if isinstance(node, Node):
@@ -442,12 +556,12 @@ class MainWindow(QMainWindow):
         return None
 
     def current_selected_id(self) -> str | None:
-        _, node = self.current_item_and_node()
+        _, node = self.current_index_and_node()
         resolved = self._resolve_real_node(node)
         return resolved.id if isinstance(resolved, Node) else None
 
     def edit_detail_field(self, field_name: str) -> None:
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if node is None:
             return
@@ -516,19 +630,24 @@ class MainWindow(QMainWindow):
         new_type: str | None = None,
         new_target: str | None = None,
     ) -> bool:
-        ok, error = apply_node_update(node, new_name=new_name, new_type=new_type, new_target=new_target)
+        ok, error = apply_node_update(
+            node,
+            new_name=new_name,
+            new_type=new_type,
+            new_target=new_target,
+            on_target_change=self.source_model.icon_resolver.invalidate_targets,
+        )
         if not ok:
             QMessageBox.warning(self, "Validation Error", error or "Invalid input")
             return False
 
-        self._refresh_tree_model()
-        self.persist()
+        self.commit_changes(update_op(node))
         logging.info("Updated node id=%s name=%s type=%s target=%s", node.id, node.name, node.type, node.target)
         self.update_detail()
         return True
 
     def update_detail(self, *_):
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if node is None:
             self.name_value.setText("-")
@@ -567,7 +686,7 @@ class MainWindow(QMainWindow):
         return isinstance(node, Node) and node.type in {"path", "url"} and bool(node.target.strip())
 
     def toggle_current_favorite(self) -> None:
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if node is None or node.type not in {"path", "url"}:
             return
@@ -583,7 +702,7 @@ class MainWindow(QMainWindow):
             favorites.pop(node.id, None)
 
         self._save_user_state()
-        self._refresh_tree_model()
+        self._refresh_sections("virtual:favorites")
         self.update_detail()
 
     def _record_recent(self, node_id: str) -> None:
@@ -592,11 +711,15 @@ class MainWindow(QMainWindow):
 
     def on_tree_double_clicked(self, proxy_index):
         source_index = self.map_to_source(proxy_index)
-        item = self.source_model.itemFromIndex(source_index)
-        node = self._resolve_real_node(item.data(NODE_ROLE) if item is not None else None)
+        node = self._resolve_real_node(self.source_model.node_at(source_index))
         if self.can_launch_node(node):
             self.safe_call(self.launch_node, node)
 
+    def launch_top_result(self) -> None:
+        ranked = self.quick_launch.search(self.search_box.text(), recent_ids_from_state(self.user_state), limit=1)
+        if ranked:
+            self.safe_call(self.launch_node, ranked[0].node)
+
     def show_context_menu(self, pos: QPoint):
         self.safe_call(self._show_context_menu, pos)
 
@@ -605,7 +728,7 @@ class MainWindow(QMainWindow):
         if click_proxy_index.isValid():
             self.tree.setCurrentIndex(click_proxy_index)
 
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         launchable = self.can_launch_node(node)
 
@@ -649,8 +772,7 @@ class MainWindow(QMainWindow):
         inserted = insert_relative_to_selection(self.root, self.current_selected_id(), node)
         if not inserted:
             return False
-        self._refresh_tree_model(preferred_selected_id=node.id)
-        self.persist()
+        self.commit_changes(insert_op(self.root, node), preferred_selected_id=node.id)
         return True
 
     def create_and_insert_item(self, item_type: str, target: str, name: str) -> bool:
@@ -700,8 +822,7 @@ class MainWindow(QMainWindow):
     def _node_from_source_index(self, source_index) -> Node | None:
         if not source_index.isValid():
             return None
-        item = self.source_model.itemFromIndex(source_index)
-        node = item.data(NODE_ROLE) if item is not None else None
+        node = self.source_model.node_at(source_index)
         return node if isinstance(node, Node) else None
 
     def _parent_node_and_row_for_drop(self, source_target_index, indicator) -> tuple[Node, int]:
@@ -709,23 +830,19 @@ class MainWindow(QMainWindow):
             return self.root, len(self.root.children)
 
         target_node = self._node_from_source_index(source_target_index)
-        target_item = self.source_model.itemFromIndex(source_target_index)
-        if target_node is None or target_item is None:
+        if target_node is None:
             return self.root, len(self.root.children)
 
+        parent_index = source_target_index.parent()
+        parent_node = self.source_model.node_at(parent_index) if parent_index.isValid() else self.root
+        parent_node = parent_node if isinstance(parent_node, Node) else self.root
+
         if indicator == QAbstractItemView.DropIndicatorPosition.OnItem:
             if target_node.type == "group":
                 return target_node, len(target_node.children)
-            parent_item = target_item.parent()
-            parent_node = self.root if parent_item is None else parent_item.data(NODE_ROLE)
-            parent_node = parent_node if isinstance(parent_node, Node) else self.root
-            return parent_node, target_item.row() + 1
+            return parent_node, source_target_index.row() + 1
 
-        parent_item = target_item.parent()
-        parent_node = self.root if parent_item is None else parent_item.data(NODE_ROLE)
-        parent_node = parent_node if isinstance(parent_node, Node) else self.root
-
-        row = target_item.row()
+        row = source_target_index.row()
         if indicator == QAbstractItemView.DropIndicatorPosition.BelowItem:
             row += 1
         return parent_node, row
@@ -745,12 +862,13 @@ class MainWindow(QMainWindow):
         if dest_parent is not self.root and dest_parent.type != "group":
             return False
 
+        ops: list[TreeOp] = []
         for offset, entry in enumerate(entries):
             node = Node.make(name=entry.name, node_type=entry.item_type, target=entry.target)
-            dest_parent.children.insert(dest_row + offset, node)
+            insert_node(self.root, dest_parent.id, dest_row + offset, node)
+            ops.append(insert_op(self.root, node))
 
-        self._refresh_tree_model()
-        self.persist()
+        self.commit_changes(*ops)
         logging.info("Imported %d external drop entries", len(entries))
         return True
 
@@ -780,18 +898,17 @@ class MainWindow(QMainWindow):
             logging.info("Rejected drag/drop move source=%s dest_parent=%s", source_node.id, dest_parent.id)
             return False
 
-        self._refresh_tree_model()
-        self.persist()
+        self.commit_changes(move_op(source_node.id, dest_parent.id, dest_row))
         return True
 
     def launch_current(self):
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if self.can_launch_node(node):
             self.launch_node(node)
 
     def copy_current_target(self):
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if not self.can_launch_node(node):
             return
@@ -802,7 +919,8 @@ class MainWindow(QMainWindow):
     def launch_node(self, node: Node):
         self._record_recent(node.id)
         if self.view_mode in {"all", "recent"}:
-            self._refresh_tree_model()
+            # 起動の記録で変わるのは Recent の並びだけ
+            self._refresh_sections("virtual:recent")
         if node.type == "path":
             self._launch_path(node)
         elif node.type == "url":
@@ -842,7 +960,7 @@ class MainWindow(QMainWindow):
         self._insert_new_node(Node.make(name=name.strip(), node_type="group"))
 
     def rename_node(self):
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if node is None:
             return
@@ -850,11 +968,10 @@ class MainWindow(QMainWindow):
         if not ok or not name.strip():
             return
         node.name = name.strip()
-        self._refresh_tree_model()
-        self.persist()
+        self.commit_changes(update_op(node))
 
     def delete_node(self):
-        _, selected = self.current_item_and_node()
+        _, selected = self.current_index_and_node()
         node = self._resolve_real_node(selected)
         if node is None:
             return
@@ -868,13 +985,27 @@ class MainWindow(QMainWindow):
         if result != QMessageBox.StandardButton.Yes:
             return
 
-        node_ref = find_node_ref(self.root, node.id)
-        if node_ref is None or node_ref.parent is None:
+        removed = remove_node(self.root, node.id)
+        if removed is None or removed.parent is None:
             return
-        fallback_selected_id = node_ref.parent.id
-        node_ref.parent.children = [child for child in node_ref.parent.children if child.id != node.id]
-        self._refresh_tree_model(preferred_selected_id=fallback_selected_id)
-        self.persist()
-
-    def persist(self):
-        self.storage.save_tree(self.root)
+        fallback_selected_id = removed.parent.id
+        self.commit_changes(delete_op(node.id), preferred_selected_id=fallback_selected_id)
+
+    def commit_changes(self, *ops: TreeOp, preferred_selected_id: str | None = None) -> None:
+        """Reflect edits already applied to ``self.root`` in the search index, the view and storage."""
+
+        # 走っている検索を先に止める（索引のロックを検索の終わりまで待たないように）
+        self._cancel_pending_search()
+        self.search_index.apply_ops(ops)
+        self.quick_launch.invalidate()
+        # 変わった行だけをビューに伝えるので、展開・選択・スクロール位置はそのまま残る
+        self.source_model.apply_ops(ops)
+        self._reapply_search()
+        if preferred_selected_id is not None and not self._select_node_id(preferred_selected_id):
+            if self.search_box.text().strip():
+                self._select_after_search = preferred_selected_id
+        self.persist(*ops)
+
+    def persist(self, *ops: TreeOp):
+        job, key = self.storage.prepare_save(self.root, list(ops))
+        self.save_writer.submit(job, key=key)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from launch_tree.domain import Node, contains_node_id, find_node_ref, move_node
+from launch_tree.filter_logic import compute_visible_node_ids
+from launch_tree.storage_json import JsonStorage, dumps_tree_json
+
+DEPTH = 10_000
+
+
+def _chain(depth: int = DEPTH) -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    current = root
+    for idx in range(depth):
+        child = Node(id=f"d{idx}", name=f"Level {idx}", type="group", target="", children=[])
+        current.children.append(child)
+        current = child
+    current.children.append(Node(id="leaf", name="Leaf", type="path", target="C:/deep/leaf.txt", children=[]))
+    return root
+
+
+def test_dict_roundtrip_of_deep_chain():
+    root = _chain()
+
+    loaded = Node.from_dict(root.to_dict())
+
+    assert dumps_tree_json(loaded) == dumps_tree_json(root)
+
+
+def test_storage_roundtrip_of_deep_chain(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_chain())
+
+    loaded = storage.load_tree()
+
+    ref = find_node_ref(loaded, "leaf")
+    assert ref is not None
+    assert ref.parent is not None and ref.parent.id == f"d{DEPTH - 1}"
+
+
+def test_lookup_filter_and_move_on_deep_chain():
+    root = _chain()
+
+    assert contains_node_id(root, "leaf") is True
+    assert compute_visible_node_ids(root, "leaf") == {"root", "leaf"} | {f"d{idx}" for idx in range(DEPTH)}
+    assert move_node(root, source_id="d0", destination_parent_id=f"d{DEPTH - 1}", destination_row=0) is False
+    assert move_node(root, source_id="leaf", destination_parent_id="root", destination_row=0) is True
+    assert root.children[0].id == "leaf"
+
+
+def test_qt_model_builds_deep_chain():
+    pytest.importorskip("PyQt6")
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.model_qt import LauncherTreeModel
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    model = LauncherTreeModel(_chain(1_000))
+
+    index = model.index(2, 0)
+    depth = 0
+    while model.rowCount(index) > 0:
+        index = model.index(0, 0, index)
+        depth += 1
+    assert depth == 1_000
@@ -25,3 +25,16 @@ def test_group_or_separator_forces_empty_target():
     ok, _ = apply_node_update(node, new_type="separator")
     assert ok is True
     assert node.target == ""
+
+
+def test_target_change_hook_runs_only_when_target_changes():
+    changes = []
+    node = Node(id="n", name="App", type="path", target="C:/old.exe", children=[])
+    assert apply_node_update(node, new_name="Renamed", on_target_change=lambda *args: changes.append(args))[0]
+    assert changes == []
+
+    assert apply_node_update(node, new_target=" C:/new.exe ", on_target_change=lambda *args: changes.append(args))[0]
+    assert changes == [("C:/old.exe", "C:/new.exe")]
+
+    ok, _ = apply_node_update(node, new_target="", on_target_change=lambda *args: changes.append(args))
+    assert ok is False and len(changes) == 1
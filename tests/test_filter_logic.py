@@ -1,5 +1,6 @@
 from launch_tree.domain import Node
-from launch_tree.filter_logic import compute_visible_node_ids, node_matches_query
+from launch_tree.edit_logic import apply_node_update
+from launch_tree.filter_logic import compute_visible_node_ids, node_matches_query, node_search_keys
 
 
 def _tree() -> Node:
@@ -37,3 +38,24 @@ def test_clear_query_shows_all_nodes():
     root = _tree()
     visible = compute_visible_node_ids(root, "")
     assert visible == {"root", "g", "p", "u", "s"}
+
+
+def test_width_and_case_variants_match():
+    node = Node(id="n", name="ｶﾒﾗ Straße", type="path", target="Ｃ:/Tools/ＡＰＰ.exe", children=[])
+
+    assert node_matches_query(node, "カメラ") is True
+    assert node_matches_query(node, "STRASSE") is True
+    assert node_matches_query(node, "c:/tools/app") is True
+    assert node_matches_query(node, "ａｐｐ") is True
+
+
+def test_search_keys_are_cached_until_the_node_is_edited():
+    node = Node(id="n", name="Portal", type="url", target="https://example.com", children=[])
+    keys = node_search_keys(node)
+
+    assert node_search_keys(node) is keys
+
+    ok, _ = apply_node_update(node, new_name="Wiki", new_type="url", new_target="https://example.com")
+    assert ok
+    assert node_search_keys(node)[0] == "wiki"
+    assert node_matches_query(node, "portal") is False
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from launch_tree.icon_cache import IconDiskCache, LruCache
+
+
+def test_entries_round_trip_and_are_only_written_when_changed(tmp_path):
+    path = tmp_path / "icon_cache.bin"
+    cache = IconDiskCache(path)
+    assert cache.get("C:/a.exe") is None
+
+    cache.put("C:/a.exe", (10, 123), [b"png16", b"png32"])
+    cache.save()
+    assert IconDiskCache(path).get("C:/a.exe") == ((10, 123), [b"png16", b"png32"])
+
+    written = path.stat().st_mtime_ns
+    reloaded = IconDiskCache(path)
+    reloaded.get("C:/a.exe")
+    reloaded.save()
+    assert path.stat().st_mtime_ns == written
+
+    reloaded.discard("C:/a.exe")
+    reloaded.save()
+    assert len(IconDiskCache(path)) == 0
+
+
+def test_unreadable_cache_is_empty(tmp_path):
+    path = tmp_path / "icon_cache.bin"
+    path.write_bytes(b"not marshal")
+    cache = IconDiskCache(path)
+    assert cache.get("C:/a.exe") is None
+
+    cache.put("C:/a.exe", (1, 2), [])
+    cache.save()
+    assert IconDiskCache(path).get("C:/a.exe") == ((1, 2), [])
+
+
+def test_lru_evicts_least_recently_used_by_count_and_bytes():
+    cache = LruCache(max_entries=3, max_bytes=100, sizeof=len)
+    for key in ["a", "b", "c"]:
+        cache.put(key, "x" * 10)
+    assert cache.get("a") == "x" * 10
+    cache.put("d", "x" * 10)
+    assert "b" not in cache and "a" in cache
+
+    cache.put("e", "x" * 75)
+    # バイト数の上限を超えた分だけ古い順に追い出す
+    assert [key for key in ["a", "c", "d", "e"] if key in cache] == ["a", "d", "e"]
+    stats = cache.stats()
+    assert (stats.entries, stats.bytes, stats.evictions) == (3, 95, 2)
+    assert (stats.hits, stats.misses) == (1, 0)
+
+    cache.put("big", "x" * 500)
+    assert len(cache) == 1 and cache.stats().bytes == 500
+    assert cache.pop("big") is True and cache.pop("big") is False
+    assert cache.get("big") is None
+    stats = cache.stats()
+    assert (stats.bytes, stats.invalidations, stats.misses) == (0, 1, 1)
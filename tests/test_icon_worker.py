@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from launch_tree.icon_worker import PROBE_UNKNOWN, IconProbeWorker, path_stat
+
+
+def _collect():
+    results: dict[str, object] = {}
+    done = threading.Condition()
+
+    def on_result(target: str, value) -> None:
+        with done:
+            results[target] = value
+            done.notify_all()
+
+    return results, done, on_result
+
+
+def test_results_are_delivered_and_duplicates_merged():
+    results, done, on_result = _collect()
+    calls: list[str] = []
+    release = threading.Event()
+
+    def probe(target: str) -> bool:
+        calls.append(target)
+        release.wait(5)
+        return target.endswith("ok.exe")
+
+    worker = IconProbeWorker(on_result, probe, max_workers=2)
+    try:
+        assert worker.request("C:/ok.exe") is True
+        assert worker.request("C:/ok.exe") is False
+        worker.request("C:/missing.exe")
+        release.set()
+        with done:
+            assert done.wait_for(lambda: len(results) == 2, 5)
+    finally:
+        worker.close(timeout=5)
+
+    assert results == {"C:/ok.exe": True, "C:/missing.exe": False}
+    assert sorted(calls) == ["C:/missing.exe", "C:/ok.exe"]
+
+
+def test_slow_probe_times_out_without_holding_the_worker():
+    results, done, on_result = _collect()
+    stuck = threading.Event()
+
+    def probe(target: str) -> bool:
+        if target.startswith("//dead"):
+            stuck.wait(5)
+        return True
+
+    worker = IconProbeWorker(on_result, probe, max_workers=1, timeout=0.05)
+    try:
+        worker.request("//dead/share/app.exe")
+        worker.request("C:/local.exe")
+        with done:
+            assert done.wait_for(lambda: len(results) == 2, 5)
+    finally:
+        stuck.set()
+        worker.close(timeout=5)
+
+    assert results == {"//dead/share/app.exe": PROBE_UNKNOWN, "C:/local.exe": True}
+
+
+def test_unresponsive_share_is_not_probed_again_while_stuck():
+    results, done, on_result = _collect()
+    calls: list[str] = []
+    stuck = threading.Event()
+
+    def probe(target: str) -> bool:
+        calls.append(target)
+        if target.startswith("//dead"):
+            stuck.wait(5)
+        return True
+
+    worker = IconProbeWorker(on_result, probe, max_workers=2, timeout=0.05)
+    try:
+        worker.request("//dead/share/a.exe")
+        with done:
+            assert done.wait_for(lambda: len(results) == 1, 5)
+        for name in ["b", "c", "d"]:
+            worker.request(f"//dead/share/{name}.exe")
+        worker.request("C:/local.exe")
+        with done:
+            assert done.wait_for(lambda: len(results) == 5, 5)
+        assert worker.abandoned == 1
+        assert results["C:/local.exe"] is True and results["//dead/share/b.exe"] is PROBE_UNKNOWN
+        assert sorted(calls) == ["//dead/share/a.exe", "C:/local.exe"]
+    finally:
+        stuck.set()
+
+    # 応答が戻れば遅れた答えも届き、飛ばしたターゲットも確認し直す
+    dead = [f"//dead/share/{name}.exe" for name in "abcd"]
+    with done:
+        assert done.wait_for(lambda: all(results[target] is True for target in dead), 5)
+    worker.request("//dead/share/e.exe")
+    with done:
+        assert done.wait_for(lambda: len(results) == 6, 5)
+    worker.close(timeout=5)
+
+    assert sorted(calls) == dead + ["//dead/share/e.exe", "C:/local.exe"]
+
+
+def test_no_probe_starts_while_too_many_are_abandoned():
+    results, done, on_result = _collect()
+    calls: list[str] = []
+    stuck = threading.Event()
+
+    def probe(target: str) -> bool:
+        calls.append(target)
+        if target.startswith("//dead"):
+            stuck.wait(5)
+        return True
+
+    worker = IconProbeWorker(on_result, probe, max_workers=1, timeout=0.05, max_abandoned=2)
+    try:
+        for idx in range(4):
+            worker.request(f"//dead{idx}/share/app.exe")
+        worker.request("C:/local.exe")
+        with done:
+            assert done.wait_for(lambda: len(results) == 2, 5)
+        time.sleep(0.2)
+        # 見捨てた呼び出しが上限に達している間は新しい確認を始めない
+        assert len(calls) == 2 and len(results) == 2
+        stuck.set()
+        with done:
+            assert done.wait_for(lambda: len(results) == 5, 5)
+    finally:
+        stuck.set()
+        worker.close(timeout=5)
+
+    assert results["C:/local.exe"] is True
+
+
+def test_concurrency_is_limited():
+    results, done, on_result = _collect()
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def probe(target: str) -> bool:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return True
+
+    worker = IconProbeWorker(on_result, probe, max_workers=3)
+    try:
+        for idx in range(12):
+            worker.request(f"C:/tool_{idx}.exe")
+        with done:
+            assert done.wait_for(lambda: len(results) == 12, 5)
+    finally:
+        worker.close(timeout=5)
+
+    assert 1 <= peak <= 3
+
+
+def test_path_stat_reports_size_and_mtime(tmp_path):
+    target = tmp_path / "tool.exe"
+    target.write_bytes(b"MZ")
+    size, mtime_ns = path_stat(str(target))
+    assert size == 2 and mtime_ns == target.stat().st_mtime_ns
+    assert path_stat(str(tmp_path / "missing.exe")) is None
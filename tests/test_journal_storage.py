@@ -0,0 +1,115 @@
+from pathlib import Path
+import threading
+
+from launch_tree.domain import Node, insert_node, move_node, remove_node
+from launch_tree.storage_journal import JournalStorage
+from launch_tree.tree_ops import delete_op, insert_op, move_op, update_op
+
+
+def _tree() -> Node:
+    group = Node(id="g", name="G", type="group", target="", children=[])
+    item = Node(id="i", name="I", type="path", target="C:/i.txt", children=[])
+    return Node(id="root", name="Root", type="group", target="", children=[group, item])
+
+
+def _edit(storage: JournalStorage, root: Node) -> None:
+    new_node = Node(id="n", name="New", type="url", target="https://example.com", children=[])
+    insert_node(root, "g", 0, new_node)
+    storage.save_changes(root, [insert_op(root, new_node)])
+
+    move_node(root, "i", "g", 0)
+    storage.save_changes(root, [move_op("i", "g", 0)])
+
+    root.children[0].name = "Renamed"
+    storage.save_changes(root, [update_op(root.children[0])])
+
+    remove_node(root, "n")
+    storage.save_changes(root, [delete_op("n")])
+
+
+def test_edits_append_to_journal_and_replay_on_load(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json")
+    root = _tree()
+    storage.save_tree(root)
+    snapshot_text = storage.path.read_text(encoding="utf-8")
+
+    _edit(storage, root)
+
+    assert storage.path.read_text(encoding="utf-8") == snapshot_text
+    assert len(storage.journal_path.read_text(encoding="utf-8").splitlines()) == 4
+    loaded = JournalStorage(tmp_path / "launcher.json").load_tree()
+    assert loaded.to_dict() == root.to_dict()
+
+
+def test_replay_uses_backup_when_main_file_is_damaged(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json")
+    root = _tree()
+    storage.save_tree(root)
+    _edit(storage, root)
+
+    storage.path.write_text("{broken", encoding="utf-8")
+
+    loaded = JournalStorage(tmp_path / "launcher.json").load_tree()
+    assert loaded.to_dict() == root.to_dict()
+
+
+def test_compaction_writes_snapshot_and_trims_journal(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json", compact_threshold=3)
+    root = _tree()
+    storage.save_tree(root)
+
+    for idx in range(4):
+        node = Node(id=f"n{idx}", name=f"N{idx}", type="path", target=f"C:/{idx}", children=[])
+        insert_node(root, "root", len(root.children), node)
+        storage.save_changes(root, [insert_op(root, node)])
+    storage.wait_for_compaction()
+
+    assert not storage.journal_path.exists() or len(storage.journal_path.read_text(encoding="utf-8").splitlines()) <= 1
+    assert '"journal_seq": 3' in storage.backup_path.read_text(encoding="utf-8")
+    loaded = JournalStorage(tmp_path / "launcher.json").load_tree()
+    assert loaded.to_dict() == root.to_dict()
+
+
+def test_compaction_requested_while_one_runs_is_not_lost(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json", compact_threshold=2)
+    root = _tree()
+    storage.save_tree(root)
+    release = threading.Event()
+    write_compacted = storage._write_compacted
+
+    def slow_compaction(snapshot: Node, seq: int) -> None:
+        release.wait(5)
+        write_compacted(snapshot, seq)
+
+    storage._write_compacted = slow_compaction
+
+    def edit(idx: int):
+        node = Node(id=f"n{idx}", name=f"N{idx}", type="path", target=f"C:/{idx}", children=[])
+        insert_node(root, "root", len(root.children), node)
+        return storage.prepare_save(root, [insert_op(root, node)])[0]
+
+    # 2 回目の圧縮は、1 回目がまだ走っている間に書き込みスレッドで始めようとする
+    jobs = [edit(idx) for idx in range(4)]
+    for job in jobs:
+        job()
+    release.set()
+    storage.wait_for_compaction()
+
+    edit(4)()
+    storage.wait_for_compaction()
+
+    assert '"journal_seq": 5' in storage.backup_path.read_text(encoding="utf-8")
+    assert not storage.journal_path.exists()
+    assert JournalStorage(tmp_path / "launcher.json").load_tree().to_dict() == root.to_dict()
+
+
+def test_damaged_journal_tail_is_ignored(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json")
+    root = _tree()
+    storage.save_tree(root)
+    _edit(storage, root)
+    with storage.journal_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"seq": 99, "op": "dele')
+
+    loaded = JournalStorage(tmp_path / "launcher.json").load_tree()
+    assert loaded.to_dict() == root.to_dict()
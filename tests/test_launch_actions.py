@@ -80,6 +80,7 @@ def test_recent_updated_even_when_launch_fails(window):
 
     missing = Node(id="n4", name="missing", type="path", target="/not/found", children=[])
     window.safe_call(window.launch_node, missing)
+    window.save_writer.flush()
 
     state = load_user_state()
     assert state["recent"][0]["id"] == "n4"
@@ -97,6 +98,7 @@ def test_recent_updated_on_context_launch(window, monkeypatch):
 
     good = Node(id="n5", name="good", type="url", target="https://example.com", children=[])
     window.launch_node(good)
+    window.save_writer.flush()
 
     state = load_user_state()
     assert called["url"] == "https://example.com"
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import pytest
+
+from launch_tree.domain import Node
+
+pytest.importorskip("PyQt6")
+
+_app = None
+
+
+def _proxy(root: Node, user_state: dict):
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.model_filter import TreeFilterProxyModel
+    from launch_tree.model_qt import LauncherTreeModel
+
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    source = LauncherTreeModel(root, user_state, "all")
+    proxy = TreeFilterProxyModel(root)
+    proxy.setSourceModel(source)
+    return proxy
+
+
+def _top_level_names(proxy) -> list[str]:
+    return [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+
+
+def _tree() -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    for idx, name in enumerate(["Editor", "Browser", "Terminal"]):
+        root.children.append(Node(id=f"n{idx}", name=name, type="path", target=f"C:/{name}.exe"))
+    return root
+
+
+def test_virtual_sections_follow_their_entries():
+    user_state = {"favorites": {"n0": True}, "recent": [{"id": "n1"}], "ui": {}}
+    proxy = _proxy(_tree(), user_state)
+
+    proxy.set_query("editor")
+    assert _top_level_names(proxy) == ["Favorites", "Editor"]
+    favorites = proxy.index(0, 0)
+    assert [proxy.index(row, 0, favorites).data() for row in range(proxy.rowCount(favorites))] == ["Editor"]
+
+    proxy.set_query("browser")
+    assert _top_level_names(proxy) == ["Recent", "Browser"]
+
+    proxy.set_query("recent")
+    assert _top_level_names(proxy) == ["Recent"]
+
+    proxy.set_query("terminal")
+    assert _top_level_names(proxy) == ["Terminal"]
+
+    proxy.set_query("")
+    assert _top_level_names(proxy) == ["Favorites", "Recent", "Editor", "Browser", "Terminal"]
+
+
+def test_refreshing_a_section_retests_only_its_row(monkeypatch):
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    user_state = {"favorites": {"n0": True}, "recent": [], "ui": {}}
+    proxy = _proxy(_tree(), user_state)
+    tester = QAbstractItemModelTester(proxy, QAbstractItemModelTester.FailureReportingMode.Fatal)  # noqa: F841
+    proxy.set_query("browser")
+    assert _top_level_names(proxy) == ["Browser"]
+
+    def fail(*args):
+        raise AssertionError("the query must not be re-run")
+
+    monkeypatch.setattr(proxy, "_compute_visible_ids", fail)
+    monkeypatch.setattr(proxy, "_apply_visibility", fail)
+    for recent, names in [([{"id": "n1"}], ["Recent", "Browser"]), ([{"id": "n2"}], ["Browser"])]:
+        user_state["recent"] = recent
+        proxy.sourceModel().refresh_sections("virtual:recent")
+        proxy.refresh_sections("virtual:recent")
+        assert _top_level_names(proxy) == names
+    user_state["recent"] = [{"id": "n1"}]
+    proxy.sourceModel().refresh_sections("virtual:recent")
+    proxy.refresh_sections("virtual:recent")
+    recent = proxy.index(0, 0)
+    assert [proxy.index(row, 0, recent).data() for row in range(proxy.rowCount(recent))] == ["Browser"]
+
+
+def test_virtual_section_visibility_is_computed_once_per_query(monkeypatch):
+    from launch_tree.model_filter import TreeFilterProxyModel
+
+    user_state = {"favorites": {f"n{idx}": True for idx in range(3)}, "recent": [], "ui": {}}
+    proxy = _proxy(_tree(), user_state)
+    calls = []
+    original = TreeFilterProxyModel._is_virtual_visible
+
+    def counting(self, node):
+        cached = node.id in self._virtual_visible
+        calls.append(cached)
+        return original(self, node)
+
+    monkeypatch.setattr(TreeFilterProxyModel, "_is_virtual_visible", counting)
+    proxy.set_query("e")
+    _top_level_names(proxy)
+    # 2 回目以降の判定はキャッシュから返る
+    assert calls.count(False) <= 2
+    assert proxy._virtual_visible["virtual:favorites"][1] is True
+
+
+def _random_tree(seed: int) -> Node:
+    import random
+
+    rng = random.Random(seed)
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    groups = [root]
+    words = ["cam", "tool", "portal", "readme", "sep", "x"]
+    for idx in range(60):
+        node_type = rng.choice(["group", "group", "path", "url", "separator"])
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 2)))
+        target = "" if node_type in {"group", "separator"} else f"C:/{name}.exe"
+        node = Node(id=f"n{idx}", name=name, type=node_type, target=target, children=[])
+        rng.choice(groups).children.append(node)
+        if node_type == "group":
+            groups.append(node)
+    return root
+
+
+def _shown(proxy) -> list[tuple[str, ...]]:
+    """Paths (tuples of display names) of every proxy row, depth first."""
+
+    out = []
+    stack = [((), proxy.index(row, 0)) for row in reversed(range(proxy.rowCount()))]
+    while stack:
+        path, index = stack.pop()
+        path = path + (index.data(),)
+        out.append(path)
+        stack.extend((path, proxy.index(row, 0, index)) for row in reversed(range(proxy.rowCount(index))))
+    return out
+
+
+def _expected(proxy) -> list[tuple[str, ...]]:
+    source = proxy.sourceModel()
+    out = []
+    stack = [((), row, source.index(-1, -1)) for row in reversed(range(source.rowCount()))]
+    while stack:
+        path, row, parent = stack.pop()
+        if not proxy.filterAcceptsRow(row, parent):
+            continue
+        index = source.index(row, 0, parent)
+        path = path + (index.data(),)
+        out.append(path)
+        stack.extend((path, child, index) for child in reversed(range(source.rowCount(index))))
+    return out
+
+
+def test_query_changes_keep_model_consistent():
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    for seed in range(2):
+        root = _random_tree(seed)
+        user_state = {"favorites": {"n1": True, "n5": True}, "recent": [{"id": "n3"}], "ui": {}}
+        proxy = _proxy(root, user_state)
+        tester = QAbstractItemModelTester(proxy, QAbstractItemModelTester.FailureReportingMode.Fatal)
+        _shown(proxy)
+        for query in ["ca", "cam t", "tool", "", "type:url", "zzz", ""]:
+            proxy.set_query(query)
+            assert _shown(proxy) == _expected(proxy), (seed, query)
+        del tester
+
+
+def test_narrowing_emits_row_removals_only():
+    from PyQt6.QtCore import QPersistentModelIndex
+
+    proxy = _proxy(_tree(), {"favorites": {}, "recent": [], "ui": {}})
+    proxy.set_query("e")
+    editor = QPersistentModelIndex(proxy.index(2, 0))
+    assert editor.data() == "Editor"
+    events = []
+    proxy.modelReset.connect(lambda: events.append("reset"))
+    proxy.layoutChanged.connect(lambda: events.append("layout"))
+    proxy.rowsRemoved.connect(lambda parent, first, last: events.append(("removed", first, last)))
+    proxy.rowsInserted.connect(lambda parent, first, last: events.append(("inserted", first, last)))
+
+    proxy.set_query("edit")
+    assert events == [("removed", 3, 4), ("removed", 0, 1)]
+    assert editor.isValid() and editor.row() == 0
+
+    events.clear()
+    proxy.set_query("edit")
+    assert events == []
+
+
+def test_source_edits_keep_proxy_consistent():
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    from launch_tree.domain import insert_node, move_node, remove_node
+    from launch_tree.tree_ops import delete_op, insert_op, move_op
+
+    root = _random_tree(3)
+    user_state = {"favorites": {"n1": True}, "recent": [], "ui": {}}
+    proxy = _proxy(root, user_state)
+    source = proxy.sourceModel()
+    tester = QAbstractItemModelTester(proxy, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    for query in ["tool", ""]:
+        proxy.set_query(query)
+        _shown(proxy)
+        group = next(node for node in root.children if node.type == "group")
+        node = Node(id=f"new-{query}", name="tool new", type="url", target="https://new", children=[])
+        insert_node(root, group.id, 0, node)
+        source.apply_ops([insert_op(root, node)])
+        moved = root.children[-1]
+        move_node(root, moved.id, group.id, 0)
+        source.apply_ops([move_op(moved.id, group.id, 0)])
+        removed = root.children[0]
+        remove_node(root, removed.id)
+        source.apply_ops([delete_op(removed.id)])
+
+        proxy.set_query(query)
+        assert _shown(proxy) == _expected(proxy), query
+    del tester
+
+
+def test_moves_keep_rows_whose_visibility_went_stale():
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    from launch_tree.domain import move_node
+    from launch_tree.tree_ops import move_op
+
+    root = _tree()
+    user_state = {"favorites": {"n0": True}, "recent": [{"id": "n2"}, {"id": "n1"}], "ui": {}}
+    proxy = _proxy(root, user_state)
+    source = proxy.sourceModel()
+    tester = QAbstractItemModelTester(proxy, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    proxy.set_query("editor")
+    assert _top_level_names(proxy) == ["Favorites", "Editor"]
+
+    # Favorites は一致する項目を失ったが、検索をかけ直すまでは表示したまま
+    user_state["favorites"] = {}
+    source.refresh_sections()
+    move_node(root, "n0", root.id, 2)
+    source.apply_ops([move_op("n0", root.id, 2)])
+    user_state["recent"] = [{"id": "n1"}, {"id": "n2"}]
+    source.refresh_sections()
+    assert _top_level_names(proxy) == ["Favorites", "Editor"]
+
+    proxy.set_query("editor")
+    assert _top_level_names(proxy) == ["Editor"]
+    del tester
+
+
+def test_collapsed_rows_answer_has_children_without_mapping_their_rows():
+    root = _random_tree(0)
+    for query in ["", "tool"]:
+        proxy = _proxy(root, {"favorites": {}, "recent": [], "ui": {}})
+        source = proxy.sourceModel()
+        proxy.set_query(query)
+        answers = [proxy.hasChildren(proxy.index(row, 0)) for row in range(proxy.rowCount())]
+        # 閉じた行の子はまだ写していない
+        assert len(proxy._mappings) == 1
+        assert source._root_slot.slots == {}
+        assert answers == [proxy.rowCount(proxy.index(row, 0)) > 0 for row in range(proxy.rowCount())]
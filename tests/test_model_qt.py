@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import pytest
+
+from launch_tree.domain import Node, insert_node
+
+pytest.importorskip("PyQt6")
+
+_app = None
+
+
+def _model(root: Node, user_state: dict | None = None, view_mode: str = "all", **options):
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.model_qt import LauncherTreeModel
+
+    global _app
+    _app = QApplication.instance() or QApplication([])
+    return LauncherTreeModel(root, user_state, view_mode, **options)
+
+
+def _tree() -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    tools = Node(id="tools", name="Tools", type="group", target="", children=[])
+    tools.children.append(Node(id="editor", name="Editor", type="path", target="C:/editor.exe"))
+    tools.children.append(Node(id="sep", name="----", type="separator", target=""))
+    root.children.append(tools)
+    root.children.append(Node(id="site", name="Site", type="url", target="https://example.com"))
+    return root
+
+
+def test_model_passes_item_model_tester():
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    model = _model(_tree(), {"favorites": {"tools": True}, "recent": [{"id": "site"}], "ui": {}})
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.rebuild()
+    del tester
+
+
+def test_rows_and_roles_come_from_nodes():
+    from PyQt6.QtCore import Qt
+
+    from launch_tree.model_qt import NODE_ROLE
+
+    model = _model(_tree(), {"favorites": {"tools": True}, "recent": [], "ui": {}})
+    assert [model.index(row, 0).data() for row in range(model.rowCount())] == ["Favorites", "Recent", "Tools", "Site"]
+
+    tools = model.index(2, 0)
+    separator = model.index(1, 0, tools)
+    assert separator.data() == "—"
+    assert separator.data(NODE_ROLE).id == "sep"
+    assert separator.parent() == tools
+    assert model.index(0, 0, tools).data(Qt.ItemDataRole.ToolTipRole) == "C:/editor.exe"
+    assert model.index(1, 0).data(Qt.ItemDataRole.ToolTipRole) is None
+    assert model.headerData(0, Qt.Orientation.Horizontal) == "Launch Tree"
+
+
+def test_favorite_alias_has_its_own_parent_chain():
+    from launch_tree.model_qt import NODE_ROLE
+
+    model = _model(_tree(), {"favorites": {"tools": True}, "recent": [], "ui": {}})
+    favorites = model.index(0, 0)
+    alias = model.index(0, 0, favorites)
+    alias_editor = model.index(0, 0, alias)
+    tree_editor = model.index(0, 0, model.index(2, 0))
+
+    assert alias_editor.data(NODE_ROLE) is tree_editor.data(NODE_ROLE)
+    assert alias_editor != tree_editor
+    assert alias_editor.parent() == alias
+    assert alias.parent() == favorites
+    assert tree_editor.parent().parent().isValid() is False
+
+
+def test_view_keeps_seen_rows_until_rebuild():
+    root = _tree()
+    model = _model(root, view_mode="all")
+    tools = model.index(2, 0)
+    assert model.rowCount(tools) == 2
+
+    insert_node(root, "tools", 0, Node(id="new", name="New", type="url", target="https://new"))
+    # 変更を通知するまではビューが見ている行のまま
+    assert model.rowCount(tools) == 2
+    assert model.index(0, 0, tools).data() == "Editor"
+
+    model.rebuild()
+    tools = model.index(2, 0)
+    assert [model.index(row, 0, tools).data() for row in range(model.rowCount(tools))] == ["New", "Editor", "—"]
+
+
+def test_view_modes():
+    model = _model(_tree(), {"favorites": {"site": True}, "recent": [], "ui": {}}, "favorites")
+    assert [model.index(row, 0).data() for row in range(model.rowCount())] == ["Favorites"]
+    favorites = model.index(0, 0)
+    assert model.index(0, 0, favorites).data() == "Site"
+    assert model.hasChildren(model.index(0, 0, favorites)) is False
+
+
+def test_mime_data_carries_node_ids():
+    model = _model(_tree())
+    tools = model.index(2, 0)
+    mime = model.mimeData([tools, model.index(0, 0, tools)])
+    assert bytes(mime.data(model.MIME_TYPE)).decode("utf-8").split("\n") == ["tools", "editor"]
+
+
+def _random_edits(root: Node, rng, count: int) -> list[dict]:
+    from launch_tree.domain import move_node, remove_node
+    from launch_tree.tree_ops import delete_op, insert_op, move_op, update_op
+
+    ops = []
+    for step in range(count):
+        nodes = [node for node in _walk(root) if node is not root]
+        groups = [node for node in _walk(root) if node.type == "group"]
+        kind = rng.choice(["insert", "insert", "move", "move", "update", "delete"] if nodes else ["insert"])
+        if kind == "insert":
+            parent = rng.choice(groups)
+            node = Node(id=f"x{rng.randrange(10**9)}", name=f"Item {step}", type=rng.choice(["group", "url"]), target="", children=[])
+            insert_node(root, parent.id, rng.randint(0, len(parent.children)), node)
+            ops.append(insert_op(root, node))
+        elif kind == "move":
+            node = rng.choice(nodes)
+            parent = rng.choice(groups)
+            row = rng.randint(0, len(parent.children))
+            if move_node(root, node.id, parent.id, row):
+                ops.append(move_op(node.id, parent.id, row))
+        elif kind == "update":
+            node = rng.choice(nodes)
+            node.name = f"{node.name}!"
+            ops.append(update_op(node))
+        else:
+            node = rng.choice(nodes)
+            remove_node(root, node.id)
+            ops.append(delete_op(node.id))
+    return ops
+
+
+def _walk(node: Node):
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(current.children)
+
+
+def _model_tree(model, parent=None) -> list:
+    from PyQt6.QtCore import QModelIndex
+
+    from launch_tree.model_qt import NODE_ROLE
+
+    parent = parent or QModelIndex()
+    rows = []
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        rows.append((index.data(NODE_ROLE).id, _model_tree(model, index)))
+    return rows
+
+
+def _node_tree(nodes) -> list:
+    return [(node.id, _node_tree(node.children)) for node in nodes]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_apply_ops_keeps_model_in_sync_with_tree(seed):
+    import random
+
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    rng = random.Random(seed)
+    root = _tree()
+    user_state = {"favorites": {"tools": True}, "recent": [{"id": "site"}], "ui": {}}
+    model = _model(root, user_state)
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    for _ in range(12):
+        # 一部だけ展開済みの状態からも追従できること
+        if rng.random() < 0.5:
+            _model_tree(model)
+        model.apply_ops(_random_edits(root, rng, rng.randint(1, 3)))
+        live = _node_tree(root.children)
+        assert _model_tree(model)[2:] == live
+        favorites = _model_tree(model)[0][1]
+        assert favorites == [entry for entry in _node_tree(_walk(root)) if entry[0] == "tools"]
+    del tester
+
+
+def test_apply_ops_moves_rows_without_invalidating_indexes():
+    from PyQt6.QtCore import QPersistentModelIndex
+
+    from launch_tree.domain import move_node
+    from launch_tree.model_qt import NODE_ROLE
+    from launch_tree.tree_ops import move_op
+
+    root = _tree()
+    model = _model(root)
+    tools = model.index(2, 0)
+    editor = QPersistentModelIndex(model.index(0, 0, tools))
+    moved = []
+    model.rowsMoved.connect(lambda *args: moved.append(args[1:3]))
+    reset = []
+    model.modelReset.connect(lambda: reset.append(True))
+
+    move_node(root, "editor", "root", 2)
+    model.apply_ops([move_op("editor", "root", 2)])
+
+    assert moved == [(0, 0)] and reset == []
+    assert editor.isValid()
+    assert editor.data(NODE_ROLE).id == "editor"
+    assert editor.parent().isValid() is False
+    assert editor.row() == 4
+
+
+def test_refresh_sections_updates_only_the_sections():
+    root = _tree()
+    user_state = {"favorites": {}, "recent": [], "ui": {}}
+    model = _model(root, user_state)
+    assert model.rowCount(model.index(1, 0)) == 0
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((parent.row(), first, last)))
+
+    user_state["recent"] = [{"id": "site"}]
+    model.refresh_sections()
+
+    assert inserted == [(1, 0, 0)]
+    assert model.index(0, 0, model.index(1, 0)).data() == "Site"
+
+
+def test_launch_reorders_recent_with_a_single_move():
+    from PyQt6.QtCore import QPersistentModelIndex
+
+    root = _tree()
+    user_state = {"favorites": {"tools": True}, "recent": [{"id": "site"}, {"id": "editor"}], "ui": {}}
+    model = _model(root, user_state)
+    recent = model.index(1, 0)
+    editor = QPersistentModelIndex(model.index(1, 0, recent))
+    signals = []
+    model.rowsInserted.connect(lambda *args: signals.append("insert"))
+    model.rowsRemoved.connect(lambda *args: signals.append("remove"))
+    model.rowsMoved.connect(lambda *args: signals.append("move"))
+
+    user_state["recent"] = [{"id": "editor"}, {"id": "site"}]
+    model.refresh_sections("virtual:recent")
+
+    assert signals == ["move"]
+    assert editor.isValid() and editor.row() == 0 and editor.parent() == recent
+
+
+@pytest.mark.parametrize("seed", [3, 4, 5])
+def test_refresh_sections_follows_reordered_entries(seed):
+    import random
+
+    from PyQt6.QtTest import QAbstractItemModelTester
+
+    rng = random.Random(seed)
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    for idx in range(12):
+        root.children.append(Node(id=f"n{idx}", name=f"N{idx}", type="url", target=f"https://{idx}"))
+    user_state = {"favorites": {}, "recent": [], "ui": {}}
+    model = _model(root, user_state)
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    for _ in range(20):
+        ids = rng.sample([node.id for node in root.children], rng.randint(0, 8))
+        user_state["recent"] = [{"id": node_id} for node_id in ids]
+        model.refresh_sections("virtual:recent")
+        assert [entry[0] for entry in _model_tree(model)[1][1]] == ids
+    del tester
+
+
+def test_exe_icon_is_resolved_in_background():
+    import threading
+
+    from PyQt6.QtCore import Qt
+
+    from launch_tree.model_qt import IconResolver
+
+    release = threading.Event()
+    model = _model(_tree(), icon_resolver=IconResolver(probe=lambda target: release.wait(5) and None))
+    changed = []
+    model.dataChanged.connect(lambda first, last, roles: changed.append((first.data(), list(roles))))
+
+    editor = model.index(0, 0, model.index(2, 0))
+    placeholder = editor.data(Qt.ItemDataRole.DecorationRole)
+    assert placeholder is not None
+    assert changed == []
+
+    release.set()
+    _wait_for(lambda: changed)
+    model.icon_resolver.close(timeout=5)
+
+    assert changed == [("Editor", [Qt.ItemDataRole.DecorationRole])]
+    assert "C:/editor.exe" in model.icon_resolver._icons
+
+
+def _wait_for(condition, timeout: float = 5) -> None:
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        _app.processEvents()
+        time.sleep(0.005)
+
+
+def test_disk_cached_icon_is_shown_until_the_probe_disagrees(tmp_path):
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QColor, QIcon, QPixmap
+
+    from launch_tree.icon_cache import IconDiskCache
+    from launch_tree.model_qt import IconResolver, _icon_images
+
+    red = QPixmap(16, 16)
+    red.fill(QColor("red"))
+    cache = IconDiskCache(tmp_path / "icon_cache.bin")
+    cache.put("C:/editor.exe", (10, 1), _icon_images(QIcon(red)))
+    cache.save()
+
+    for key, expect_change in [((10, 1), False), ((10, 2), True)]:
+        resolver = IconResolver(probe=lambda target: key, disk_cache=IconDiskCache(tmp_path / "icon_cache.bin"))
+        model = _model(_tree(), icon_resolver=resolver)
+        changed = []
+        model.dataChanged.connect(lambda *args: changed.append(args))
+        editor = model.index(0, 0, model.index(2, 0))
+
+        shown = editor.data(Qt.ItemDataRole.DecorationRole).pixmap(16, 16).toImage()
+        assert shown.pixelColor(8, 8) == QColor("red")
+        _wait_for(lambda: "C:/editor.exe" not in resolver._waiting)
+        assert bool(changed) is expect_change
+        resolver.close(timeout=5)
+
+    # 変わったファイルは取り直して新しい鍵で保存される
+    assert IconDiskCache(tmp_path / "icon_cache.bin").get("C:/editor.exe")[0] == (10, 2)
+
+
+def test_invalidated_target_is_probed_again(tmp_path):
+    from PyQt6.QtCore import Qt
+
+    from launch_tree.icon_cache import IconDiskCache
+    from launch_tree.model_qt import IconResolver
+
+    probed = []
+
+    def probe(target):
+        probed.append(target)
+        return (1, len(probed))
+
+    resolver = IconResolver(probe=probe, disk_cache=IconDiskCache(tmp_path / "icon_cache.bin"))
+    model = _model(_tree(), icon_resolver=resolver)
+    editor = model.index(0, 0, model.index(2, 0))
+    editor.data(Qt.ItemDataRole.DecorationRole)
+    _wait_for(lambda: not resolver._waiting)
+    editor.data(Qt.ItemDataRole.DecorationRole)
+    assert probed == ["C:/editor.exe"]
+    assert resolver.cache_stats().entries == 1
+
+    resolver.invalidate_targets("C:/editor.exe", "C:/other.exe")
+    assert resolver.disk_cache.get("C:/editor.exe") is None
+    editor.data(Qt.ItemDataRole.DecorationRole)
+    _wait_for(lambda: not resolver._waiting)
+    resolver.close(timeout=5)
+
+    assert probed == ["C:/editor.exe", "C:/editor.exe"]
+    assert resolver.cache_stats().invalidations == 1
+
+
+def test_invalidating_a_target_while_its_probe_runs(tmp_path, monkeypatch):
+    import sys
+    import threading
+
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QColor, QIcon, QPixmap
+
+    from launch_tree.icon_cache import IconDiskCache
+    from launch_tree.model_qt import IconResolver, _icon_images
+
+    errors = []
+    monkeypatch.setattr(sys, "excepthook", lambda *args: errors.append(args))
+    red = QPixmap(16, 16)
+    red.fill(QColor("red"))
+    cache = IconDiskCache(tmp_path / "icon_cache.bin")
+    cache.put("C:/editor.exe", (10, 1), _icon_images(QIcon(red)))
+    release = threading.Event()
+
+    def probe(target):
+        release.wait(5)
+        return (10, 1)
+
+    resolver = IconResolver(probe=probe, disk_cache=cache)
+    model = _model(_tree(), icon_resolver=resolver)
+    changed = []
+    model.dataChanged.connect(lambda *args: changed.append(args))
+    editor = model.index(0, 0, model.index(2, 0))
+    assert editor.data(Qt.ItemDataRole.DecorationRole).pixmap(16, 16).toImage().pixelColor(8, 8) == QColor("red")
+
+    resolver.invalidate_targets("C:/editor.exe")
+    release.set()
+    _wait_for(lambda: "C:/editor.exe" not in resolver._waiting)
+    resolver.close(timeout=5)
+
+    assert errors == []
+    # 捨てた前回のアイコンではなく、取り直したアイコンで確定して通知される
+    assert changed
+    assert cache.get("C:/editor.exe") is not None
+    shown = editor.data(Qt.ItemDataRole.DecorationRole).pixmap(16, 16).toImage()
+    assert shown.pixelColor(8, 8) != QColor("red")
+
+
+def test_timed_out_probe_keeps_the_cached_icon(tmp_path):
+    import threading
+
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtGui import QColor, QIcon, QPixmap
+
+    from launch_tree.icon_cache import IconDiskCache
+    from launch_tree.model_qt import IconResolver, _icon_images
+
+    red = QPixmap(16, 16)
+    red.fill(QColor("red"))
+    cache = IconDiskCache(tmp_path / "icon_cache.bin")
+    cache.put("C:/editor.exe", (10, 1), _icon_images(QIcon(red)))
+    wake = threading.Event()
+    probed = []
+
+    def probe(target):
+        probed.append(target)
+        wake.wait(5)
+        return (10, 1)
+
+    resolver = IconResolver(probe=probe, disk_cache=cache, timeout=0.05)
+    model = _model(_tree(), icon_resolver=resolver)
+    editor = model.index(0, 0, model.index(2, 0))
+
+    def shown():
+        return editor.data(Qt.ItemDataRole.DecorationRole).pixmap(16, 16).toImage().pixelColor(8, 8)
+
+    assert shown() == QColor("red")
+    _wait_for(lambda: "C:/editor.exe" not in resolver._waiting)
+    # 時間切れは「存在しない」ではない: 保存分を消さず、代替アイコンも覚えない
+    assert cache.get("C:/editor.exe") is not None
+    assert "C:/editor.exe" not in resolver._icons
+    assert shown() == QColor("red")
+
+    wake.set()
+    _wait_for(lambda: resolver._worker.abandoned == 0)
+    shown()
+    _wait_for(lambda: "C:/editor.exe" in resolver._icons)
+    resolver.close(timeout=5)
+
+    assert len(probed) >= 2
+    assert cache.get("C:/editor.exe")[0] == (10, 1)
+    assert shown() == QColor("red")
+
+
+def test_late_probe_answer_updates_the_nodes_that_asked():
+    import threading
+
+    from PyQt6.QtCore import Qt
+
+    from launch_tree.model_qt import IconResolver
+
+    wake = threading.Event()
+
+    def probe(target):
+        wake.wait(5)
+        return (10, 1)
+
+    resolver = IconResolver(probe=probe, timeout=0.05)
+    model = _model(_tree(), icon_resolver=resolver)
+    changed = []
+    model.dataChanged.connect(lambda first, last, roles: changed.append(first.data()))
+    model.index(0, 0, model.index(2, 0)).data(Qt.ItemDataRole.DecorationRole)
+    _wait_for(lambda: "C:/editor.exe" not in resolver._waiting)
+    assert changed == [] and "C:/editor.exe" not in resolver._icons
+
+    # 描き直しがなくても、遅れて戻った答えで更新される
+    wake.set()
+    _wait_for(lambda: changed)
+    resolver.close(timeout=5)
+
+    assert changed == ["Editor"]
+    assert "C:/editor.exe" in resolver._icons
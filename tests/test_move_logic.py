@@ -1,3 +1,5 @@
+import random
+
 from launch_tree.domain import Node, move_node
 
 
@@ -40,3 +42,64 @@ def test_reject_move_into_descendant():
 
     assert ok is False
     assert root.children[0].id == "a"
+
+
+def _random_tree(rng: random.Random, size: int) -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    nodes = [root]
+    for idx in range(size):
+        parent = rng.choice([n for n in nodes if n.type == "group"])
+        node_type = rng.choice(["group", "group", "path", "separator"])
+        node = Node(id=f"n{idx}", name=f"N{idx}", type=node_type, target="", children=[])
+        parent.children.insert(rng.randint(0, len(parent.children)), node)
+        nodes.append(node)
+    return root
+
+
+def _reference_move(root: Node, source_id: str, destination_parent_id: str, destination_row: int) -> bool:
+    """Subtree-scan rules used before the parent-link index existed."""
+
+    def find(node: Node, node_id: str, parent: Node | None):
+        if node.id == node_id:
+            return node, parent
+        for child in node.children:
+            found = find(child, node_id, node)
+            if found is not None:
+                return found
+        return None
+
+    def contains(node: Node, node_id: str) -> bool:
+        return node.id == node_id or any(contains(child, node_id) for child in node.children)
+
+    source_found = find(root, source_id, None)
+    dest_found = find(root, destination_parent_id, None)
+    if source_found is None or dest_found is None:
+        return False
+    source, src_parent = source_found
+    dest_parent = dest_found[0]
+    if source.id == root.id or source.id == dest_parent.id or contains(source, dest_parent.id):
+        return False
+    if dest_parent.type != "group" or src_parent is None:
+        return False
+    src_index = next(idx for idx, child in enumerate(src_parent.children) if child is source)
+    src_parent.children.pop(src_index)
+    if src_parent.id == dest_parent.id and destination_row > src_index:
+        destination_row -= 1
+    dest_parent.children.insert(max(0, min(destination_row, len(dest_parent.children))), source)
+    return True
+
+
+def test_move_matches_subtree_scan_rules_on_random_trees():
+    rng = random.Random(1234)
+    for _ in range(30):
+        size = rng.randint(1, 40)
+        actual = _random_tree(random.Random(size), size)
+        expected = _random_tree(random.Random(size), size)
+        ids = ["root"] + [f"n{idx}" for idx in range(size)] + ["missing"]
+        for _ in range(40):
+            source_id = rng.choice(ids)
+            dest_id = rng.choice(ids)
+            row = rng.randint(-1, 6)
+            ok = move_node(actual, source_id=source_id, destination_parent_id=dest_id, destination_row=row)
+            assert ok is _reference_move(expected, source_id, dest_id, row)
+            assert actual.to_dict() == expected.to_dict()
@@ -0,0 +1,25 @@
+from launch_tree.domain import Node
+from launch_tree.edit_logic import apply_node_update
+
+
+def test_node_has_no_instance_dict():
+    node = Node(id="n", name="N", type="path", target="C:/n", children=[])
+
+    assert not hasattr(node, "__dict__")
+
+
+def test_loaded_and_edited_types_share_one_string():
+    payload = {
+        "id": "root",
+        "name": "Root",
+        "type": "".join(["gr", "oup"]),
+        "children": [{"id": "a", "name": "A", "type": "".join(["gr", "oup"]), "children": []}],
+    }
+
+    root = Node.from_dict(payload)
+    child = Node(id="b", name="B", type="path", target="C:/b", children=[])
+    ok, _ = apply_node_update(child, new_type="".join(["gr", "oup"]))
+
+    assert ok is True
+    assert root.type is root.children[0].type
+    assert child.type is root.type
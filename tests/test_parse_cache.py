@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+from launch_tree import storage_json
+from launch_tree.domain import Node
+from launch_tree.storage_journal import JournalStorage
+from launch_tree.storage_json import JsonStorage
+
+
+def _tree(name: str = "App") -> Node:
+    group = Node(id="g", name="Tools", type="group", target="", children=[])
+    group.children.append(Node(id="a", name=name, type="path", target="C:/tools/app.exe", children=[]))
+    return Node(id="root", name="Root", type="group", target="", children=[group])
+
+
+def _no_json(monkeypatch):
+    def fail(text):
+        raise AssertionError("JSON should not be parsed")
+
+    monkeypatch.setattr(storage_json, "loads_tree_json", fail)
+
+
+def test_unchanged_file_is_loaded_from_cache(tmp_path: Path, monkeypatch):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree())
+    assert storage.cache_path.exists()
+
+    _no_json(monkeypatch)
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+
+
+def test_cache_is_rebuilt_when_content_changes(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree("App"))
+    stat = storage.path.stat()
+    # 同じサイズ・同じ更新時刻でも内容ハッシュで検出する
+    edited = storage.path.read_text(encoding="utf-8").replace('"App"', '"Xyz"')
+    storage.path.write_text(edited, encoding="utf-8")
+    os.utime(storage.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert storage.load_tree().children[0].children[0].name == "Xyz"
+    # 再構築されたキャッシュが次回使われる
+    assert JsonStorage(storage.path).load_tree().children[0].children[0].name == "Xyz"
+
+
+def test_cache_is_created_for_hand_written_file(tmp_path: Path, monkeypatch):
+    path = tmp_path / "launcher.json"
+    JsonStorage(path, parse_cache=False).save_tree(_tree())
+    storage = JsonStorage(path)
+    assert not storage.cache_path.exists()
+
+    storage.load_tree()
+    _no_json(monkeypatch)
+
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+
+
+def test_broken_cache_falls_back_to_json(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree())
+    storage.cache_path.write_bytes(b"\x00garbage")
+
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+
+
+def test_cache_keeps_journal_sequence(tmp_path: Path, monkeypatch):
+    storage = JournalStorage(tmp_path / "launcher.json")
+    root = _tree()
+    storage.save_changes(root, [{"op": "update", "id": "a", "name": "Renamed", "type": "path", "target": ""}])
+    root.children[0].children[0].name = "Renamed"
+    root.children[0].children[0].target = ""
+    storage.save_tree(root)
+
+    _no_json(monkeypatch)
+    reloaded = JournalStorage(tmp_path / "launcher.json")
+    assert reloaded.load_tree().to_dict() == root.to_dict()
+    assert reloaded._seq == 1
+
+
+def test_save_keys_the_cache_without_reading_the_file_back(tmp_path: Path, monkeypatch):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    monkeypatch.setattr(Path, "read_bytes", lambda self: (_ for _ in ()).throw(AssertionError("read back")))
+    storage.save_tree(_tree())
+    monkeypatch.undo()
+
+    assert b"\r\n" not in storage.path.read_bytes()
+    _no_json(monkeypatch)
+    assert JsonStorage(tmp_path / "launcher.json").load_tree().to_dict() == _tree().to_dict()
@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from launch_tree.domain import Node, insert_node, remove_node
+from launch_tree.edit_logic import apply_node_update
+from launch_tree.filter_logic import compute_visible_node_ids, node_search_keys
+from launch_tree import search_index
+from launch_tree.query_logic import (
+    All,
+    AnyOf,
+    Not,
+    QueryError,
+    Term,
+    compile_query,
+    compute_query_visible_ids,
+    parse_query,
+)
+from launch_tree.search_index import SearchIndex
+from launch_tree.tree_ops import delete_op, insert_op, update_op
+
+_WORDS = ["cam", "Tool", "portal", "ΣΟΦΙΑ", "readme", "設計", "url", "sep", "ab", "x"]
+_TYPES = ["group", "group", "path", "url", "separator"]
+
+
+def _node(node_id: str, name: str, node_type: str = "path", target: str = "") -> Node:
+    return Node(id=node_id, name=name, type=node_type, target=target, children=[])
+
+
+def _random_tree(rng: random.Random, size: int) -> Node:
+    root = _node("root", "Root", "group")
+    nodes = [root]
+    for idx in range(size):
+        name = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+        target = "" if rng.random() < 0.3 else f"C:/{rng.choice(_WORDS)}/{idx}.exe"
+        node = _node(f"n{idx}", name, rng.choice(_TYPES), target)
+        rng.choice(nodes).children.append(node)
+        nodes.append(node)
+    return root
+
+
+def _walk(root: Node) -> list[Node]:
+    out, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        out.append(node)
+        stack.extend(node.children)
+    return out
+
+
+_QUERIES = [
+    "type:url",
+    "TYPE:Path cam",
+    "-type:separator",
+    "name:tool OR target:readme",
+    "cam | portal x",
+    "(cam OR tool) -type:group",
+    'name:"cam tool"',
+    "/^ab/",
+    "target:/\\d{2}\\.exe$/",
+    "NOT cam",
+    "type:url AND name:σοφ",
+    "type:nothing",
+    "name:zzz OR type:url",
+    "設計 -name:url",
+    "cam OR",
+    "-",
+]
+
+
+def test_plain_queries_are_not_parsed():
+    for query in ["", "cam", "tool portal", "C:\\tools", "a-b", "http://x/y", "1/2"]:
+        assert parse_query(query) is None, query
+
+
+def test_field_terms_and_precedence():
+    assert parse_query("type:URL") == Term(field="type", text="url")
+    assert parse_query("-type:separator") == Not(Term(field="type", text="separator"))
+    assert parse_query("a b OR c") == AnyOf((All((Term(None, "a"), Term(None, "b"))), Term(None, "c")))
+    assert parse_query("a AND (b | c)") == All((Term(None, "a"), AnyOf((Term(None, "b"), Term(None, "c")))))
+    assert parse_query('name:"Two  Words"') == Term(field="name", text="two  words")
+
+
+def test_regex_term_is_case_insensitive():
+    plan = parse_query("name:/^tool_\\d+$/")
+    assert plan.matches(node_search_keys(_node("a", "TOOL_12")))
+    assert not plan.matches(node_search_keys(_node("b", "tool_x")))
+
+
+def test_type_compares_whole_value():
+    plan = parse_query("type:ur")
+    assert not plan.matches(node_search_keys(_node("a", "x", "url")))
+
+
+@pytest.mark.parametrize("query", ['name:"open', "/[a/", "(a OR b", "a OR b )"])
+def test_malformed_queries(query):
+    with pytest.raises(QueryError):
+        parse_query(query)
+    assert compile_query(query) is None
+
+
+def test_malformed_query_falls_back_to_plain_search():
+    root = _node("root", "Root", "group")
+    root.children.append(_node("a", '"open'))
+    assert compute_query_visible_ids(root, '"open') == compute_visible_node_ids(root, '"open')
+
+
+def test_index_matches_full_scan_on_random_trees():
+    for seed in range(20):
+        root = _random_tree(random.Random(seed), 80)
+        index = SearchIndex(root)
+        for query in _QUERIES:
+            assert index.visible_node_ids(query) == compute_query_visible_ids(root, query), (seed, query)
+
+
+def test_index_matches_full_scan_with_stop_grams(monkeypatch):
+    monkeypatch.setattr(search_index, "STOP_GRAM_MIN", 3)
+    for seed in range(5):
+        root = _random_tree(random.Random(seed), 80)
+        index = SearchIndex(root)
+        for query in _QUERIES:
+            assert index.visible_node_ids(query) == compute_query_visible_ids(root, query), (seed, query)
+
+
+def test_type_index_follows_edits():
+    rng = random.Random(7)
+    root = _random_tree(rng, 40)
+    index = SearchIndex(root)
+    index.visible_node_ids("type:url")
+
+    fresh = _node("new", "fresh", "url")
+    assert insert_node(root, "root", 0, fresh)
+    index.apply_op(insert_op(root, fresh))
+    leaf = next(node for node in _walk(root) if node.type == "path" and node.target and not node.children)
+    ok, _ = apply_node_update(leaf, new_type="url")
+    assert ok
+    index.apply_op(update_op(leaf))
+    victim = root.children[-1]
+    assert remove_node(root, victim.id) is not None
+    index.apply_op(delete_op(victim.id))
+
+    for query in _QUERIES:
+        assert index.visible_node_ids(query) == compute_query_visible_ids(root, query), query
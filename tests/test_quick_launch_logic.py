@@ -0,0 +1,93 @@
+import random
+
+from launch_tree.domain import Node
+from launch_tree.filter_logic import normalize_search_text
+from launch_tree.quick_launch_logic import QuickLaunchIndex, fuzzy_score, rank_launchables, recent_bonus
+
+
+def _tree() -> Node:
+    tools = Node(id="g", name="Tools", type="group", target="", children=[])
+    tools.children.extend(
+        [
+            Node(id="vsc", name="Visual Studio Code", type="path", target="C:/vscode/code.exe", children=[]),
+            Node(id="vs", name="Visual Studio", type="path", target="C:/vs/devenv.exe", children=[]),
+            Node(id="sc", name="Screenshot", type="path", target="C:/tools/sc.exe", children=[]),
+            Node(id="sep", name="Visual separator", type="separator", target="", children=[]),
+        ]
+    )
+    portal = Node(id="p", name="Portal", type="url", target="https://example.com", children=[])
+    return Node(id="root", name="Visual Root", type="group", target="", children=[tools, portal])
+
+
+def test_only_launchable_nodes_are_returned():
+    ranked = rank_launchables(_tree(), "visual")
+
+    assert [entry.node.id for entry in ranked] == ["vs", "vsc"]
+
+
+def test_word_starts_and_prefix_rank_higher():
+    assert fuzzy_score("vsc", "visual studio code") > fuzzy_score("vsc", "devscript")
+    assert fuzzy_score("por", "portal") > fuzzy_score("por", "support")
+    assert fuzzy_score("xyz", "portal") is None
+
+
+def test_recent_items_are_boosted():
+    root = _tree()
+    assert rank_launchables(root, "visual st")[0].node.id == "vs"
+
+    ranked = rank_launchables(root, "visual st", recent_ids=["vsc", "p"])
+
+    assert ranked[0].node.id == "vsc"
+    assert recent_bonus(["a", "b", "a"]) == {"a": 40, "b": 26}
+
+
+def test_width_variants_match_via_normalized_names():
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    root.children.append(Node(id="x", name="ＥＸＣＥＬ 集計", type="path", target="C:/x.xlsx", children=[]))
+
+    assert [entry.node.id for entry in rank_launchables(root, "excel")] == ["x"]
+
+
+def _brute_force(root: Node, query: str, recent: list[str], limit: int) -> list[tuple[int, str]]:
+    needle = " ".join(normalize_search_text(query.strip()).split())
+    bonus = recent_bonus(recent)
+    scored = []
+    row = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        stack.extend(reversed(node.children))
+        if node.type not in {"path", "url"}:
+            continue
+        score = fuzzy_score(needle, normalize_search_text(node.name))
+        if score is not None:
+            scored.append((score + bonus.get(node.id, 0), -row, node.id))
+        row += 1
+    scored.sort(reverse=True)
+    return [(score, node_id) for score, _, node_id in scored[:limit]]
+
+
+def test_heap_selection_matches_full_sort_on_random_trees():
+    rng = random.Random(3)
+    words = ["tool", "portal", "code", "Visual", "sc", "ab-c", "x_y", "設計", "te st"]
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    groups = [root]
+    for idx in range(400):
+        kind = rng.choice(["group", "path", "url", "path"])
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) + (f" {idx}" if rng.random() < 0.5 else "")
+        node = Node(id=f"n{idx}", name=name, type=kind, target="", children=[])
+        rng.choice(groups).children.append(node)
+        if kind == "group":
+            groups.append(node)
+    index = QuickLaunchIndex(root)
+    recent = [f"n{rng.randrange(400)}" for _ in range(5)]
+    query = ""
+    for _ in range(300):
+        if rng.random() < 0.7:
+            query += rng.choice("toolpcdevisual -_設1 ")
+        else:
+            query = query[:-2]
+        limit = rng.choice([1, 3, 10])
+        actual = [(entry.score, entry.node.id) for entry in index.search(query, recent, limit)]
+        expected = _brute_force(root, query, recent, limit) if query.strip() else []
+        assert actual == expected, query
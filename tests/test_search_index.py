@@ -0,0 +1,204 @@
+import random
+
+from launch_tree.domain import Node, insert_node, move_node, remove_node
+from launch_tree.edit_logic import apply_node_update
+from launch_tree.filter_logic import compute_visible_node_ids
+from launch_tree import search_index
+from launch_tree.search_index import SearchIndex
+from launch_tree.tree_ops import delete_op, insert_op, move_op, update_op
+
+_WORDS = ["cam", "Tool", "portal", "ΣΟΦΙΑ", "readme", "設計", "url", "sep", "ab", "x"]
+_TYPES = ["group", "group", "path", "url", "separator"]
+
+
+def _random_node(rng: random.Random, idx: int) -> Node:
+    name = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+    target = "" if rng.random() < 0.3 else f"C:/{rng.choice(_WORDS)}/{idx}.exe"
+    return Node(id=f"n{idx}", name=name, type=rng.choice(_TYPES), target=target, children=[])
+
+
+def _random_tree(rng: random.Random, size: int) -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    nodes = [root]
+    for idx in range(size):
+        node = _random_node(rng, idx)
+        parent = rng.choice(nodes)
+        parent.children.append(node)
+        nodes.append(node)
+    return root
+
+
+def _all_nodes(root: Node) -> list[Node]:
+    out, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        out.append(node)
+        stack.extend(node.children)
+    return out
+
+
+_QUERIES = ["", "  ", "c", "ca", "cam", "CAM ", "tool", "ool p", "σοφ", "設計", "exe", "group", "url", "\x00", "zzz"]
+
+
+def test_matches_compute_visible_node_ids_on_random_trees():
+    for seed in range(30):
+        root = _random_tree(random.Random(seed), 80)
+        index = SearchIndex(root)
+        for query in _QUERIES:
+            assert index.visible_node_ids(query) == compute_visible_node_ids(root, query), (seed, query)
+
+
+def test_stop_grams_do_not_change_results(monkeypatch):
+    monkeypatch.setattr(search_index, "STOP_GRAM_MIN", 3)
+    for seed in range(10):
+        root = _random_tree(random.Random(seed), 80)
+        index = SearchIndex(root)
+        for query in _QUERIES:
+            assert index.visible_node_ids(query) == compute_visible_node_ids(root, query), (seed, query)
+        assert index._stop_grams
+
+
+def test_incremental_updates_match_full_scan(monkeypatch):
+    monkeypatch.setattr(search_index, "STOP_GRAM_MIN", 8)
+    rng = random.Random(7)
+    root = _random_tree(rng, 60)
+    index = SearchIndex(root)
+    index.rebuild()
+    next_id = 1000
+    for _ in range(300):
+        nodes = _all_nodes(root)
+        action = rng.choice(["insert", "update", "move", "delete"])
+        if action == "insert":
+            node = _random_node(rng, next_id)
+            next_id += 1
+            parent = rng.choice(nodes)
+            if insert_node(root, parent.id, rng.randint(0, len(parent.children)), node):
+                index.apply_op(insert_op(root, node))
+        elif action == "update":
+            node = rng.choice(nodes)
+            ok, _ = apply_node_update(node, new_name=rng.choice(_WORDS), new_type=node.type, new_target=node.target)
+            if ok:
+                index.apply_op(update_op(node))
+        elif action == "move":
+            source, parent = rng.choice(nodes), rng.choice(nodes)
+            row = rng.randint(0, len(parent.children))
+            if move_node(root, source.id, parent.id, row):
+                index.apply_op(move_op(source.id, parent.id, row))
+        elif len(nodes) > 1:
+            node = rng.choice(nodes[1:])
+            if remove_node(root, node.id) is not None:
+                index.apply_op(delete_op(node.id))
+
+        assert len(index) == len(_all_nodes(root))
+        query = rng.choice(_QUERIES)
+        assert index.visible_node_ids(query) == compute_visible_node_ids(root, query), query
+
+
+def test_refined_queries_match_full_scan():
+    rng = random.Random(11)
+    root = _random_tree(rng, 120)
+    index = SearchIndex(root)
+    query = ""
+    for _ in range(400):
+        action = rng.random()
+        if action < 0.6:
+            query += rng.choice("camtolprex 設計σ/.:_0123456789")
+        elif action < 0.8:
+            query = query[:-1]
+        elif action < 0.9:
+            query = rng.choice(_WORDS)
+        else:
+            node = rng.choice(_all_nodes(root))
+            node.name = rng.choice(_WORDS) + " " + node.name
+            index.apply_op(update_op(node))
+        assert index.visible_node_ids(query) == compute_visible_node_ids(root, query), query
+
+
+def test_no_match_across_field_boundary():
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    root.children.append(Node(id="a", name="abc", type="path", target="def", children=[]))
+    index = SearchIndex(root)
+
+    assert index.visible_node_ids("cde") == set()
+    assert index.visible_node_ids("bc") == {"root", "a"}
+
+
+def test_structured_queries_read_the_indexed_keys(monkeypatch):
+    from launch_tree.query_logic import compute_query_visible_ids
+
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    tool = Node(id="tool", name="Tool", type="path", target="C:/tool.exe", children=[])
+    root.children.append(tool)
+    index = SearchIndex(root)
+    assert index.visible_node_ids("name:tool") == {"root", "tool"}
+
+    # apply_ops の前の編集は、平文の検索と同じく構造化クエリにも見えない
+    tool.name = "Portal"
+
+    def fail(node):
+        raise AssertionError("searches must not read the live nodes' keys")
+
+    monkeypatch.setattr(search_index, "node_search_keys", fail)
+    assert index.visible_node_ids("name:portal") == set()
+    assert index.visible_node_ids("name:tool -type:url") == {"root", "tool"}
+    monkeypatch.undo()
+
+    index.apply_ops([update_op(tool)])
+    assert index.visible_node_ids("name:portal") == compute_query_visible_ids(root, "name:portal") == {"root", "tool"}
+
+
+def test_searching_on_a_worker_thread_while_the_tree_is_edited(monkeypatch):
+    import sys
+    import threading
+    import time
+
+    from launch_tree import domain
+    from launch_tree.domain import find_node_ref
+
+    renumber = domain.TreeIndex.renumber
+
+    def yielding_renumber(self, parent, start):
+        # 編集の途中で検索スレッドに切り替わる機会を作る
+        time.sleep(0)
+        renumber(self, parent, start)
+
+    monkeypatch.setattr(domain.TreeIndex, "renumber", yielding_renumber)
+
+    rng = random.Random(11)
+    root = _random_tree(rng, 3000)
+    index = SearchIndex(root)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    rng_query = random.Random(12)
+
+    def search() -> None:
+        # 初回の検索で索引を作るので、編集と索引作成も重なる
+        while not stop.is_set():
+            try:
+                index.visible_node_ids(rng_query.choice(["tool", "cam", "portal"]))
+            except BaseException as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+                return
+
+    worker = threading.Thread(target=search, daemon=True)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    worker.start()
+    try:
+        nodes = _all_nodes(root)
+        for _ in range(3000):
+            source, parent = rng.choice(nodes), rng.choice(nodes)
+            row = rng.randint(0, len(parent.children))
+            if move_node(root, source.id, parent.id, row):
+                index.apply_op(move_op(source.id, parent.id, row))
+    finally:
+        stop.set()
+        worker.join()
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    live = _all_nodes(root)
+    assert all(find_node_ref(root, node.id) is not None for node in live)
+    assert len(index) == len(live)
+    for query in ["tool", "cam", "exe"]:
+        assert index.visible_node_ids(query) == compute_visible_node_ids(root, query), query
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from pathlib import Path
+import threading
+import time
+
+import pytest
+
+from launch_tree.domain import Node
+from launch_tree.filter_logic import compute_visible_node_ids
+from launch_tree.search_index import SearchCancelled, SearchIndex
+from launch_tree.search_worker import SearchWorker
+
+
+def _tree(count: int = 300) -> Node:
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    for group_idx in range(count // 10):
+        group = Node(id=f"g{group_idx}", name=f"Group {group_idx}", type="group", target="", children=[])
+        for idx in range(10):
+            group.children.append(
+                Node(id=f"n{group_idx}-{idx}", name=f"Tool {group_idx * 10 + idx}", type="path", target="C:/t.exe")
+            )
+        root.children.append(group)
+    return root
+
+
+def test_stale_search_is_cancelled():
+    index = SearchIndex(_tree())
+
+    with pytest.raises(SearchCancelled):
+        index.visible_node_ids("tool", should_stop=lambda: True)
+    assert index.visible_node_ids("tool 12") == compute_visible_node_ids(index.root, "tool 12")
+
+
+def test_only_latest_query_is_delivered():
+    root = _tree()
+    results: list[tuple[int, str, set[str]]] = []
+    done = threading.Event()
+
+    def on_result(generation: int, query: str, visible: set[str]) -> None:
+        results.append((generation, query, visible))
+        if query == "tool 29":
+            done.set()
+
+    worker = SearchWorker(SearchIndex(root), on_result)
+    try:
+        for query in ["t", "to", "too", "tool", "tool ", "tool 2", "tool 29"]:
+            last = worker.submit(query)
+        assert done.wait(5)
+    finally:
+        worker.close(timeout=5)
+
+    assert results[-1] == (last, "tool 29", compute_visible_node_ids(root, "tool 29"))
+    assert all(generation <= last for generation, _, _ in results)
+
+
+def test_cancel_drops_pending_query():
+    results = []
+    worker = SearchWorker(SearchIndex(_tree()), lambda *args: results.append(args))
+    try:
+        generation = worker.submit("tool")
+        worker.cancel()
+        assert not worker.is_current(generation)
+        time.sleep(0.1)
+    finally:
+        worker.close(timeout=5)
+
+    assert results == []
+
+
+def test_window_applies_debounced_search(tmp_path: Path):
+    pytest.importorskip("PyQt6")
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.storage_json import JsonStorage
+    from launch_tree.ui_mainwindow import MainWindow
+
+    app = QApplication.instance() or QApplication([])
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree())
+    window = MainWindow(storage)
+
+    window.search_box.setText("tool 29")
+    assert window.proxy_model.query == ""
+    deadline = time.monotonic() + 5
+    while window.proxy_model.query != "tool 29" and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+    assert window.proxy_model.visible_ids == compute_visible_node_ids(window.root, "tool 29")
+
+    window.search_box.clear()
+    assert window.proxy_model.query == ""
+    window.close()
+
+
+def test_edit_cancels_running_search_before_updating_the_index(tmp_path: Path):
+    pytest.importorskip("PyQt6")
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.edit_logic import apply_node_update
+    from launch_tree.storage_json import JsonStorage
+    from launch_tree.tree_ops import update_op
+    from launch_tree.ui_mainwindow import MainWindow
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree())
+    window = MainWindow(storage)
+    started = threading.Event()
+
+    def slow_matches(needle):
+        # 索引のロックを持ったまま、取り消されるまで（最大 5 秒）走り続ける検索
+        started.set()
+        deadline = time.monotonic() + 5
+        while window.search_worker.is_current(generation) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        raise SearchCancelled(needle)
+
+    window.search_index._matching_nodes = slow_matches
+    generation = window.search_worker.submit("tool")
+    assert started.wait(5)
+
+    node = window.root.children[0]
+    assert apply_node_update(node, new_name="Renamed")[0]
+    began = time.monotonic()
+    window.commit_changes(update_op(node))
+    assert time.monotonic() - began < 2
+    window.close()
+
+
+def test_edit_during_search_requeries_on_the_worker(tmp_path: Path, monkeypatch):
+    pytest.importorskip("PyQt6")
+    from PyQt6.QtWidgets import QApplication
+
+    from launch_tree.domain import insert_node
+    from launch_tree.storage_json import JsonStorage
+    from launch_tree.tree_ops import insert_op
+    from launch_tree.ui_mainwindow import MainWindow
+
+    app = QApplication.instance() or QApplication([])
+    storage = JsonStorage(tmp_path / "launcher.json")
+    storage.save_tree(_tree())
+    window = MainWindow(storage)
+
+    def wait_for(condition) -> None:
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    window.search_box.setText("tool 29")
+    wait_for(lambda: window.proxy_model.query == "tool 29")
+    before = set(window.proxy_model.visible_ids)
+
+    def fail(query):
+        raise AssertionError("edits must not re-run the search on the UI thread")
+
+    monkeypatch.setattr(window.proxy_model, "set_query", fail)
+    node = Node(id="new", name="Tool 2999", type="path", target="C:/t.exe")
+    assert insert_node(window.root, "g0", 0, node)
+    window.commit_changes(insert_op(window.root, node), preferred_selected_id="new")
+    # 結果が届くまでは今の行のまま
+    assert window.proxy_model.visible_ids == before
+
+    wait_for(lambda: "new" in window.proxy_model.visible_ids)
+    assert window.proxy_model.visible_ids == compute_visible_node_ids(window.root, "tool 29")
+    assert window.current_selected_id() == "new"
+    window.close()
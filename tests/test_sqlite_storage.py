@@ -0,0 +1,86 @@
+import random
+from pathlib import Path
+
+from launch_tree.domain import Node, insert_node, move_node, remove_node
+from launch_tree.storage_json import JsonStorage
+from launch_tree.storage_sqlite import SqliteStorage
+from launch_tree.tree_ops import delete_op, insert_op, move_op, update_op
+
+
+def _tree() -> Node:
+    group = Node(id="g", name="G", type="group", target="", children=[])
+    group.children.append(Node(id="gi", name="GI", type="url", target="https://example.com", children=[]))
+    item = Node(id="i", name="I", type="path", target="C:/i.txt", children=[])
+    return Node(id="root", name="Root", type="group", target="", children=[group, item])
+
+
+def test_save_and_load_roundtrip(tmp_path: Path):
+    storage = SqliteStorage(tmp_path / "launcher.sqlite3")
+    root = _tree()
+
+    storage.save_tree(root)
+
+    assert storage.load_tree().to_dict() == root.to_dict()
+
+
+def test_migrates_existing_launcher_json(tmp_path: Path):
+    json_storage = JsonStorage(tmp_path / "launcher.json")
+    json_storage.save_tree(_tree())
+
+    storage = SqliteStorage(tmp_path / "launcher.sqlite3", json_path=json_storage.path)
+
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+    assert SqliteStorage(tmp_path / "launcher.sqlite3").load_tree().to_dict() == _tree().to_dict()
+
+
+def test_incremental_changes_match_domain_edits(tmp_path: Path):
+    rng = random.Random(7)
+    storage = SqliteStorage(tmp_path / "launcher.sqlite3")
+    root = _tree()
+    storage.save_tree(root)
+    counter = 0
+
+    for _ in range(200):
+        ids = [node_id for node_id in _all_ids(root) if node_id != "root"]
+        groups = [node_id for node_id in _all_ids(root) if _find(root, node_id).type == "group"]
+        action = rng.choice(["insert", "insert", "move", "update", "delete"])
+        if action == "insert" or not ids:
+            counter += 1
+            node = Node(id=f"n{counter}", name=f"N{counter}", type=rng.choice(["group", "path"]), target="", children=[])
+            insert_node(root, rng.choice(groups), rng.randint(0, 5), node)
+            op = insert_op(root, node)
+        elif action == "move":
+            node_id, parent_id, row = rng.choice(ids), rng.choice(groups), rng.randint(0, 5)
+            if not move_node(root, node_id, parent_id, row):
+                continue
+            op = move_op(node_id, parent_id, row)
+        elif action == "update":
+            node = _find(root, rng.choice(ids))
+            node.name = f"{node.name}*"
+            op = update_op(node)
+        else:
+            node_id = rng.choice(ids)
+            remove_node(root, node_id)
+            op = delete_op(node_id)
+        storage.save_changes(root, [op])
+
+    assert storage.load_tree().to_dict() == root.to_dict()
+
+
+def _all_ids(root: Node) -> list[str]:
+    ids, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        ids.append(node.id)
+        stack.extend(node.children)
+    return sorted(ids)
+
+
+def _find(root: Node, node_id: str) -> Node:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.id == node_id:
+            return node
+        stack.extend(node.children)
+    raise KeyError(node_id)
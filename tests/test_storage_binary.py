@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from launch_tree.domain import Node
+from launch_tree.storage_binary import FORMAT_VERSION, decode_tree, encode_tree
+from launch_tree.storage_journal import JournalStorage
+from launch_tree.storage_json import JsonStorage
+
+
+def _tree() -> Node:
+    group = Node(id="g", name="ツール", type="group", target="", children=[])
+    group.children.extend(
+        [
+            Node(id="a", name="App", type="path", target="\\\\server\\share\\app.exe", children=[]),
+            Node(id="b", name="Other", type="path", target="\\\\server\\share\\other.exe", children=[]),
+            Node(id="s", name="----------", type="separator", target="", children=[]),
+        ]
+    )
+    url = Node(id="u", name="Portal", type="url", target="https://example.com/a?q=1", children=[])
+    return Node(id="root", name="Root", type="group", target="", children=[group, url])
+
+
+def test_encode_decode_roundtrip():
+    root = _tree()
+
+    loaded, extra = decode_tree(encode_tree(root, extra={"journal_seq": 4}))
+
+    assert loaded.to_dict() == root.to_dict()
+    assert extra == {"journal_seq": 4}
+
+
+def test_unknown_version_is_rejected():
+    data = bytearray(encode_tree(_tree()))
+    data[4] = FORMAT_VERSION + 1
+
+    with pytest.raises(ValueError):
+        decode_tree(bytes(data))
+
+
+def test_storage_prefers_fresh_binary_snapshot(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json", binary_snapshot=True)
+    storage.save_tree(_tree())
+    stat = storage.path.stat()
+    # サイズと更新時刻が同じなら JSON は読まない
+    storage.path.write_bytes(b"x" * stat.st_size)
+    os.utime(storage.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+
+
+def test_stale_or_broken_binary_falls_back_to_json(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json", binary_snapshot=True)
+    storage.save_tree(_tree())
+    JsonStorage(storage.path).save_tree(Node(id="root", name="Edited", type="group", target="", children=[]))
+
+    assert storage.load_tree().name == "Edited"
+
+    storage.save_tree(_tree())
+    storage.binary_path.write_bytes(b"LTRB-broken")
+
+    assert storage.load_tree().to_dict() == _tree().to_dict()
+
+
+def test_journal_sequence_survives_binary_snapshot(tmp_path: Path):
+    storage = JournalStorage(tmp_path / "launcher.json", binary_snapshot=True)
+    root = _tree()
+    storage.save_changes(root, [{"op": "update", "id": "u", "name": "Renamed", "type": "url", "target": "https://x"}])
+    root.children[1].name = "Renamed"
+    root.children[1].target = "https://x"
+    storage.save_tree(root)
+
+    reloaded = JournalStorage(tmp_path / "launcher.json", binary_snapshot=True)
+    assert reloaded.load_tree().to_dict() == root.to_dict()
+    assert reloaded._seq == 1
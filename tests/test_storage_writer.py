@@ -0,0 +1,76 @@
+import threading
+from pathlib import Path
+
+from launch_tree.domain import Node
+from launch_tree.storage_json import JsonStorage
+from launch_tree.storage_writer import BackgroundWriter
+
+
+def _blocked_writer(calls: list[str]) -> tuple[BackgroundWriter, threading.Event]:
+    release = threading.Event()
+    started = threading.Event()
+    writer = BackgroundWriter(delay=0)
+
+    def blocker():
+        started.set()
+        release.wait(5)
+        calls.append("blocker")
+
+    writer.submit(blocker)
+    assert started.wait(5)
+    return writer, release
+
+
+def test_keyed_jobs_coalesce_while_worker_is_busy():
+    calls: list[str] = []
+    writer, release = _blocked_writer(calls)
+
+    for idx in range(5):
+        writer.submit(lambda idx=idx: calls.append(f"tree-{idx}"), key="tree")
+    release.set()
+
+    assert writer.close(timeout=5) is True
+    assert calls == ["blocker", "tree-4"]
+
+
+def test_unkeyed_jobs_all_run_in_order():
+    calls: list[str] = []
+    writer, release = _blocked_writer(calls)
+
+    writer.submit(lambda: calls.append("a"))
+    writer.submit(lambda: calls.append("tree"), key="tree")
+    writer.submit(lambda: calls.append("b"))
+    release.set()
+
+    assert writer.flush(timeout=5) is True
+    assert calls == ["blocker", "a", "tree", "b"]
+    writer.close()
+
+
+def test_failures_are_reported_and_do_not_stop_the_worker():
+    errors: list[Exception] = []
+    calls: list[str] = []
+    writer = BackgroundWriter(on_error=errors.append, delay=0)
+
+    def broken():
+        raise OSError("disk full")
+
+    writer.submit(broken)
+    writer.submit(lambda: calls.append("after"))
+
+    assert writer.close(timeout=5) is True
+    assert [str(exc) for exc in errors] == ["disk full"]
+    assert calls == ["after"]
+
+
+def test_prepared_save_uses_snapshot_taken_at_submit_time(tmp_path: Path):
+    storage = JsonStorage(tmp_path / "launcher.json")
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    writer = BackgroundWriter(delay=0.2)
+
+    job, key = storage.prepare_save(root, [])
+    writer.submit(job, key=key)
+    root.name = "Changed later"
+
+    assert writer.close(timeout=5) is True
+    assert storage.load_tree().name == "Root"
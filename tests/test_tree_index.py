@@ -0,0 +1,83 @@
+from launch_tree.domain import (
+    Node,
+    TreeIndex,
+    find_node_ref,
+    insert_node,
+    invalidate_index,
+    move_node,
+    remove_node,
+    tree_index,
+)
+
+
+def _tree() -> Node:
+    a = Node(id="a", name="A", type="group", target="", children=[])
+    b = Node(id="b", name="B", type="group", target="", children=[])
+    i1 = Node(id="i1", name="I1", type="path", target="C:/i1", children=[])
+    i2 = Node(id="i2", name="I2", type="path", target="C:/i2", children=[])
+    a.children.extend([i1, i2])
+    return Node(id="root", name="Root", type="group", target="", children=[a, b])
+
+
+def _assert_index_matches_tree(root: Node) -> None:
+    fresh = TreeIndex(root)
+    index = tree_index(root)
+    assert set(index.refs) == set(fresh.refs)
+    for node_id, ref in fresh.refs.items():
+        current = index.refs[node_id]
+        assert current.node is ref.node
+        assert current.parent is ref.parent
+        assert current.index == ref.index
+
+
+def test_find_node_ref_reports_parent_and_position():
+    root = _tree()
+
+    ref = find_node_ref(root, "i2")
+
+    assert ref is not None
+    assert ref.parent is not None and ref.parent.id == "a"
+    assert ref.index == 1
+
+
+def test_index_follows_insert_move_and_remove():
+    root = _tree()
+    tree_index(root)
+
+    assert insert_node(root, "a", 0, Node.make(name="new", node_type="path", target="C:/new")) is True
+    _assert_index_matches_tree(root)
+
+    assert move_node(root, source_id="i2", destination_parent_id="b", destination_row=0) is True
+    _assert_index_matches_tree(root)
+
+    removed = remove_node(root, "a")
+    assert removed is not None and removed.index == 0
+    assert find_node_ref(root, "i1") is None
+    _assert_index_matches_tree(root)
+
+
+def test_remove_root_is_rejected():
+    root = _tree()
+
+    assert remove_node(root, "root") is None
+    assert find_node_ref(root, "root") is not None
+
+
+def test_stale_entry_is_rebuilt_after_direct_edit():
+    root = _tree()
+    tree_index(root)
+
+    root.children.reverse()
+
+    ref = find_node_ref(root, "b")
+    assert ref is not None and ref.index == 0
+
+
+def test_invalidate_index_picks_up_appended_nodes():
+    root = _tree()
+    tree_index(root)
+    root.children.append(Node(id="late", name="Late", type="path", target="C:/late", children=[]))
+
+    invalidate_index(root)
+
+    assert find_node_ref(root, "late") is not None
@@ -66,3 +66,15 @@ def test_view_mode_persist_restore(tmp_path):
 
     payload = json.loads(state_path.read_text(encoding="utf-8"))
     assert payload["ui"]["view_mode"] == "recent"
+
+
+def test_tree_view_state_is_kept_and_cleaned(tmp_path):
+    state_path = tmp_path / "user_state.json"
+    set_user_state_path(state_path)
+    state_path.write_text(
+        json.dumps({"ui": {"view_mode": "all", "expanded": ["b", "a", "", "a", 3], "selected": 5}}),
+        encoding="utf-8",
+    )
+
+    loaded = load_user_state()
+    assert loaded["ui"] == {"view_mode": "all", "expanded": ["3", "a", "b"]}
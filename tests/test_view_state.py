@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtWidgets import QApplication
+
+from launch_tree.domain import Node
+from launch_tree.storage_json import JsonStorage
+from launch_tree.ui_mainwindow import MainWindow
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = QApplication.instance() or QApplication([])
+    return app
+
+
+def _storage(tmp_path: Path) -> JsonStorage:
+    storage = JsonStorage(tmp_path / "launcher.json")
+    root = Node(id="root", name="Root", type="group", target="", children=[])
+    tools = Node(id="tools", name="Tools", type="group", target="", children=[])
+    nested = Node(id="nested", name="Nested", type="group", target="", children=[])
+    nested.children.append(Node(id="site", name="Site", type="url", target="https://example.com"))
+    tools.children.append(nested)
+    tools.children.append(Node(id="editor", name="Editor", type="path", target="C:/editor.exe"))
+    root.children.append(tools)
+    storage.save_tree(root)
+    return storage
+
+
+def _index(win: MainWindow, node_id: str):
+    return win._proxy_index_for_id(node_id)
+
+
+def test_expanded_rows_are_tracked_and_persisted(tmp_path: Path, app):
+    storage = _storage(tmp_path)
+    win = MainWindow(storage)
+    win.tree.expand(_index(win, "tools"))
+    win.tree.expand(_index(win, "nested"))
+    win.tree.collapse(_index(win, "nested"))
+    win.tree.setCurrentIndex(_index(win, "editor"))
+    assert win.expanded_ids == {"tools"}
+    assert win.selected_id == "editor"
+    win.close()
+
+    saved = json.loads((tmp_path / "user_state.json").read_text(encoding="utf-8"))
+    assert saved["ui"]["expanded"] == ["tools"]
+    assert saved["ui"]["selected"] == "editor"
+
+    reopened = MainWindow(storage)
+    assert reopened.tree.isExpanded(_index(reopened, "tools"))
+    assert not reopened.tree.isExpanded(_index(reopened, "nested"))
+    assert reopened.tree.currentIndex() == _index(reopened, "editor")
+    reopened.close()
+
+
+def test_search_expansions_are_not_recorded_and_clearing_restores_the_tree(tmp_path: Path, app):
+    win = MainWindow(_storage(tmp_path))
+    win.tree.expand(_index(win, "tools"))
+
+    win.search_box.setText("site")
+    win.proxy_model.set_query("site")
+    win.tree.expandAll()
+    win.tree.collapse(_index(win, "tools"))
+    assert win.expanded_ids == {"tools"}
+
+    win.search_box.setText("")
+    assert win.tree.isExpanded(_index(win, "tools"))
+    assert not win.tree.isExpanded(_index(win, "nested"))
+
+    win.collapse_all_nodes()
+    assert win.expanded_ids == set()
+    win.expand_all_nodes()
+    assert {"tools", "nested"} <= win.expanded_ids
+    win.close()